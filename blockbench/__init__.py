@@ -0,0 +1,98 @@
+"""Tooling for loading and working with the Blockbench finding corpus."""
+
+from .blobs import BlobStore, blob_digest, intern_record, resolve_record
+from .build import BuildGraph, Builder, Target, sweep_graph
+from .callgraph import CallGraph, check_flow
+from .charts import bar_chart, heatmap, render_run, summary_chart
+from .codesearch import CodeIndex
+from .contests import Contest, crosscheck, ingest, parse_dataset
+from .dedup import Clusters, cluster, cluster_corpus
+from .fulltext import FullTextIndex
+from .generate import generate, render_prompts
+from .harness import Harness, Job, Result, StubBackend, evaluate
+from .index import MetadataIndex, Q
+from .journal import Journal
+from .languages import detect_language
+from .lines import Issue, LineTable, check_vulnerable_lines
+from .loader import LoadError, finding_files, iter_file, iter_records
+from .packer import PackedContext, pack
+from .parser import AstCache, Node
+from .refcheck import check_corpus, check_record
+from .responses import ResponseCache, response_key
+from .schema import FileReport, RECORD, compile_schema, validate_files
+from .scorer import Truth, grade, parse_report, score_results
+from .slicer import Slice, slice_code, slice_record
+from .snapshot import Snapshot, build_snapshot
+from .stats import ResultStore, breakdown, compare, summarize
+from .templates import FileRef, PromptTemplate
+
+__all__ = [
+    "AstCache",
+    "BlobStore",
+    "BuildGraph",
+    "Builder",
+    "CallGraph",
+    "Clusters",
+    "CodeIndex",
+    "Contest",
+    "FileRef",
+    "FileReport",
+    "FullTextIndex",
+    "Harness",
+    "Issue",
+    "Job",
+    "Journal",
+    "LineTable",
+    "LoadError",
+    "MetadataIndex",
+    "Node",
+    "PackedContext",
+    "PromptTemplate",
+    "Q",
+    "RECORD",
+    "ResponseCache",
+    "Result",
+    "ResultStore",
+    "Slice",
+    "Snapshot",
+    "StubBackend",
+    "Target",
+    "Truth",
+    "bar_chart",
+    "blob_digest",
+    "breakdown",
+    "build_snapshot",
+    "check_corpus",
+    "check_flow",
+    "check_record",
+    "check_vulnerable_lines",
+    "cluster",
+    "cluster_corpus",
+    "compare",
+    "compile_schema",
+    "crosscheck",
+    "detect_language",
+    "evaluate",
+    "finding_files",
+    "generate",
+    "grade",
+    "heatmap",
+    "ingest",
+    "intern_record",
+    "iter_file",
+    "iter_records",
+    "pack",
+    "parse_dataset",
+    "parse_report",
+    "render_prompts",
+    "render_run",
+    "resolve_record",
+    "response_key",
+    "score_results",
+    "slice_code",
+    "slice_record",
+    "summarize",
+    "summary_chart",
+    "sweep_graph",
+    "validate_files",
+]
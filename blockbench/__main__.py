@@ -0,0 +1,47 @@
+"""Command-line entry point: ``python -m blockbench <command> [args...]``."""
+
+from __future__ import annotations
+
+import importlib
+import sys
+
+#: Sub-command name -> module providing ``main(argv) -> int``.
+COMMANDS = {
+    "blobs": "blockbench.blobs",
+    "build": "blockbench.build",
+    "callgraph": "blockbench.callgraph",
+    "charts": "blockbench.charts",
+    "contests": "blockbench.contests",
+    "dedup": "blockbench.dedup",
+    "evaluate": "blockbench.harness",
+    "generate": "blockbench.generate",
+    "grep": "blockbench.codesearch",
+    "index": "blockbench.index",
+    "lines": "blockbench.lines",
+    "load": "blockbench.loader",
+    "outline": "blockbench.languages",
+    "parse": "blockbench.parser",
+    "refcheck": "blockbench.refcheck",
+    "responses": "blockbench.responses",
+    "schema": "blockbench.schema",
+    "score": "blockbench.scorer",
+    "search": "blockbench.fulltext",
+    "slice": "blockbench.slicer",
+    "snapshot": "blockbench.snapshot",
+    "stats": "blockbench.stats",
+    "templates": "blockbench.templates",
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print("usage: python -m blockbench <command> [args...]", file=sys.stderr)
+        print("commands: " + ", ".join(sorted(COMMANDS)), file=sys.stderr)
+        return 2
+    module = importlib.import_module(COMMANDS[argv[0]])
+    return module.main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Content-addressed storage for source bodies.
+
+Many findings embed the same ``primary_file``/``context_files`` content (the
+hybra-finance report repeats one 24 KB file in three findings).  A
+:class:`BlobStore` keeps each distinct body once under its SHA-256 digest, and
+:func:`intern_record` rewrites a record so that its files carry a
+``content_ref`` digest instead of the text.  Work derived from a body
+(tokenising, parsing, line tables) is memoised per digest with
+:meth:`BlobStore.derive`, so it runs once per unique file rather than once per
+finding.
+
+Run ``python -m blockbench blobs`` to see how much the corpus deduplicates.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from .loader import ErrorHandler, iter_records
+from .paths import cache_dir
+
+
+def blob_digest(text: str) -> str:
+    """Return the content address of ``text``."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """Store each distinct source body once, keyed by its digest.
+
+    Blobs are held in memory; when ``root`` is given they are also persisted
+    as ``root/<2 hex>/<62 hex>`` files and read back lazily.
+    """
+
+    def __init__(self, root: Path | str | None = None) -> None:
+        self.root = Path(root) if root is not None else None
+        self._blobs: dict[str, str] = {}
+        self._derived: dict[tuple[str, str], Any] = {}
+        self.bytes_in = 0
+        self.bytes_stored = 0
+
+    @classmethod
+    def on_disk(cls) -> "BlobStore":
+        """Return a store persisted under the shared cache directory."""
+        return cls(cache_dir() / "blobs")
+
+    def _path(self, digest: str) -> Path:
+        assert self.root is not None
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, text: str) -> str:
+        """Add ``text`` to the store and return its digest."""
+        digest = blob_digest(text)
+        size = len(text.encode("utf-8"))
+        self.bytes_in += size
+        if digest in self._blobs:
+            return digest
+        self._blobs[digest] = text
+        self.bytes_stored += size
+        if self.root is not None:
+            path = self._path(digest)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=path.parent)
+                with os.fdopen(fd, "w", encoding="utf-8", newline="") as fh:
+                    fh.write(text)
+                os.replace(tmp, path)
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Return the body stored under ``digest``."""
+        text = self._blobs.get(digest)
+        if text is None:
+            if self.root is None or not self._path(digest).exists():
+                raise KeyError(digest)
+            with self._path(digest).open(encoding="utf-8", newline="") as fh:
+                text = fh.read()
+            self._blobs[digest] = text
+        return text
+
+    def __contains__(self, digest: object) -> bool:
+        if digest in self._blobs:
+            return True
+        return (
+            self.root is not None
+            and isinstance(digest, str)
+            and self._path(digest).exists()
+        )
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._blobs)
+
+    def derive(self, digest: str, name: str, fn: Callable[[str], Any]) -> Any:
+        """Return ``fn(body)`` for a blob, computing it at most once per name."""
+        key = (digest, name)
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = fn(self.get(digest))
+            return value
+
+
+def _intern_file(entry: dict, store: BlobStore) -> dict:
+    if "content" not in entry:
+        return entry
+    entry = dict(entry)
+    entry["content_ref"] = store.put(entry.pop("content"))
+    return entry
+
+
+def _resolve_file(entry: dict, store: BlobStore) -> dict:
+    if "content_ref" not in entry:
+        return entry
+    entry = dict(entry)
+    entry["content"] = store.get(entry.pop("content_ref"))
+    return entry
+
+
+def intern_record(record: dict, store: BlobStore) -> dict:
+    """Return a copy of ``record`` whose file bodies live in ``store``."""
+    record = dict(record)
+    if isinstance(record.get("primary_file"), dict):
+        record["primary_file"] = _intern_file(record["primary_file"], store)
+    if isinstance(record.get("context_files"), list):
+        record["context_files"] = [
+            _intern_file(entry, store) if isinstance(entry, dict) else entry
+            for entry in record["context_files"]
+        ]
+    return record
+
+
+def resolve_record(record: dict, store: BlobStore) -> dict:
+    """Inverse of :func:`intern_record`: inline the referenced bodies."""
+    record = dict(record)
+    if isinstance(record.get("primary_file"), dict):
+        record["primary_file"] = _resolve_file(record["primary_file"], store)
+    if isinstance(record.get("context_files"), list):
+        record["context_files"] = [
+            _resolve_file(entry, store) if isinstance(entry, dict) else entry
+            for entry in record["context_files"]
+        ]
+    return record
+
+
+def record_files(record: dict) -> Iterator[dict]:
+    """Yield the primary file followed by the context files of a record."""
+    primary = record.get("primary_file")
+    if isinstance(primary, dict):
+        yield primary
+    for entry in record.get("context_files") or ():
+        if isinstance(entry, dict):
+            yield entry
+
+
+def iter_interned(
+    store: BlobStore,
+    paths: Iterable[Path | str] | None = None,
+    on_error: ErrorHandler | None = None,
+) -> Iterator[dict]:
+    """Stream corpus records with their bodies interned into ``store``."""
+    for record in iter_records(paths, on_error):
+        yield intern_record(record, store)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    store = BlobStore.on_disk() if "--persist" in argv else BlobStore()
+    paths = [Path(p) for p in argv if p != "--persist"] or None
+    files = records = 0
+    for record in iter_interned(store, paths):
+        records += 1
+        files += sum(1 for _ in record_files(record))
+    saved = store.bytes_in - store.bytes_stored
+    print(f"{records} records, {files} file bodies, {len(store)} unique")
+    print(
+        f"{store.bytes_in} bytes in, {store.bytes_stored} stored "
+        f"({saved} saved by deduplication)"
+    )
+    return 0
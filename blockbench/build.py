@@ -0,0 +1,470 @@
+"""Incremental build graph from sources to charts.
+
+A sweep is a chain of derived artefacts::
+
+    finding record / Task prompt file -> rendered prompt -> model response
+        -> score -> aggregate (results store) -> charts
+
+:func:`sweep_graph` turns a sweep into a :class:`BuildGraph` of
+:class:`Target` nodes, and :class:`Builder` brings it up to date as make
+does.  Staleness is decided by content, not timestamps.  The key of a node
+hashes its action, its parameters and the output digests of its inputs.  A
+node whose key matches the last build reuses its stored output.  A node
+whose recomputed output is unchanged leaves its dependents up to date, so
+editing a record's prose only re-scores that record.  Outputs are stored as
+JSON in a :class:`.blobs.BlobStore` under ``.blockbench/build/``, next to
+``state.json`` (node -> key and output digest).
+
+The aggregate depends on each record's breakdown fields through a small
+``meta`` node, and the charts on every stored row, so changing only a
+``vulnerability_type`` still reaches the results store and the heatmap.
+A failed response leaves its rows out of the aggregate instead of failing
+it.
+
+Nodes are run in waves of equal depth.  Stale nodes in one wave do not depend
+on each other: rendering and scoring run in worker processes, and model
+calls for the wave go through one :func:`.harness.evaluate` batch with the
+response cache.
+
+Run ``python -m blockbench build --models stub:grok,stub:sonnet [--seeds 0]
+[--levels 1,2,3] [--budget TOKENS] [--run NAME] [--tasks] [--dry-run]``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from .blobs import BlobStore, blob_digest
+from .charts import render_run
+from .generate import LEVELS, render_prompts
+from .harness import Job, backends_for, evaluate, task_prompts
+from .loader import iter_records
+from .paths import cache_dir
+from .pool import bounded_map
+from .responses import ResponseCache
+from .scorer import Truth, grade, total
+from .stats import ResultStore
+
+#: Bump when an action's output changes, to rebuild everything.
+VERSION = 2
+
+
+@dataclass(frozen=True)
+class Target:
+    """One node: ``action`` applied to ``params`` and the outputs of ``inputs``.
+
+    Sources have the ``source`` action and carry their content in ``value``.
+    """
+
+    name: str
+    action: str
+    params: tuple = ()
+    inputs: tuple[str, ...] = ()
+    value: Any = None
+
+
+class BuildGraph:
+    def __init__(self) -> None:
+        self.targets: dict[str, Target] = {}
+
+    def add(self, target: Target) -> Target:
+        for name in target.inputs:
+            if name not in self.targets:
+                raise KeyError(f"{target.name}: unknown input {name!r}")
+        self.targets[target.name] = target
+        return target
+
+    def source(self, name: str, value: Any) -> Target:
+        return self.add(Target(name, "source", value=value))
+
+    def waves(self) -> list[list[Target]]:
+        """Targets grouped by depth; a wave only depends on earlier waves."""
+        depth: dict[str, int] = {}
+        # Inputs must exist when a target is added, so insertion order is
+        # already topological.
+        for name, target in self.targets.items():
+            depth[name] = 1 + max((depth[i] for i in target.inputs), default=-1)
+        count = max(depth.values(), default=-1) + 1
+        waves: list[list[Target]] = [[] for _ in range(count)]
+        for name, level in depth.items():
+            waves[level].append(self.targets[name])
+        return waves
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def _render(params: tuple, inputs: list) -> str:
+    level, budget = params
+    return render_prompts(inputs[0], [level], budget)[level]
+
+
+def _score(params: tuple, inputs: list) -> dict:
+    prompt_id, model, seed, level = params
+    response, record = inputs
+    parts = grade(response, Truth.of(record))
+    return {
+        "prompt_id": prompt_id,
+        "model": model,
+        "seed": seed,
+        "record_id": str(record.get("id", "")),
+        "level": level,
+        "score": total(parts),
+        **{name: round(part or 0.0, 3) for name, part in parts.items()},
+    }
+
+
+def _meta(params: tuple, inputs: list) -> dict:
+    """The fields of a record the results store breaks scores down by."""
+    (record,) = inputs
+    return {field: record.get(field) for field in META_FIELDS}
+
+
+def _aggregate(params: tuple, inputs: list) -> list:
+    """Store the scores of a run; returns the stored rows.
+
+    ``inputs`` holds ``params[1]`` score outputs, then the record metadata.
+    Failed inputs are ``None`` and are left out.
+    """
+    run, count = params
+    scores = [row for row in inputs[:count] if row is not None]
+    records = {str(meta["id"]): meta for meta in inputs[count:] if meta is not None}
+    store = ResultStore.on_disk()
+    store.drop(run)
+    store.add(run, scores, records)
+    rows = []
+    for row in scores:
+        meta = records.get(str(row["record_id"]), {})
+        rows.append(
+            {
+                **{k: row[k] for k in ("prompt_id", "model", "seed", "score")},
+                **{k: meta.get(k) for k in META_FIELDS if k != "id"},
+            }
+        )
+    return sorted(rows, key=lambda r: (r["prompt_id"], r["model"], r["seed"]))
+
+
+def _charts(params: tuple, inputs: list) -> dict:
+    run, models = params
+    return render_run(ResultStore.on_disk(), run, models=list(models) or None)
+
+
+#: Record fields the aggregate depends on.
+META_FIELDS = ("id", "difficulty_tier", "vulnerability_type", "severity")
+#: Actions that run with failed inputs as ``None`` instead of failing.
+PARTIAL = frozenset({"aggregate"})
+
+#: Actions run in worker processes, in a model-call batch, or in process.
+PARALLEL: dict[str, Callable[[tuple, list], Any]] = {
+    "render": _render,
+    "score": _score,
+}
+LOCAL: dict[str, Callable[[tuple, list], Any]] = {
+    "meta": _meta,
+    "aggregate": _aggregate,
+    "charts": _charts,
+}
+
+
+def _parallel_job(item: tuple) -> tuple[str, Any]:
+    name, action, params, inputs = item
+    return name, PARALLEL[action](params, inputs)
+
+
+class Builder:
+    """Bring a :class:`BuildGraph` up to date against the stored state."""
+
+    def __init__(
+        self,
+        root: Path | str | None = None,
+        workers: int | None = None,
+        replay: Path | str | None = None,
+    ) -> None:
+        self.root = Path(root) if root is not None else cache_dir() / "build"
+        self.outputs = BlobStore(self.root / "outputs")
+        self.state_path = self.root / "state.json"
+        self.workers = workers or os.cpu_count() or 1
+        self.replay = replay
+        try:
+            self.state: dict[str, dict] = json.loads(
+                self.state_path.read_text(encoding="utf-8")
+            )
+        except (OSError, ValueError):
+            self.state = {}
+        #: Action -> nodes built / reused in the last :meth:`build`.
+        self.built: dict[str, int] = {}
+        self.reused: dict[str, int] = {}
+        self.failed: dict[str, str] = {}
+
+    def _save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(self.state, handle, separators=(",", ":"))
+        os.replace(tmp, self.state_path)
+
+    def _key(self, target: Target, digests: dict[str, str]) -> str:
+        if target.action == "source":
+            recipe = [VERSION, "source", _dumps(target.value)]
+        else:
+            recipe = [
+                VERSION,
+                target.action,
+                list(target.params),
+                # A failed input of a PARTIAL action hashes as "".
+                [digests.get(name, "") for name in target.inputs],
+            ]
+        return hashlib.sha256(_dumps(recipe).encode("utf-8")).hexdigest()
+
+    def _current(self, entry: dict | None, key: str) -> bool:
+        return bool(entry) and entry["key"] == key and entry["output"] in self.outputs
+
+    def _value(self, digest: str) -> Any:
+        return json.loads(self.outputs.get(digest))
+
+    def stale(self, graph: BuildGraph) -> list[str]:
+        """Targets a build would run, assuming every stale output changes."""
+        digests: dict[str, str] = {}
+        names = []
+        for wave in graph.waves():
+            for target in wave:
+                if target.action not in PARTIAL and any(
+                    digests.get(i) is None for i in target.inputs
+                ):
+                    names.append(target.name)
+                    continue
+                entry = self.state.get(target.name)
+                key = self._key(target, digests)
+                if target.action == "source":
+                    digests[target.name] = blob_digest(_dumps(target.value))
+                    if not entry or entry["key"] != key:
+                        names.append(target.name)
+                elif self._current(entry, key):
+                    digests[target.name] = entry["output"]
+                else:
+                    names.append(target.name)
+        return names
+
+    def build(self, graph: BuildGraph) -> dict[str, str]:
+        """Run stale targets wave by wave; returns ``name -> output digest``."""
+        self.built, self.reused, self.failed = {}, {}, {}
+        digests: dict[str, str] = {}
+        for wave in graph.waves():
+            todo: list[tuple[Target, str]] = []
+            for target in wave:
+                if target.action not in PARTIAL and any(
+                    i not in digests for i in target.inputs
+                ):
+                    self.failed[target.name] = "an input failed"
+                    continue
+                key = self._key(target, digests)
+                entry = self.state.get(target.name)
+                if self._current(entry, key):
+                    digests[target.name] = entry["output"]
+                    self.reused[target.action] = self.reused.get(target.action, 0) + 1
+                    continue
+                if target.action == "source":
+                    self._store(target, key, target.value, digests)
+                else:
+                    todo.append((target, key))
+            for target, key, value in self._run(todo, digests):
+                self._store(target, key, value, digests)
+            self._save()
+        return digests
+
+    def _store(self, target: Target, key: str, value: Any, digests: dict) -> None:
+        output = self.outputs.put(_dumps(value))
+        self.state[target.name] = {"key": key, "output": output}
+        digests[target.name] = output
+        self.built[target.action] = self.built.get(target.action, 0) + 1
+
+    def _run(
+        self, todo: list[tuple[Target, str]], digests: dict[str, str]
+    ) -> Iterator[tuple[Target, str, Any]]:
+        keys = {target.name: (target, key) for target, key in todo}
+
+        def inputs(target: Target) -> list:
+            return [
+                self._value(digests[name]) if name in digests else None
+                for name in target.inputs
+            ]
+
+        parallel = [
+            (t.name, t.action, t.params, inputs(t))
+            for t, _ in todo
+            if t.action in PARALLEL
+        ]
+        if self.workers == 1 or len(parallel) < 2:
+            for name, value in map(_parallel_job, parallel):
+                yield (*keys[name], value)
+        else:
+            with ProcessPoolExecutor(self.workers) as executor:
+                for name, value in bounded_map(
+                    executor, _parallel_job, parallel, window=self.workers * 4
+                ):
+                    yield (*keys[name], value)
+
+        # Jobs carry the prompt id, as in ``evaluate``, so replay files serve
+        # both; results find their target by prompt, model and seed.
+        targets = {}
+        jobs = []
+        for t, _ in todo:
+            if t.action == "respond":
+                prompt_id = t.name.partition(":")[2].partition("|")[0]
+                job = Job(prompt_id, inputs(t)[0], *t.params)
+                targets[prompt_id, job.model, job.seed] = t.name
+                jobs.append(job)
+        if jobs:
+            backends = backends_for({job.model for job in jobs}, self.replay)
+            cache = ResponseCache.on_disk()
+            for result in evaluate(jobs, backends, cache=cache):
+                name = targets[result.prompt_id, result.model, result.seed]
+                if result.ok:
+                    yield (*keys[name], result.response)
+                else:
+                    self.failed[name] = str(result.error)
+
+        for target, key in todo:
+            if target.action in LOCAL:
+                yield target, key, LOCAL[target.action](target.params, inputs(target))
+
+
+def sweep_graph(
+    models: Sequence[str],
+    seeds: Sequence[int] = (0,),
+    levels: Iterable[int] = LEVELS,
+    budget: int | None = None,
+    run: str = "default",
+    tasks: bool = False,
+    temperature: float = 0.0,
+    records: Iterable[dict] | None = None,
+) -> BuildGraph:
+    """The graph of a sweep over the corpus (and the ``Task-*`` prompts)."""
+    graph = BuildGraph()
+    if records is None:
+        records = iter_records(on_error=lambda error: None)
+    levels = tuple(levels)
+    scores: list[str] = []
+    metas: list[str] = []
+    prompts: list[tuple[str, str, str | None]] = []
+    for record in records:
+        record_id = str(record.get("id", ""))
+        source = graph.source(f"record:{record_id}", record).name
+        metas.append(
+            graph.add(Target(f"meta:{record_id}", "meta", (), (source,))).name
+        )
+        for level in levels:
+            prompt_id = f"{record_id}/L{level}"
+            graph.add(
+                Target(f"prompt:{prompt_id}", "render", (level, budget), (source,))
+            )
+            prompts.append((prompt_id, f"prompt:{prompt_id}", source))
+    if tasks:
+        for prompt_id, text in task_prompts():
+            graph.source(f"prompt:{prompt_id}", text)
+            prompts.append((prompt_id, f"prompt:{prompt_id}", None))
+    for prompt_id, prompt, source in prompts:
+        level = int(prompt_id.rpartition("/L")[2]) if source is not None else 0
+        for model in models:
+            for seed in seeds:
+                unit = f"{prompt_id}|{model}|{seed}"
+                response = graph.add(
+                    Target(
+                        f"response:{unit}",
+                        "respond",
+                        (model, seed, temperature),
+                        (prompt,),
+                    )
+                )
+                if source is not None:
+                    score = graph.add(
+                        Target(
+                            f"score:{unit}",
+                            "score",
+                            (prompt_id, model, seed, level),
+                            (response.name, source),
+                        )
+                    )
+                    scores.append(score.name)
+    aggregate = graph.add(
+        Target(
+            f"aggregate:{run}", "aggregate", (run, len(scores)), (*scores, *metas)
+        )
+    )
+    graph.add(
+        Target(f"charts:{run}", "charts", (run, tuple(models)), (aggregate.name,))
+    )
+    return graph
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    usage = (
+        "usage: build --models BACKEND:MODEL,... [--seeds 0,1] [--levels 1,2,3] "
+        "[--budget TOKENS] [--run NAME] [--replay FILE] [--workers N] "
+        "[--tasks] [--dry-run]"
+    )
+    flags = {flag: flag in argv for flag in ("--tasks", "--dry-run")}
+    for flag, given in flags.items():
+        if given:
+            argv.remove(flag)
+    options = {
+        "--models": None,
+        "--seeds": "0",
+        "--levels": "1,2,3",
+        "--budget": None,
+        "--run": "default",
+        "--replay": None,
+        "--workers": None,
+    }
+    for name in options:
+        if name in argv:
+            i = argv.index(name)
+            if i + 1 == len(argv):
+                print(usage, file=sys.stderr)
+                return 2
+            options[name] = argv[i + 1]
+            del argv[i : i + 2]
+    models = options["--models"].split(",") if options["--models"] else []
+    bare = [model for model in models if not Job("", "", model).backend]
+    if bare:
+        print(f"build: no backend in {', '.join(bare)}", file=sys.stderr)
+    if argv or not models or bare:
+        print(usage, file=sys.stderr)
+        return 2
+    graph = sweep_graph(
+        models,
+        [int(seed) for seed in options["--seeds"].split(",")],
+        [int(level) for level in options["--levels"].split(",")],
+        int(options["--budget"]) if options["--budget"] else None,
+        options["--run"],
+        flags["--tasks"],
+    )
+    builder = Builder(
+        workers=int(options["--workers"]) if options["--workers"] else None,
+        replay=options["--replay"],
+    )
+    if flags["--dry-run"]:
+        stale = builder.stale(graph)
+        for name in stale:
+            print(name)
+        print(f"{len(stale)} of {len(graph.targets)} targets stale", file=sys.stderr)
+        return 0
+    builder.build(graph)
+    for action in sorted(set(builder.built) | set(builder.reused)):
+        print(
+            f"{action}: {builder.built.get(action, 0)} built, "
+            f"{builder.reused.get(action, 0)} up to date"
+        )
+    for name, error in builder.failed.items():
+        print(f"failed: {name}: {error}", file=sys.stderr)
+    return 1 if builder.failed else 0
@@ -0,0 +1,482 @@
+"""Cross-file symbol resolution and call graphs for finding records.
+
+A record's ``call_flow`` names a chain of calls that usually crosses files,
+e.g. ``Router.swap() -> PoolManager.swap() -> UniswapV4KEMHook.beforeSwap()
+-> HookDataDecoder.decodeAllHookData()``.  :class:`CallGraph` joins the parsed
+trees (see :mod:`.parser`) of ``primary_file`` and ``context_files`` into one
+symbol table and resolves every call in every function body:
+
+* bare calls through the caller's inheritance chain,
+* ``super.f()``, ``this.f()`` and ``Library.f()``,
+* ``IERC20(token).f()`` casts and calls on state variables and parameters of
+  contract type,
+* ``x.f()`` through the ``using Library for Type`` directives in scope.
+
+Calls on interfaces also reach the contracts implementing them.  The symbol
+table of a body is memoised by content digest and whole graphs by the
+digests of their files, so records sharing files share the work.
+
+:func:`check_flow` matches the steps of a ``call_flow`` string against the
+graph.  Run ``python -m blockbench callgraph RECORD_ID`` to print a record's
+resolved calls and flow check.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from .blobs import blob_digest, record_files
+from .languages import detect_language
+from .loader import iter_records
+from .parser import AstCache, Node
+from .solidity import CALLABLES, CONTAINERS
+
+#: Functions and casts provided by the language itself.
+BUILTINS = frozenset(
+    {
+        "require",
+        "assert",
+        "revert",
+        "keccak256",
+        "sha256",
+        "ripemd160",
+        "ecrecover",
+        "addmod",
+        "mulmod",
+        "gasleft",
+        "blockhash",
+        "selfdestruct",
+        "type",
+        "address",
+        "payable",
+        "bool",
+        "string",
+        "bytes",
+    }
+)
+_ELEMENTARY = re.compile(r"^(?:u?int\d*|bytes\d+|u?fixed[\dx]*)$")
+_BUILTIN_RECEIVERS = frozenset({"abi", "msg", "block", "tx", "bytes", "string"})
+#: How many hops a ``call_flow`` step may skip and still count as linked.
+FLOW_DEPTH = 4
+
+# No space before "(": "calculate offset (incorrect)" is prose, not a call.
+_STEP_CALL = re.compile(r"(?:([A-Za-z_$][\w$]*)\.)?([A-Za-z_$][\w$]*)\(")
+_STEP_NAME = re.compile(r"^(?:([A-Za-z_$][\w$]*)\.)?([A-Za-z_$][\w$]*)$")
+_IDENTIFIER_LIKE = re.compile(r"^(?:_[A-Za-z$]|[a-z$][\w$]*(?:[a-z0-9][A-Z]|_))")
+
+
+def is_builtin(name: str) -> bool:
+    return name in BUILTINS or bool(_ELEMENTARY.match(name))
+
+
+def looks_like_identifier(name: str) -> bool:
+    """``newMaker`` or ``_vote`` rather than an English word or an actor."""
+    return bool(_IDENTIFIER_LIKE.search(name))
+
+
+@dataclass
+class Contract:
+    """Symbols declared by one contract, interface or library."""
+
+    name: str
+    kind: str
+    path: str
+    bases: list[str] = field(default_factory=list)
+    functions: dict[str, list[Node]] = field(default_factory=dict)
+    variables: dict[str, str] = field(default_factory=dict)
+    usings: list[tuple[str, str]] = field(default_factory=list)
+
+
+def _type_name(type_text: str) -> str:
+    """``IERC20`` for ``IERC20``, ``contract IERC20`` or ``Lib.IERC20[]``."""
+    head = type_text.split("(")[0].split("[")[0].split()
+    return head[-1].rpartition(".")[2] if head else ""
+
+
+def _table(nodes: list[Node], path: str) -> list[Contract]:
+    contracts: list[Contract] = []
+    free = Contract("", "file", path)
+    for node in nodes:
+        if node.kind in CONTAINERS:
+            bases = node.attrs.get("bases", [])
+            contract = Contract(node.name, node.kind, path, bases)
+            members = node.children
+            contracts.append(contract)
+        else:
+            contract, members = free, (node,)
+        for member in members:
+            if member.kind in CALLABLES:
+                contract.functions.setdefault(member.name, []).append(member)
+            elif member.kind == "variable":
+                contract.variables[member.name] = member.attrs.get("type", "")
+            elif member.kind == "using":
+                contract.usings.append((member.name, member.attrs.get("for", "*")))
+    if free.functions or free.usings:
+        contracts.append(free)
+    return contracts
+
+
+_tables: dict[str, list[Contract]] = {}
+_graphs: dict[tuple[str, ...], "CallGraph"] = {}
+_cache: AstCache | None = None
+
+
+def symbol_table(text: str, path: str = "") -> list[Contract]:
+    """Contracts declared in a Solidity body, memoised by content digest."""
+    global _cache
+    digest = blob_digest(text)
+    table = _tables.get(digest)
+    if table is None:
+        if _cache is None:
+            _cache = AstCache.on_disk()
+        table = _tables[digest] = _table(_cache.parse(text), path)
+    return table
+
+
+@dataclass(frozen=True)
+class Unresolved:
+    caller: str
+    receiver: str | None
+    name: str
+    line: int
+    path: str
+
+
+class CallGraph:
+    """Resolved calls between the functions of a set of files."""
+
+    def __init__(self, files: Iterable[tuple[str, str]]) -> None:
+        self.contracts: dict[str, Contract] = {}
+        self.free = Contract("", "file", "")
+        self.functions: dict[str, tuple[str, Node]] = {}
+        self.edges: dict[str, set[str]] = {}
+        self.unresolved: list[Unresolved] = []
+        for path, text in files:
+            for contract in symbol_table(text, path):
+                if not contract.name:
+                    for name, nodes in contract.functions.items():
+                        self.free.functions.setdefault(name, []).extend(nodes)
+                    self.free.usings.extend(contract.usings)
+                else:
+                    # First declaration wins; records repeat shared files.
+                    self.contracts.setdefault(contract.name, contract)
+        self._implementers: dict[str, set[str]] = {}
+        for contract in self.contracts.values():
+            for base in self.linearize(contract.name)[1:]:
+                self._implementers.setdefault(base, set()).add(contract.name)
+        for contract in [*self.contracts.values(), self.free]:
+            for name, nodes in contract.functions.items():
+                qualified = f"{contract.name}.{name}" if contract.name else name
+                for node in nodes:
+                    self.functions.setdefault(qualified, (contract.path, node))
+                    self.edges.setdefault(qualified, set())
+                    for receiver, callee, line in node.attrs.get("calls", ()):
+                        targets = self.resolve(contract, node, receiver, callee)
+                        if targets is None:
+                            continue
+                        if targets:
+                            self.edges[qualified].update(targets)
+                        else:
+                            self.unresolved.append(
+                                Unresolved(
+                                    qualified, receiver, callee, line, contract.path
+                                )
+                            )
+
+    @classmethod
+    def for_record(cls, record: dict) -> "CallGraph":
+        """The graph over a record's Solidity files, shared between records."""
+        files = []
+        for entry in record_files(record):
+            text = entry.get("content")
+            path = str(entry.get("path", ""))
+            if isinstance(text, str) and detect_language(text, path) == "solidity":
+                files.append((path, text))
+        key = tuple(blob_digest(text) for _, text in files)
+        graph = _graphs.get(key)
+        if graph is None:
+            graph = _graphs[key] = cls(files)
+        return graph
+
+    # -- symbols ------------------------------------------------------------
+
+    def linearize(self, name: str) -> list[str]:
+        """``name`` followed by its bases, most derived first."""
+        order: list[str] = []
+        pending = [name]
+        while pending:
+            current = pending.pop(0)
+            if current in order:
+                continue
+            order.append(current)
+            contract = self.contracts.get(current)
+            if contract is not None:
+                pending.extend(reversed(contract.bases))
+        return order
+
+    def implementers(self, name: str) -> set[str]:
+        """Contracts inheriting, directly or not, from ``name``."""
+        return self._implementers.get(name, set())
+
+    def _member(self, contract_name: str, function: str) -> list[str]:
+        for name in self.linearize(contract_name):
+            contract = self.contracts.get(name)
+            if contract is not None and function in contract.functions:
+                return [f"{name}.{function}"]
+        return []
+
+    def lookup(self, contract: str | None, function: str) -> list[str]:
+        """Qualified names a ``Contract.function`` reference may denote."""
+        if contract is None:
+            found = [q for q in self.functions if q.rpartition(".")[2] == function]
+            return sorted(found)
+        found = self._member(contract, function)
+        for name in sorted(self.implementers(contract)):
+            found += [q for q in self._member(name, function) if q not in found]
+        return found
+
+    def _variable_type(self, contract: Contract, node: Node, name: str) -> str:
+        for type_text, parameter in node.attrs.get("parameters", ()):
+            if parameter == name:
+                return type_text
+        for base in self.linearize(contract.name):
+            declared = self.contracts.get(base)
+            if declared is not None and name in declared.variables:
+                return declared.variables[name]
+        return ""
+
+    def _usings(self, contract: Contract) -> list[tuple[str, str]]:
+        usings = list(self.free.usings)
+        for base in self.linearize(contract.name):
+            declared = self.contracts.get(base)
+            if declared is not None:
+                usings.extend(declared.usings)
+        return usings
+
+    def resolve(
+        self, contract: Contract, node: Node, receiver: str | None, name: str
+    ) -> list[str] | None:
+        """Targets of one call; ``[]`` if unresolved, None if not a call."""
+        if receiver is None:
+            if is_builtin(name) or name in self.contracts or name[:1].isupper():
+                # Casts, struct literals and custom errors in ``require``.
+                return None
+            if contract.name:
+                found = self._member(contract.name, name)
+                if found:
+                    return found
+            return [name] if name in self.free.functions else []
+        if receiver == "new":
+            return None
+        head = receiver.split(".")[0].split("[")[0]
+        if head in _BUILTIN_RECEIVERS and "(" not in head:
+            return None
+        if receiver == "super":
+            for base in self.linearize(contract.name)[1:]:
+                found = self._member(base, name)
+                if found:
+                    return found
+            return []
+        if receiver == "this":
+            return self._member(contract.name, name)
+        target = ""
+        if receiver.endswith("()") and receiver[:-2] in self.contracts:
+            target = receiver[:-2]
+        elif receiver in self.contracts:
+            target = receiver
+        else:
+            type_text = self._variable_type(contract, node, receiver)
+            type_name = _type_name(type_text)
+            if type_name in self.contracts:
+                target = type_name
+            for library, applies_to in self._usings(contract):
+                if applies_to in ("*", type_text, type_name) or not type_text:
+                    found = self._member(library, name)
+                    if found:
+                        return found
+        return self.lookup(target, name) if target else []
+
+    # -- traversal ----------------------------------------------------------
+
+    def successors(self, qualified: str) -> set[str]:
+        """Direct callees, with interface targets widened to implementations."""
+        result = set()
+        for callee in self.edges.get(qualified, ()):
+            result.add(callee)
+            contract, _, function = callee.rpartition(".")
+            if contract:
+                result.update(self.lookup(contract, function))
+        return result
+
+    def reachable(self, source: str, target: str, depth: int = FLOW_DEPTH) -> int:
+        """Hops from ``source`` to ``target`` (0 if unreachable)."""
+        seen = {source}
+        queue = deque([(source, 0)])
+        while queue:
+            current, hops = queue.popleft()
+            if hops >= depth:
+                continue
+            for callee in self.successors(current):
+                if callee == target:
+                    return hops + 1
+                if callee not in seen:
+                    seen.add(callee)
+                    queue.append((callee, hops + 1))
+        return 0
+
+    def callees(self, qualified: str, depth: int = 2) -> set[str]:
+        """Functions reachable from ``qualified`` within ``depth`` calls."""
+        found: set[str] = set()
+        frontier = {qualified}
+        for _ in range(depth):
+            frontier = {c for f in frontier for c in self.successors(f)} - found
+            found |= frontier
+        found.discard(qualified)
+        return found
+
+
+# -- call_flow checks -------------------------------------------------------
+
+
+@dataclass
+class FlowStep:
+    """One ``call_flow`` step.
+
+    ``status`` is ``"prose"`` (no function named), ``"ok"`` (resolved),
+    ``"external"`` (names a contract or call outside the record's files) or
+    ``"unknown"`` (names nothing the files declare or call).
+    """
+
+    text: str
+    refs: list[tuple[str | None, str]]
+    targets: list[str]
+    status: str = "prose"
+
+
+@dataclass
+class FlowLink:
+    source: FlowStep
+    target: FlowStep
+    hops: int
+
+    @property
+    def status(self) -> str:
+        if self.hops == 1:
+            return "direct"
+        return "indirect" if self.hops else "missing"
+
+
+@dataclass
+class FlowCheck:
+    record_id: str
+    steps: list[FlowStep]
+    links: list[FlowLink]
+
+    @property
+    def unknown(self) -> list[FlowStep]:
+        """Steps naming something the record's files neither declare nor call."""
+        return [step for step in self.steps if step.status == "unknown"]
+
+    @property
+    def missing(self) -> list[FlowLink]:
+        return [link for link in self.links if not link.hops]
+
+
+def flow_refs(step: str) -> list[tuple[str | None, str]]:
+    """The ``Contract.function`` references in one ``call_flow`` step."""
+    refs = [
+        (contract or None, name)
+        for contract, name in _STEP_CALL.findall(step)
+        if not is_builtin(name) and contract not in _BUILTIN_RECEIVERS
+    ]
+    if not refs:
+        # A step that is just ``f``, ``C.f`` or ``f/g``.  A lone word is only
+        # taken for a function if it looks like an identifier (``newMaker``,
+        # ``_vote``) rather than an actor or plain English ("User", "delay").
+        for part in step.strip().split("/"):
+            match = _STEP_NAME.match(part.strip())
+            if not match or is_builtin(match.group(2)):
+                continue
+            contract, name = match.groups()
+            if contract or looks_like_identifier(name):
+                refs.append((contract, name))
+    return refs
+
+
+def check_flow(record: dict, graph: CallGraph | None = None) -> FlowCheck:
+    """Resolve each ``call_flow`` step and check the steps are linked.
+
+    A step names functions (``Contract.f()``, ``f()`` or a bare ``f``); prose
+    steps are skipped.  A resolved step is linked to the closest earlier one
+    from which one of its targets is reachable within :data:`FLOW_DEPTH`
+    calls, since flows often list several callees of one function in turn.
+    Steps naming a function of the previous step count as direct.
+    """
+    graph = graph or CallGraph.for_record(record)
+    called = {call.name for call in graph.unresolved}
+    steps = []
+    for text in re.split(r"\s*(?:->|→)\s*", str(record.get("call_flow") or "")):
+        refs = flow_refs(text)
+        targets = []
+        for contract, name in refs:
+            for target in graph.lookup(contract, name):
+                if target not in targets:
+                    targets.append(target)
+        status = "prose"
+        if targets:
+            status = "ok"
+        elif refs:
+            external = any(
+                (contract is not None and contract not in graph.contracts)
+                or name in called
+                for contract, name in refs
+            )
+            status = "external" if external else "unknown"
+        steps.append(FlowStep(text, refs, targets, status))
+    resolved = [step for step in steps if step.targets]
+    links = []
+    for position, target in enumerate(resolved[1:], 1):
+        link = FlowLink(resolved[position - 1], target, 0)
+        for source in reversed(resolved[:position]):
+            if set(source.targets) & set(target.targets):
+                link = FlowLink(source, target, 1)
+                break
+            hops = [
+                graph.reachable(a, b) for a in source.targets for b in target.targets
+            ]
+            found = [h for h in hops if h]
+            if found:
+                link = FlowLink(source, target, min(found))
+                break
+        links.append(link)
+    return FlowCheck(str(record.get("id", "")), steps, links)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: callgraph RECORD_ID", file=sys.stderr)
+        return 2
+    for record in iter_records():
+        if record.get("id") != argv[0]:
+            continue
+        graph = CallGraph.for_record(record)
+        for caller in sorted(graph.edges):
+            for callee in sorted(graph.edges[caller]):
+                print(f"{caller} -> {callee}")
+        for call in graph.unresolved:
+            receiver = f"{call.receiver}." if call.receiver else ""
+            print(f"{call.caller} -> ?{receiver}{call.name} (line {call.line})")
+        check = check_flow(record, graph)
+        print(f"\ncall_flow of {check.record_id}:")
+        for step in check.steps:
+            print(f"  {step.status:<8} {step.text}")
+        for link in check.links:
+            print(f"  {link.status}: {link.source.text} -> {link.target.text}")
+        return 0
+    print(f"no record with id {argv[0]!r}", file=sys.stderr)
+    return 1
@@ -0,0 +1,366 @@
+"""SVG charts rendered from the results store.
+
+The ``Task-*/results.svg`` charts were written by hand.  :func:`bar_chart`
+draws the same chart from data: the same canvas, grid, fonts, colours and
+comments.  Given the scores in a hand-written chart, it reproduces that file
+byte for byte.  More than three models widen the canvas instead of squeezing
+the bars.  Two more kinds cover a whole run:
+
+* :func:`summary_chart`: grouped bars of every model on every task,
+* :func:`heatmap`: models by ``vulnerability_type``, shaded by mean score.
+
+A task is the part of a prompt id before the first ``/``: ``Task-1`` for
+``Task-1/prompt_1``, or the record id for generated prompts.
+
+:func:`render_run` is incremental.  Each chart's input data is hashed, and
+the hash is kept in ``manifest.json`` in the output directory.  A chart is
+only rendered again when its data changed or its file is missing, so a
+refresh after each sweep costs only the charts that changed.
+
+Run ``python -m blockbench charts [--run NAME] [--out DIR] [--models A,B]``;
+charts go to ``.blockbench/charts/`` by default.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from html import escape
+from pathlib import Path
+from typing import Callable, Sequence
+
+from .paths import cache_dir
+from .stats import ResultStore
+
+#: Bump when the output of a renderer changes, to redraw every chart.
+VERSION = 1
+#: ``(colour, name)`` per model, in the order of the hand-written charts.
+PALETTE = (
+    ("#000000", "Black"),
+    ("#ff8800", "Orange"),
+    ("#00aa00", "Green"),
+    ("#1f77b4", "Blue"),
+    ("#aa00aa", "Purple"),
+    ("#cc0000", "Red"),
+    ("#8c564b", "Brown"),
+    ("#17becf", "Cyan"),
+)
+FONT = "Arial, sans-serif"
+#: Pixels per score point; 10 points span 100 pixels, as in the originals.
+UNIT = 10
+BASELINE = 250
+
+
+def format_score(score: float) -> str:
+    """``9.0`` -> ``"9"``, ``3.24`` -> ``"3.2"``."""
+    text = f"{score:.1f}"
+    return text[:-2] if text.endswith(".0") else text
+
+
+def _letter(i: int) -> str:
+    return chr(ord("A") + i) if i < 26 else str(i + 1)
+
+
+def _frame(width: int, title: str, axis_end: int) -> list[str]:
+    """Background, title, y-axis label and the 0/5/10 grid."""
+    middle = width // 2
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="300" '
+        f'viewBox="0 0 {width} 300">',
+        "  <!-- Background -->",
+        f'  <rect width="{width}" height="300" fill="#ffffff"/>',
+        "  ",
+        "  <!-- Title -->",
+        f'  <text x="{middle}" y="30" font-family="{FONT}" font-size="18" '
+        f'font-weight="bold" text-anchor="middle">{escape(title)}</text>',
+        "  ",
+        "  <!-- Y-axis label -->",
+        f'  <text x="20" y="150" font-family="{FONT}" font-size="12" '
+        'text-anchor="middle" transform="rotate(-90 20 150)">Score</text>',
+        "  ",
+        "  <!-- Y-axis grid lines and labels -->",
+    ]
+    for i, tick in enumerate((0, 5, 10)):
+        y = BASELINE - tick * UNIT
+        if i:
+            lines.append("  ")
+        lines += [
+            f'  <line x1="60" y1="{y}" x2="{axis_end}" y2="{y}" stroke="#e0e0e0" '
+            'stroke-width="1"/>',
+            f'  <text x="50" y="{y + 5}" font-family="{FONT}" font-size="10" '
+            f'text-anchor="end" fill="#666">{tick}</text>',
+        ]
+    return lines
+
+
+def _close(lines: list[str], axis_end: int) -> str:
+    lines += [
+        "  ",
+        "  <!-- X-axis -->",
+        f'  <line x1="60" y1="{BASELINE}" x2="{axis_end}" y2="{BASELINE}" '
+        'stroke="#333" stroke-width="2"/>',
+        "</svg>",
+        "",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def bar_chart(title: str, bars: Sequence[tuple[str, float]]) -> str:
+    """One bar per ``(label, score)``, in the style of ``Task-*/results.svg``."""
+    axis_end = max(360, 100 + 70 * len(bars) + 50)
+    width = axis_end + 40
+    lines = _frame(width, title, axis_end)
+    lines += ["  ", "  <!-- Bars -->"]
+    for i, (label, score) in enumerate(bars):
+        colour, colour_name = PALETTE[i % len(PALETTE)]
+        x = 100 + 70 * i
+        height = round(max(0.0, min(score, 10.0)) * UNIT)
+        text = format_score(score)
+        if i:
+            lines.append("  ")
+        lines += [
+            f"  <!-- Model {_letter(i)} ({escape(label)}) - {colour_name}, "
+            f"Score: {text} -->",
+            f'  <rect x="{x}" y="{BASELINE - height}" width="60" height="{height}" '
+            f'fill="{colour}"/>',
+            f'  <text x="{x + 30}" y="{BASELINE - height - 5}" font-family="{FONT}" '
+            f'font-size="12" font-weight="bold" text-anchor="middle" '
+            f'fill="{colour}">{text}</text>',
+            f'  <text x="{x + 30}" y="270" font-family="{FONT}" font-size="11" '
+            f'text-anchor="middle" fill="#333">{escape(label)}</text>',
+        ]
+    return _close(lines, axis_end)
+
+
+def summary_chart(
+    title: str, models: Sequence[str], tasks: Sequence[tuple[str, Sequence[float]]]
+) -> str:
+    """Grouped bars: one group per ``(task, scores per model)``, plus a legend."""
+    bar = 14 if len(models) > 3 else 20
+    group = bar * len(models) + 20
+    axis_end = max(360, 80 + group * len(tasks) + 20)
+    width = axis_end + 40 + 110
+    lines = _frame(width, title, axis_end)
+    lines += ["  ", "  <!-- Bars -->"]
+    for t, (task, scores) in enumerate(tasks):
+        left = 80 + group * t
+        lines.append(f"  <!-- {escape(task)} -->")
+        for i, score in enumerate(scores):
+            colour = PALETTE[i % len(PALETTE)][0]
+            height = round(max(0.0, min(score, 10.0)) * UNIT)
+            lines.append(
+                f'  <rect x="{left + bar * i}" y="{BASELINE - height}" '
+                f'width="{bar - 2}" height="{height}" fill="{colour}">'
+                f"<title>{escape(models[i])}: {format_score(score)}</title></rect>"
+            )
+        centre = left + (bar * len(models)) // 2
+        lines.append(
+            f'  <text x="{centre}" y="270" font-family="{FONT}" font-size="11" '
+            f'text-anchor="middle" fill="#333">{escape(_short(task))}</text>'
+        )
+    lines += ["  ", "  <!-- Legend -->"]
+    for i, model in enumerate(models):
+        colour = PALETTE[i % len(PALETTE)][0]
+        y = 70 + 20 * i
+        lines += [
+            f'  <rect x="{axis_end + 20}" y="{y - 10}" width="12" height="12" '
+            f'fill="{colour}"/>',
+            f'  <text x="{axis_end + 38}" y="{y}" font-family="{FONT}" '
+            f'font-size="11" fill="#333">{escape(model)}</text>',
+        ]
+    return _close(lines, axis_end)
+
+
+def _short(label: str, limit: int = 14) -> str:
+    return label if len(label) <= limit else label[: limit - 1] + "…"
+
+
+def _shade(score: float) -> str:
+    """White at 0 to the chart green at 10."""
+    t = max(0.0, min(score, 10.0)) / 10
+    r = round(255 - 255 * t)
+    g = round(255 - (255 - 170) * t)
+    b = round(255 - 255 * t)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def heatmap(
+    title: str,
+    models: Sequence[str],
+    columns: Sequence[str],
+    cells: Sequence[Sequence[float | None]],
+) -> str:
+    """``cells[model][column]`` mean scores as shaded squares; ``None`` is blank."""
+    cell = 44
+    left, top = 120, 60
+    width = left + cell * len(columns) + 20
+    height = top + cell * len(models) + 120
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+        f'height="{height}" viewBox="0 0 {width} {height}">',
+        "  <!-- Background -->",
+        f'  <rect width="{width}" height="{height}" fill="#ffffff"/>',
+        "  ",
+        "  <!-- Title -->",
+        f'  <text x="{width // 2}" y="30" font-family="{FONT}" font-size="18" '
+        f'font-weight="bold" text-anchor="middle">{escape(title)}</text>',
+        "  ",
+        "  <!-- Cells -->",
+    ]
+    for m, model in enumerate(models):
+        y = top + cell * m
+        lines.append(
+            f'  <text x="{left - 8}" y="{y + cell // 2 + 4}" font-family="{FONT}" '
+            f'font-size="11" text-anchor="end" fill="#333">{escape(model)}</text>'
+        )
+        for c, score in enumerate(cells[m]):
+            x = left + cell * c
+            fill = "#f4f4f4" if score is None else _shade(score)
+            lines.append(
+                f'  <rect x="{x}" y="{y}" width="{cell - 2}" height="{cell - 2}" '
+                f'fill="{fill}"/>'
+            )
+            if score is not None:
+                ink = "#ffffff" if score >= 6 else "#333"
+                lines.append(
+                    f'  <text x="{x + cell // 2 - 1}" y="{y + cell // 2 + 3}" '
+                    f'font-family="{FONT}" font-size="10" text-anchor="middle" '
+                    f'fill="{ink}">{format_score(score)}</text>'
+                )
+    base = top + cell * len(models) + 8
+    lines += ["  ", "  <!-- Column labels -->"]
+    for c, column in enumerate(columns):
+        x = left + cell * c + cell // 2
+        lines.append(
+            f'  <text x="{x}" y="{base}" font-family="{FONT}" font-size="10" '
+            f'text-anchor="end" fill="#333" transform="rotate(-45 {x} {base})">'
+            f"{escape(_short(column.replace('_', ' '), 18))}</text>"
+        )
+    lines += ["</svg>", "", ""]
+    return "\n".join(lines)
+
+
+def task_title(task: str) -> str:
+    """``"Task-1"`` -> ``"Task 1 Results"``; other tasks keep their name."""
+    return f"{task.replace('-', ' ') if task.startswith('Task-') else task} Results"
+
+
+def _label(model: str) -> str:
+    prefix, colon, name = model.partition(":")
+    return name if colon else prefix
+
+
+def chart_data(
+    store: ResultStore, run: str, models: Sequence[str] | None = None
+) -> dict[str, tuple[Callable[..., str], tuple]]:
+    """``relative path -> (renderer, arguments)`` of every chart of a run."""
+    models = list(models or store.models(run))
+    labels = [_label(model) for model in models]
+    per_task: dict[str, dict[str, list[float]]] = {}
+    per_type: dict[str, dict[str, list[float]]] = {}
+    for model in models:
+        for prompt, (kind, mean) in store.prompt_means(
+            run, model, "vulnerability_type"
+        ).items():
+            task = prompt.partition("/")[0]
+            per_task.setdefault(task, {}).setdefault(model, []).append(mean)
+            if kind != "None":
+                per_type.setdefault(kind, {}).setdefault(model, []).append(mean)
+
+    def mean(values: list[float] | None) -> float | None:
+        return sum(values) / len(values) if values else None
+
+    charts: dict[str, tuple[Callable[..., str], tuple]] = {}
+    rows = []
+    for task, scores in sorted(per_task.items()):
+        bars = tuple(
+            (label, mean(scores[model]))
+            for model, label in zip(models, labels)
+            if model in scores
+        )
+        charts[f"{task}/results.svg"] = (bar_chart, (task_title(task), bars))
+        rows.append((task, tuple(mean(scores.get(m)) or 0.0 for m in models)))
+    if rows:
+        charts["summary.svg"] = (
+            summary_chart,
+            (f"{run} Results by Task", tuple(labels), tuple(rows)),
+        )
+    if per_type:
+        kinds = tuple(sorted(per_type))
+        cells = tuple(
+            tuple(mean(per_type[kind].get(model)) for kind in kinds)
+            for model in models
+        )
+        charts["heatmap.svg"] = (
+            heatmap,
+            (f"{run} Results by Vulnerability Type", tuple(labels), kinds, cells),
+        )
+    return charts
+
+
+def _digest(renderer: Callable[..., str], arguments: tuple) -> str:
+    data = json.dumps([VERSION, renderer.__name__, arguments])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def render_run(
+    store: ResultStore,
+    run: str,
+    out_dir: Path | str | None = None,
+    models: Sequence[str] | None = None,
+) -> dict[str, int]:
+    """Write the charts of ``run`` whose data changed.
+
+    Returns ``{"charts": n, "rendered": m}``.
+    """
+    out_dir = Path(out_dir) if out_dir is not None else cache_dir() / "charts"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / "manifest.json"
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    charts = chart_data(store, run, models)
+    rendered = 0
+    for name, (renderer, arguments) in charts.items():
+        digest = _digest(renderer, arguments)
+        path = out_dir / name
+        if manifest.get(name) == digest and path.exists():
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(renderer(*arguments), encoding="utf-8")
+        manifest[name] = digest
+        rendered += 1
+    if rendered:
+        fd, tmp = tempfile.mkstemp(dir=out_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=1, sort_keys=True)
+        os.replace(tmp, manifest_path)
+    return {"charts": len(charts), "rendered": rendered}
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    usage = "usage: charts [--run NAME] [--out DIR] [--models A,B]"
+    options = {"--run": "default", "--out": None, "--models": None}
+    for name in options:
+        if name in argv:
+            i = argv.index(name)
+            if i + 1 == len(argv):
+                print(usage, file=sys.stderr)
+                return 2
+            options[name] = argv[i + 1]
+            del argv[i : i + 2]
+    if argv:
+        print(usage, file=sys.stderr)
+        return 2
+    models = options["--models"].split(",") if options["--models"] else None
+    store = ResultStore.on_disk()
+    counts = render_run(store, options["--run"], options["--out"], models)
+    out = options["--out"] or cache_dir() / "charts"
+    print(f"{counts['rendered']} of {counts['charts']} charts rendered -> {out}")
+    return 0
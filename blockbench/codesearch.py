@@ -0,0 +1,285 @@
+"""Trigram index for searching Solidity/Rust source bodies.
+
+Code lives both in the task folders (``Task-*/problem.sol``,
+``Task-1/problem.rs``, ``Task-4/code.sol``, ``Task-5/*.sol``) and embedded in
+the ``primary_file``/``context_files`` of every finding record.
+:class:`CodeIndex` stores each distinct body once (see :mod:`.blobs`), maps
+every trigram of the lower-cased text to the bodies containing it and keeps a
+separate identifier index (``self.token.safeTransfer`` is indexed as each
+part and every contiguous dotted run of them, so ``token.safeTransfer`` is
+found as a whole word).  A query
+intersects posting lists to find candidate bodies and only those are scanned
+to report line numbers, which are counted on ``\\n``, ``\\r\\n`` and ``\\r``
+alike so the CRLF bodies of ``sherlock_dataset.json`` line up with the
+original files.
+
+Run ``python -m blockbench grep 'abi.decode(encodedProof'``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import tempfile
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .blobs import BlobStore, record_files
+from .loader import ErrorHandler, finding_files, iter_file
+from .paths import REPO_ROOT, cache_dir
+
+#: Bumped whenever the shape of the persisted index changes.
+FORMAT = 2
+
+#: Glob patterns (relative to the repository root) of standalone code files.
+TASK_SOURCES = ("Task-*/*.sol", "Task-*/*.rs")
+
+_IDENTIFIER = re.compile(
+    r"[A-Za-z_$][A-Za-z0-9_$]*(?:\.[A-Za-z_$][A-Za-z0-9_$]*)*"
+)
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+def default_path() -> Path:
+    return cache_dir() / f"codesearch-v{FORMAT}.json"
+
+
+def task_files(root: Path = REPO_ROOT) -> list[Path]:
+    files: list[Path] = []
+    for pattern in TASK_SOURCES:
+        files.extend(sorted(root.glob(pattern)))
+    return files
+
+
+def trigrams(text: str) -> set[str]:
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def identifiers(text: str) -> set[str]:
+    """Identifier tokens of ``text``: every contiguous run of a dotted chain."""
+    tokens = set()
+    for match in _IDENTIFIER.finditer(text):
+        parts = match.group().split(".")
+        for i in range(len(parts)):
+            for j in range(i + 1, len(parts) + 1):
+                tokens.add(".".join(parts[i:j]))
+    return tokens
+
+
+def line_starts(text: str) -> list[int]:
+    """Offsets at which each line of ``text`` starts."""
+    return [0] + [m.end() for m in _LINE_BREAK.finditer(text)]
+
+
+@dataclass(frozen=True)
+class Location:
+    """Where a body appears: a task file or a finding record's file entry."""
+
+    source: str
+    finding_id: str | None
+    path: str
+
+
+@dataclass(frozen=True)
+class CodeHit:
+    source: str
+    finding_id: str | None
+    path: str
+    line: int
+    text: str
+
+
+def _relative(path: Path) -> str:
+    try:
+        return path.resolve().relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+class CodeIndex:
+    """Trigram and identifier postings over every distinct code body."""
+
+    def __init__(self, store: BlobStore | None = None) -> None:
+        self.store = store if store is not None else BlobStore.on_disk()
+        self.digests: list[str] = []
+        self.locations: list[list[Location]] = []
+        self.grams: dict[str, list[int]] = {}
+        self.idents: dict[str, list[int]] = {}
+        self.sources: dict[str, list[int]] = {}
+        self._numbers: dict[str, int] = {}
+
+    def add(self, text: str, location: Location) -> int:
+        """Index a body (once per distinct content) and record where it lives."""
+        digest = self.store.put(text)
+        number = self._numbers.get(digest)
+        if number is None:
+            number = self._numbers[digest] = len(self.digests)
+            self.digests.append(digest)
+            self.locations.append([])
+            for gram in trigrams(text):
+                self.grams.setdefault(gram, []).append(number)
+            for ident in identifiers(text):
+                self.idents.setdefault(ident, []).append(number)
+        self.locations[number].append(location)
+        return number
+
+    @classmethod
+    def build(
+        cls,
+        store: BlobStore | None = None,
+        on_error: ErrorHandler | None = None,
+    ) -> "CodeIndex":
+        index = cls(store)
+        tasks = task_files()
+        findings = finding_files()
+        for path in tasks:
+            text = path.read_text(encoding="utf-8")
+            if text:
+                index.add(text, Location(_relative(path), None, _relative(path)))
+        for path in findings:
+            source = _relative(path)
+            for record in iter_file(path, on_error):
+                for entry in record_files(record):
+                    if isinstance(entry.get("content"), str) and entry["content"]:
+                        location = Location(
+                            source, record.get("id"), str(entry.get("path", ""))
+                        )
+                        index.add(entry["content"], location)
+        index.sources = _signatures(tasks + findings)
+        return index
+
+    def save(self, path: Path | str | None = None) -> None:
+        path = Path(path) if path is not None else default_path()
+        data = {
+            "digests": self.digests,
+            "locations": [
+                [[loc.source, loc.finding_id, loc.path] for loc in locs]
+                for locs in self.locations
+            ],
+            "grams": self.grams,
+            "idents": self.idents,
+            "sources": self.sources,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(
+        cls, path: Path | str | None = None, store: BlobStore | None = None
+    ) -> "CodeIndex":
+        path = Path(path) if path is not None else default_path()
+        data = json.loads(path.read_text(encoding="utf-8"))
+        index = cls(store)
+        index.digests = data["digests"]
+        index.locations = [
+            [Location(*loc) for loc in locs] for locs in data["locations"]
+        ]
+        index.grams = data["grams"]
+        index.idents = data["idents"]
+        index.sources = data["sources"]
+        index._numbers = {digest: i for i, digest in enumerate(index.digests)}
+        return index
+
+    @classmethod
+    def load_or_build(cls, path: Path | str | None = None) -> "CodeIndex":
+        """Load the persisted index, rebuilding it if any source changed."""
+        path = Path(path) if path is not None else default_path()
+        if path.exists():
+            index = cls.load(path)
+            current = _signatures(task_files() + finding_files())
+            if index.sources == current and all(
+                digest in index.store for digest in index.digests
+            ):
+                return index
+        index = cls.build()
+        index.save(path)
+        return index
+
+    def candidates(self, query: str, whole_word: bool = False) -> list[int]:
+        """Bodies that may contain ``query``, from posting-list intersection.
+
+        ``whole_word`` answers an identifier query from the identifier index;
+        any other query falls back to trigrams.
+        """
+        if whole_word and _IDENTIFIER.fullmatch(query):
+            lists = [self.idents.get(query, [])]
+        else:
+            grams = trigrams(query)
+            if not grams:
+                return list(range(len(self.digests)))
+            lists = [self.grams.get(gram, []) for gram in grams]
+        lists.sort(key=len)
+        result = set(lists[0])
+        for numbers in lists[1:]:
+            if not result:
+                break
+            result.intersection_update(numbers)
+        return sorted(result)
+
+    def search(
+        self,
+        query: str,
+        ignore_case: bool = False,
+        whole_word: bool = False,
+    ) -> Iterator[CodeHit]:
+        """Yield every occurrence of ``query`` as a literal string.
+
+        ``whole_word`` restricts matches to ones not preceded or followed by an
+        identifier character.  Identifier (or dotted chain) queries are
+        answered from the identifier index.
+        """
+        pattern = re.escape(query)
+        if whole_word:
+            pattern = rf"(?<![\w$]){pattern}(?![\w$])"
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        for number in self.candidates(query, whole_word and not ignore_case):
+            text = self.store.get(self.digests[number])
+            starts = None
+            lines_seen = set()
+            for match in regex.finditer(text):
+                if starts is None:
+                    starts = line_starts(text)
+                line = bisect_right(starts, match.start())
+                if line in lines_seen:
+                    continue
+                lines_seen.add(line)
+                end = starts[line] if line < len(starts) else len(text)
+                snippet = text[starts[line - 1] : end].rstrip("\r\n")
+                for loc in self.locations[number]:
+                    yield CodeHit(
+                        loc.source, loc.finding_id, loc.path, line, snippet
+                    )
+
+
+def _signatures(paths: Iterable[Path]) -> dict[str, list[int]]:
+    result = {}
+    for path in paths:
+        stat = path.stat()
+        result[_relative(path)] = [stat.st_size, stat.st_mtime_ns]
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    flags = {a for a in argv if a in ("-i", "-w")}
+    terms = [a for a in argv if a not in flags]
+    if len(terms) != 1:
+        print("usage: grep [-i] [-w] PATTERN", file=sys.stderr)
+        return 2
+    index = CodeIndex.load_or_build()
+    found = False
+    for hit in index.search(terms[0], "-i" in flags, "-w" in flags):
+        found = True
+        where = hit.source
+        if hit.finding_id:
+            where = f"{hit.source}[{hit.finding_id}] {hit.path}"
+        print(f"{where}:{hit.line}: {hit.text.strip()}")
+    return 0 if found else 1
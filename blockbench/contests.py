@@ -0,0 +1,484 @@
+"""Contest metadata from ``gold_standard/dataset_sept-dec.txt``, and report
+ingestion.
+
+The dataset file lists the contests the gold standard draws from, one CSV
+row each: title, audit dates and a report URL followed by the finding tally,
+as in ``https://code4rena.com/reports/2025-10-sequence - 6 Found - H2 M4``.
+:func:`parse_dataset` turns the rows into :class:`Contest` records with
+parsed date ranges and the expected high and medium counts.
+:func:`crosscheck` compares those counts with the finding records citing
+each report.
+
+:func:`ingest` grows the gold standard from locally mirrored reports.  A
+mirror directory holds ``<slug>.md`` or ``<slug>.html``, the published
+report of the contest with that URL slug.  It may also hold the audited
+code, checked out as ``<slug>/``.  Reports are extracted in parallel, one
+per worker process.  Each ``[H-01]``/``[M-01]`` section becomes a draft
+record:
+
+* the title and the description, impact and mitigation subsections give
+  the prose fields,
+* the code links (``.../blob/<ref>/path#L10-L20``) give ``primary_file``,
+  ``vulnerable_lines`` and ``context_files``,
+* with the code checked out, the files' content is filled in, and the
+  functions holding the cited lines give ``vulnerable_functions``.
+
+Findings already in the corpus are skipped.  Fields a report cannot
+supply, such as ``vulnerability_type`` and ``difficulty_tier``, are left
+out.  The :mod:`.schema` check lists them for each draft, so a reviewer
+knows what to complete before the drafts are copied into
+``gold_standard/``.
+
+Run ``python -m blockbench contests`` for the cross-check and
+``python -m blockbench contests ingest [MIRROR] [--out DIR] [--workers N]``
+to extract drafts into ``.blockbench/ingest/<slug>.json``.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import date, datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Iterable
+from urllib.parse import urlsplit
+
+from .languages import SUFFIXES
+from .lines import Issue, LineTable
+from .loader import iter_records
+from .paths import REPO_ROOT, cache_dir
+from .schema import RECORD, check_record
+
+DATASET = REPO_ROOT / "gold_standard" / "dataset_sept-dec.txt"
+SEVERITIES = {"H": "high", "M": "medium"}
+#: Platform -> the short name used in record ids (``gs_c4_...``).
+PLATFORM_IDS = {"code4rena": "c4"}
+
+# "https://code4rena.com/reports/2025-10-sequence - 6 Found - H2 M4"; the
+# count is "NA" for contests without findings.
+_TALLY = re.compile(
+    r"^(?P<url>\S+)\s+-\s+(?:(?P<found>\d+)\s+Found|NA)\s+-\s+"
+    r"H(?P<high>\d+)\s+M(?P<medium>\d+)\s*$"
+)
+# "September 17 – 30, 2025" or "October 22 – November 3, 2025".
+_DATES = re.compile(
+    r"^(?P<month>[A-Z][a-z]+)\s+(?P<day>\d+)(?:,\s*(?P<year>\d{4}))?\s*[–-]\s*"
+    r"(?:(?P<end_month>[A-Z][a-z]+)\s+)?(?P<end_day>\d+),\s*(?P<end_year>\d{4})$"
+)
+_FINDING = re.compile(
+    r"^#{1,4}\s*\[?\[(?P<severity>[HM])-(?P<number>\d+)\]\s*(?P<title>.*?)"
+    r"(?:\]\(\S*\))?\s*$",
+    re.MULTILINE,
+)
+_SUBSECTION = re.compile(r"^#{3,6}\s*(.+?)\s*$", re.MULTILINE)
+# Any heading that is not a finding closes the previous finding's section.
+_HEADING = re.compile(r"^#{1,2}\s", re.MULTILINE)
+_CODE_LINK = re.compile(
+    r"(?P<repo>https://github\.com/[\w.-]+/[\w.-]+)/blob/[^/\s)#]+/"
+    r"(?P<path>[^\s)\]#]+)(?:#L(?P<first>\d+)(?:-L(?P<last>\d+))?)?"
+)
+_SUBMITTED = re.compile(r"^\W*Submitted by\b.*$", re.MULTILINE | re.IGNORECASE)
+# Subsection heading words -> the record field they describe; the first
+# match wins, so "Finding description and impact" is the description.
+_FIELDS = (
+    ("mitigation", "fix_description"),
+    ("recommend", "fix_description"),
+    ("description", "finding_description"),
+    ("detail", "finding_description"),
+    ("root cause", "finding_description"),
+    ("summary", "finding_description"),
+    ("impact", "attack_scenario"),
+    ("proof of concept", "attack_scenario"),
+    ("attack", "attack_scenario"),
+)
+_BARE_LINK = re.compile(r"^\W*https?://\S+\s*$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class Contest:
+    """One row of the dataset file."""
+
+    slug: str
+    title: str
+    start: date
+    end: date
+    url: str
+    #: Findings the report lists; ``None`` when the tally says "NA".
+    found: int | None
+    high: int
+    medium: int
+
+    @property
+    def platform(self) -> str:
+        """``"code4rena"`` for ``https://code4rena.com/...``."""
+        host = urlsplit(self.url).hostname or ""
+        return host.removeprefix("www.").partition(".")[0]
+
+
+def _day(month: str, day: str, year: str) -> date:
+    return datetime.strptime(f"{month} {day} {year}", "%B %d %Y").date()
+
+
+def parse_dates(text: str) -> tuple[date, date]:
+    """``"October 22 – November 3, 2025"`` -> its first and last day."""
+    match = _DATES.match(" ".join(text.split()))
+    if match is None:
+        raise ValueError(f"unrecognised audit dates: {text!r}")
+    end = _day(
+        match["end_month"] or match["month"], match["end_day"], match["end_year"]
+    )
+    start = _day(match["month"], match["day"], match["year"] or match["end_year"])
+    if start > end and not match["year"]:
+        # "December 28 – January 5, 2026" starts in the year before.
+        start = start.replace(year=start.year - 1)
+    return start, end
+
+
+def parse_dataset(path: Path | str = DATASET) -> list[Contest]:
+    """The contests of the dataset file, in file order."""
+    contests = []
+    with open(path, encoding="utf-8", newline="") as handle:
+        rows = csv.reader(handle)
+        next(rows, None)  # header
+        for number, row in enumerate(rows, 2):
+            if not any(row):
+                continue
+            if len(row) != 3:
+                raise ValueError(f"{path}:{number}: expected 3 columns")
+            title, dates, report = (cell.strip() for cell in row)
+            tally = _TALLY.match(report)
+            if tally is None:
+                raise ValueError(f"{path}:{number}: unrecognised report: {report!r}")
+            start, end = parse_dates(dates)
+            url = tally["url"].rstrip("/")
+            contests.append(
+                Contest(
+                    url.rpartition("/")[2],
+                    title,
+                    start,
+                    end,
+                    url,
+                    int(tally["found"]) if tally["found"] else None,
+                    int(tally["high"]),
+                    int(tally["medium"]),
+                )
+            )
+    return contests
+
+
+@dataclass(frozen=True)
+class Tally:
+    """Expected against recorded findings of one contest."""
+
+    contest: Contest
+    high: int
+    medium: int
+
+    @property
+    def status(self) -> str:
+        """``ok``, ``missing`` (no records yet) or ``mismatch``."""
+        expected = (self.contest.high, self.contest.medium)
+        if (self.high, self.medium) == expected:
+            return "ok"
+        return "missing" if not self.high and not self.medium else "mismatch"
+
+
+def crosscheck(
+    contests: Iterable[Contest], records: Iterable[dict] | None = None
+) -> list[Tally]:
+    """Count the high and medium records citing each contest's report."""
+    if records is None:
+        records = iter_records(on_error=lambda error: None)
+    counts: dict[tuple[str, str], int] = {}
+    for record in records:
+        url = str(record.get("report_url") or "").rstrip("/")
+        key = (url, str(record.get("severity")))
+        counts[key] = counts.get(key, 0) + 1
+    return [
+        Tally(
+            contest,
+            counts.get((contest.url, "high"), 0),
+            counts.get((contest.url, "medium"), 0),
+        )
+        for contest in contests
+    ]
+
+
+class _HTMLText(HTMLParser):
+    """Rendered report HTML -> the markdown the extraction expects."""
+
+    _BLOCKS = {"p", "div", "li", "pre", "br", "tr", "section", "blockquote"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._links: list[str | None] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif re.fullmatch(r"h[1-6]", tag):
+            self.parts.append("\n" + "#" * int(tag[1]) + " ")
+        elif tag == "a":
+            self._links.append(dict(attrs).get("href"))
+            self.parts.append("[")
+        elif tag in self._BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in ("script", "style"):
+            self._skip = max(0, self._skip - 1)
+        elif re.fullmatch(r"h[1-6]", tag) or tag in self._BLOCKS:
+            self.parts.append("\n")
+        elif tag == "a" and self._links:
+            href = self._links.pop()
+            self.parts.append(f"]({href})" if href else "]")
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip:
+            self.parts.append(data)
+
+
+def report_text(path: Path | str) -> str:
+    """A mirrored report as markdown; HTML is converted on the way."""
+    text = Path(path).read_text(encoding="utf-8")
+    if Path(path).suffix.lower() not in (".html", ".htm"):
+        return text
+    parser = _HTMLText()
+    parser.feed(text)
+    parser.close()
+    return "".join(parser.parts)
+
+
+def _sections(body: str) -> dict[str, str]:
+    """Prose fields of one finding body, keyed by record field."""
+    body = _SUBMITTED.sub("", body)
+    headings = list(_SUBSECTION.finditer(body))
+    fields: dict[str, list[str]] = {}
+    # Lines that are only a code link are not prose.
+    lead = _BARE_LINK.sub("", body[: headings[0].start() if headings else len(body)])
+    for heading, following in zip(headings, headings[1:] + [None]):
+        title = heading.group(1).strip("*_ ").lower()
+        field = next((f for words, f in _FIELDS if words in title), None)
+        end = following.start() if following is not None else len(body)
+        text = body[heading.end() : end].strip()
+        if field is not None and text:
+            fields.setdefault(field, []).append(text)
+    if lead.strip():
+        fields.setdefault("finding_description", []).insert(0, lead.strip())
+    return {field: "\n\n".join(texts) for field, texts in fields.items()}
+
+
+def _cited_files(body: str) -> tuple[str, dict[str, list[int]]]:
+    """The repository linked from a body and its cited ``path -> lines``."""
+    repo = ""
+    files: dict[str, list[int]] = {}
+    for link in _CODE_LINK.finditer(body):
+        repo = repo or link["repo"]
+        lines = files.setdefault(link["path"], [])
+        if link["first"]:
+            first = int(link["first"])
+            last = int(link["last"] or first)
+            lines.extend(n for n in range(first, last + 1) if n not in lines)
+    return repo, files
+
+
+def _file(code: Path | None, path: str) -> dict:
+    """A ``primary_file``/``context_files`` entry, with content if mirrored."""
+    entry: dict = {"path": path}
+    if code is not None and (code / path).is_file():
+        text = (code / path).read_text(encoding="utf-8", errors="replace")
+        entry["content"] = text
+    return entry
+
+
+def extract_findings(
+    text: str, contest: Contest, code: Path | None = None
+) -> list[dict]:
+    """Draft records for the ``[H-nn]``/``[M-nn]`` sections of a report."""
+    headings = list(_FINDING.finditer(text))
+    platform = PLATFORM_IDS.get(contest.platform, contest.platform)
+    records = []
+    for heading in headings:
+        ends = [m.start() for m in _HEADING.finditer(text, heading.end())]
+        body = text[heading.end() : ends[0] if ends else len(text)]
+        finding_id = f"{heading['severity']}-{int(heading['number']):02d}"
+        repo, files = _cited_files(body)
+        paths = list(files)
+        # The first file cited with line numbers is the vulnerable one.
+        primary = next((p for p in paths if files[p]), paths[0] if paths else None)
+        record: dict = {
+            "id": f"gs_{platform}_{contest.slug}_{finding_id.replace('-', '')}",
+            "subset": "gold_standard",
+            "source_platform": contest.platform,
+            "source_report": contest.slug,
+            "source_finding_id": finding_id,
+            "report_url": contest.url,
+            "contest_date": contest.start.isoformat(),
+            "severity": SEVERITIES[heading["severity"]],
+            "finding_title": heading["title"].strip("*_ "),
+            **_sections(body),
+            "is_vulnerable": True,
+        }
+        if repo:
+            record["github_repo_url"] = repo
+        if primary is not None:
+            language = SUFFIXES.get(Path(primary).suffix.lower())
+            if language:
+                record["language"] = language
+            entry = _file(code, primary)
+            entry["vulnerable_lines"] = files[primary]
+            functions = []
+            if "content" in entry:
+                table = LineTable.for_text(entry["content"])
+                for line in files[primary]:
+                    function = table.function_at(line)
+                    if function and function.qualified_name not in functions:
+                        functions.append(function.qualified_name)
+            entry["vulnerable_functions"] = functions
+            record["primary_file"] = entry
+            record["context_files"] = [_file(code, p) for p in paths if p != primary]
+            record["context_level"] = (
+                "multi_file" if record["context_files"] else "single_file"
+            )
+        records.append({k: record[k] for k in RECORD["properties"] if k in record})
+    return records
+
+
+@dataclass(frozen=True)
+class Extraction:
+    """The draft records extracted from one mirrored report."""
+
+    contest: Contest
+    source: str
+    records: tuple[dict, ...]
+    #: Schema issues of the records, i.e. the fields left to a reviewer.
+    issues: tuple[Issue, ...]
+    #: Ids of the records not in the corpus yet.
+    new: frozenset[str] = frozenset()
+
+    def count(self, severity: str) -> int:
+        return sum(record["severity"] == severity for record in self.records)
+
+    @property
+    def drafts(self) -> list[dict]:
+        """The new records, to be completed and added to the gold standard."""
+        return [record for record in self.records if record["id"] in self.new]
+
+
+def _extract_job(job: tuple[Contest, str, str | None]) -> Extraction:
+    contest, source, code = job
+    records = extract_findings(
+        report_text(source), contest, Path(code) if code else None
+    )
+    issues = [issue for record in records for issue in check_record(record)]
+    return Extraction(contest, source, tuple(records), tuple(issues))
+
+
+def mirrored_reports(
+    mirror: Path, contests: Iterable[Contest]
+) -> list[tuple[Contest, str, str | None]]:
+    """``(contest, report file, code checkout)`` of each mirrored report."""
+    jobs = []
+    for contest in contests:
+        for suffix in (".md", ".html", ".htm"):
+            source = mirror / f"{contest.slug}{suffix}"
+            if source.is_file():
+                code = mirror / contest.slug
+                checkout = str(code) if code.is_dir() else None
+                jobs.append((contest, str(source), checkout))
+                break
+    return jobs
+
+
+def ingest(
+    mirror: Path | str,
+    contests: Iterable[Contest] | None = None,
+    workers: int | None = None,
+    known: set[str] | None = None,
+) -> list[Extraction]:
+    """Extract draft records from every mirrored report, in parallel.
+
+    Records whose id is not in ``known`` (by default, the corpus ids) are
+    marked as new.
+    """
+    contests = parse_dataset() if contests is None else contests
+    jobs = mirrored_reports(Path(mirror), contests)
+    if known is None:
+        known = {str(r.get("id")) for r in iter_records(on_error=lambda error: None)}
+    workers = min(workers or os.cpu_count() or 1, len(jobs) or 1)
+    if workers == 1:
+        extractions = [_extract_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            extractions = list(executor.map(_extract_job, jobs))
+    return [
+        replace(e, new=frozenset(r["id"] for r in e.records) - known)
+        for e in extractions
+    ]
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    usage = (
+        "usage: contests [--dataset FILE] | contests ingest [MIRROR] [--out DIR] "
+        "[--workers N]"
+    )
+    options = {"--dataset": str(DATASET), "--out": None, "--workers": None}
+    for name in options:
+        if name in argv:
+            i = argv.index(name)
+            if i + 1 == len(argv):
+                print(usage, file=sys.stderr)
+                return 2
+            options[name] = argv[i + 1]
+            del argv[i : i + 2]
+    contests = parse_dataset(options["--dataset"])
+    if not argv:
+        problems = 0
+        for tally in crosscheck(contests):
+            c = tally.contest
+            found = "NA" if c.found is None else c.found
+            print(
+                f"{c.slug} ({c.start} to {c.end}): {found} found, expected "
+                f"H{c.high} M{c.medium}, recorded H{tally.high} M{tally.medium}: "
+                f"{tally.status}"
+            )
+            problems += tally.status == "mismatch"
+        return 1 if problems else 0
+    if argv[0] == "ingest" and len(argv) <= 2:
+        mirror = Path(argv[1] if len(argv) > 1 else cache_dir() / "reports")
+        out = Path(options["--out"] or cache_dir() / "ingest")
+        workers = int(options["--workers"]) if options["--workers"] else None
+        extractions = ingest(mirror, contests, workers)
+        if not extractions:
+            print(f"no mirrored reports in {mirror}", file=sys.stderr)
+        out.mkdir(parents=True, exist_ok=True)
+        for e in extractions:
+            c = e.contest
+            target = out / f"{c.slug}.json"
+            drafts = e.drafts
+            if drafts:
+                target.write_text(json.dumps(drafts, indent=4) + "\n", encoding="utf-8")
+            print(
+                f"{c.slug}: extracted H{e.count('high')} M{e.count('medium')} "
+                f"(expected H{c.high} M{c.medium}), {len(drafts)} new"
+                + (f" -> {target}" if drafts else "")
+            )
+            missing: dict[str, int] = {}
+            for issue in e.issues:
+                if issue.record_id in e.new:
+                    missing[issue.field] = missing.get(issue.field, 0) + 1
+            if missing:
+                todo = ", ".join(f"{f} ({n})" for f, n in sorted(missing.items()))
+                print(f"  to complete: {todo}")
+        return 0
+    print(usage, file=sys.stderr)
+    return 2
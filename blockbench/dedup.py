@@ -0,0 +1,210 @@
+"""Near-duplicate detection across finding sources with MinHash and LSH.
+
+The same bug is often written up on Sherlock, Code4rena and by Spearbit or
+MixBytes.  Each record is reduced to a set of shingles (word trigrams of its
+title and description plus token 5-grams of the code at ``vulnerable_lines``),
+summarised by a MinHash signature and bucketed by locality-sensitive hashing
+on bands of that signature.  Only records sharing a bucket are compared, so
+clustering stays sub-quadratic; candidate pairs whose estimated Jaccard
+similarity reaches the threshold are merged with union-find.
+
+Each cluster is identified by the smallest record id it contains, so ids stay
+stable as unrelated records are added.  A record with no shingles at all (no
+title, description or code) has nothing to compare and is its own cluster.
+
+Run ``python -m blockbench dedup`` to print clusters with more than one
+member, or ``--all`` for the full ``record id -> cluster id`` mapping.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import struct
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from .loader import ErrorHandler, iter_records
+
+NUM_PERM = 128
+BANDS = 32
+THRESHOLD = 0.5
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD = re.compile(r"[a-z0-9_]+")
+_CODE_TOKEN = re.compile(r"[A-Za-z_$][A-Za-z0-9_$]*|\d+|\S")
+
+# Fixed seed: signatures must be comparable across runs.
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE))
+    for _ in range(NUM_PERM)
+]
+
+
+def _shingle_hash(shingle: str) -> int:
+    digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest()
+    return struct.unpack("<I", digest)[0]
+
+
+def _ngrams(tokens: list[str], n: int) -> Iterable[str]:
+    if len(tokens) < n:
+        if tokens:
+            yield " ".join(tokens)
+        return
+    for i in range(len(tokens) - n + 1):
+        yield " ".join(tokens[i : i + n])
+
+
+def vulnerable_code(record: dict) -> str:
+    """Return the ``primary_file`` lines listed in ``vulnerable_lines``."""
+    primary = record.get("primary_file")
+    if not isinstance(primary, dict):
+        return ""
+    if not isinstance(primary.get("content"), str):
+        return ""
+    lines = primary["content"].splitlines()
+    wanted = primary.get("vulnerable_lines") or []
+    return "\n".join(
+        lines[n - 1] for n in wanted if isinstance(n, int) and 0 < n <= len(lines)
+    )
+
+
+def shingles(record: dict) -> set[int]:
+    """Hashed shingles of a record's prose and vulnerable code."""
+    prose = " ".join(
+        str(record.get(field) or "")
+        for field in ("finding_title", "finding_description")
+    )
+    words = _WORD.findall(prose.lower())
+    result = {_shingle_hash("w:" + s) for s in _ngrams(words, 3)}
+    code = _CODE_TOKEN.findall(vulnerable_code(record))
+    result.update(_shingle_hash("c:" + s) for s in _ngrams(code, 5))
+    primary = record.get("primary_file")
+    if isinstance(primary, dict):
+        for name in primary.get("vulnerable_functions") or ():
+            result.add(_shingle_hash("f:" + str(name)))
+    return result
+
+
+def minhash(hashes: set[int]) -> tuple[int, ...] | None:
+    """MinHash signature of a set of 32-bit shingle hashes.
+
+    An empty set has no signature: any constant one would make all empty
+    records identical to each other.
+    """
+    if not hashes:
+        return None
+    return tuple(
+        min(((a * h + b) % _MERSENNE) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+@dataclass
+class Clusters:
+    """Result of :func:`cluster`: record id -> cluster id."""
+
+    assignment: dict[str, str]
+    pairs: list[tuple[str, str, float]]
+
+    def groups(self) -> dict[str, list[str]]:
+        result: dict[str, list[str]] = {}
+        for record_id, cluster_id in self.assignment.items():
+            result.setdefault(cluster_id, []).append(record_id)
+        return {k: sorted(v) for k, v in sorted(result.items())}
+
+
+def cluster(
+    records: Iterable[dict],
+    threshold: float = THRESHOLD,
+    bands: int = BANDS,
+) -> Clusters:
+    """Group near-duplicate records.
+
+    ``records`` is consumed once; only ids and signatures are kept.
+    """
+    rows = NUM_PERM // bands
+    ids: list[str] = []
+    signatures: list[tuple[int, ...]] = []
+    buckets: dict[tuple[int, tuple[int, ...]], list[int]] = {}
+    for record in records:
+        number = len(ids)
+        ids.append(str(record.get("id")))
+        signature = minhash(shingles(record))
+        if signature is None:
+            # Kept out of the buckets, so never paired: a singleton.
+            signatures.append(())
+            continue
+        signatures.append(signature)
+        for band in range(bands):
+            key = (band, signature[band * rows : (band + 1) * rows])
+            buckets.setdefault(key, []).append(number)
+
+    parent = list(range(len(ids)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    seen: set[tuple[int, int]] = set()
+    pairs = []
+    for members in buckets.values():
+        for i, left in enumerate(members):
+            for right in members[i + 1 :]:
+                if (left, right) in seen:
+                    continue
+                seen.add((left, right))
+                score = similarity(signatures[left], signatures[right])
+                if score >= threshold:
+                    pairs.append((ids[left], ids[right], score))
+                    parent[find(left)] = find(right)
+
+    smallest: dict[int, str] = {}
+    for number, record_id in enumerate(ids):
+        root = find(number)
+        if root not in smallest or record_id < smallest[root]:
+            smallest[root] = record_id
+    assignment = {ids[n]: smallest[find(n)] for n in range(len(ids))}
+    return Clusters(assignment, pairs)
+
+
+def cluster_corpus(
+    paths: Iterable[Path | str] | None = None,
+    on_error: ErrorHandler | None = None,
+    threshold: float = THRESHOLD,
+) -> Clusters:
+    return cluster(iter_records(paths, on_error), threshold)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    threshold = THRESHOLD
+    if "--threshold" in argv:
+        i = argv.index("--threshold")
+        try:
+            threshold = float(argv[i + 1])
+        except (IndexError, ValueError):
+            print("usage: dedup [--threshold X] [--all]", file=sys.stderr)
+            return 2
+        del argv[i : i + 2]
+    result = cluster_corpus(threshold=threshold)
+    if "--all" in argv:
+        for record_id, cluster_id in sorted(result.assignment.items()):
+            print(f"{record_id}\t{cluster_id}")
+        return 0
+    for cluster_id, members in result.groups().items():
+        if len(members) > 1:
+            print(f"{cluster_id}: {', '.join(members)}")
+    return 0
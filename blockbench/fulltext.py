@@ -0,0 +1,237 @@
+"""Full-text search over the prose fields of finding records.
+
+Targeted prompt sets ("every finding mentioning a domain separator") used to
+mean regex scans over every JSON file.  :class:`FullTextIndex` tokenises
+``finding_title``, ``finding_description``, ``attack_scenario`` and
+``fix_description`` once into a positional inverted index, ranks matches with
+BM25 and supports quoted phrase queries::
+
+    index = FullTextIndex.load_or_build()
+    index.search('"domain separator" chainId')
+
+The index is persisted to ``.blockbench/fulltext.json`` together with the
+signatures of the findings files it was built from and is rebuilt when any of
+them change.
+
+Run ``python -m blockbench search '"domain separator"'``.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import shlex
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from .loader import ErrorHandler, finding_files, iter_records
+from .paths import cache_dir
+
+TEXT_FIELDS = (
+    "finding_title",
+    "finding_description",
+    "attack_scenario",
+    "fix_description",
+)
+
+# Positions of successive fields are this far apart so that a phrase never
+# matches across a field boundary.
+_FIELD_GAP = 1 << 20
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case word tokens; ``Foo.bar()`` yields ``foo`` and ``bar``."""
+    return _TOKEN.findall(text.lower())
+
+
+def default_path() -> Path:
+    return cache_dir() / "fulltext.json"
+
+
+def _signatures(paths: Iterable[Path]) -> dict[str, list[int]]:
+    result = {}
+    for path in paths:
+        stat = path.stat()
+        result[str(path)] = [stat.st_size, stat.st_mtime_ns]
+    return result
+
+
+@dataclass(frozen=True)
+class Hit:
+    id: str
+    score: float
+
+
+class FullTextIndex:
+    """Positional inverted index with BM25 ranking."""
+
+    def __init__(self) -> None:
+        self.ids: list[str] = []
+        self.lengths: list[int] = []
+        # term -> {doc number -> sorted positions}
+        self.postings: dict[str, dict[int, list[int]]] = {}
+        self.sources: dict[str, list[int]] = {}
+
+    def add(self, record: dict) -> int:
+        """Index the prose fields of one record; return its document number."""
+        doc = len(self.ids)
+        self.ids.append(str(record.get("id")))
+        length = 0
+        for number, field in enumerate(TEXT_FIELDS):
+            text = record.get(field)
+            if not isinstance(text, str):
+                continue
+            base = number * _FIELD_GAP
+            for position, term in enumerate(tokenize(text)):
+                self.postings.setdefault(term, {}).setdefault(doc, []).append(
+                    base + position
+                )
+                length += 1
+        self.lengths.append(length)
+        return doc
+
+    @classmethod
+    def build(
+        cls,
+        paths: Iterable[Path | str] | None = None,
+        on_error: ErrorHandler | None = None,
+    ) -> "FullTextIndex":
+        paths = [Path(p) for p in (finding_files() if paths is None else paths)]
+        index = cls()
+        for record in iter_records(paths, on_error):
+            index.add(record)
+        index.sources = _signatures(paths)
+        return index
+
+    def save(self, path: Path | str | None = None) -> None:
+        path = Path(path) if path is not None else default_path()
+        data = {
+            "ids": self.ids,
+            "lengths": self.lengths,
+            "sources": self.sources,
+            "postings": self.postings,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path | str | None = None) -> "FullTextIndex":
+        path = Path(path) if path is not None else default_path()
+        data = json.loads(path.read_text(encoding="utf-8"))
+        index = cls()
+        index.ids = data["ids"]
+        index.lengths = data["lengths"]
+        index.sources = data["sources"]
+        index.postings = {
+            term: {int(doc): positions for doc, positions in docs.items()}
+            for term, docs in data["postings"].items()
+        }
+        return index
+
+    @classmethod
+    def load_or_build(cls, path: Path | str | None = None) -> "FullTextIndex":
+        """Load the persisted index, rebuilding it if the corpus changed."""
+        path = Path(path) if path is not None else default_path()
+        if path.exists():
+            index = cls.load(path)
+            if index.sources == _signatures(finding_files()):
+                return index
+        index = cls.build()
+        index.save(path)
+        return index
+
+    def _phrase_docs(self, terms: list[str]) -> dict[int, int]:
+        """Return ``{doc: occurrences}`` for documents containing the phrase."""
+        lists = [self.postings.get(term) for term in terms]
+        if not terms or any(not docs for docs in lists):
+            return {}
+        candidates = set(lists[0])
+        for docs in lists[1:]:
+            candidates &= docs.keys()
+        result = {}
+        for doc in candidates:
+            starts = set(lists[0][doc])
+            for offset, docs in enumerate(lists[1:], start=1):
+                starts &= {p - offset for p in docs[doc]}
+                if not starts:
+                    break
+            if starts:
+                result[doc] = len(starts)
+        return result
+
+    def search(
+        self, query: str, limit: int | None = 10, require_all: bool = False
+    ) -> list[Hit]:
+        """Rank documents for ``query``.
+
+        Quoted parts of the query are phrases and every document must contain
+        all of them.  Bare words are scored with BM25; with ``require_all``
+        every bare word must also be present.
+        """
+        try:
+            parts = shlex.split(query)
+        except ValueError:
+            parts = query.split()
+        phrases = [tokenize(p) for p in parts if len(tokenize(p)) > 1]
+        words = [t for p in parts if len(tokenize(p)) == 1 for t in tokenize(p)]
+
+        count = len(self.ids)
+        if not count:
+            return []
+        average = sum(self.lengths) / count
+        scores: dict[int, float] = {}
+
+        def score(docs: dict[int, int]) -> None:
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc, freq in docs.items():
+                norm = K1 * (1 - B + B * self.lengths[doc] / average)
+                scores[doc] = scores.get(doc, 0.0) + idf * freq * (K1 + 1) / (
+                    freq + norm
+                )
+
+        allowed: set[int] | None = None
+        for phrase in phrases:
+            docs = self._phrase_docs(phrase)
+            allowed = set(docs) if allowed is None else allowed & docs.keys()
+            score(docs)
+        for word in words:
+            docs = {d: len(p) for d, p in self.postings.get(word, {}).items()}
+            if require_all:
+                allowed = set(docs) if allowed is None else allowed & docs.keys()
+            score(docs)
+
+        ranked = [
+            Hit(self.ids[doc], value)
+            for doc, value in scores.items()
+            if allowed is None or doc in allowed
+        ]
+        ranked.sort(key=lambda hit: (-hit.score, hit.id))
+        return ranked if limit is None else ranked[:limit]
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: search [--all] QUERY", file=sys.stderr)
+        return 2
+    require_all = "--all" in argv
+    # The query syntax is the one documented above: phrases keep their
+    # double quotes, as in ``search '"domain separator"' chainId``.
+    query = " ".join(a for a in argv if a != "--all")
+    index = FullTextIndex.load_or_build()
+    for hit in index.search(query, limit=None, require_all=require_all):
+        print(f"{hit.score:7.3f}  {hit.id}")
+    return 0
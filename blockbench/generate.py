@@ -0,0 +1,302 @@
+"""Batch prompt generation from finding records.
+
+Each finding record already carries what a task prompt needs: the code
+(``primary_file``/``context_files``), the vulnerable functions, ``call_flow``
+and ``context_hint``.  :func:`render_prompts` turns one record into the
+section layout of the hand-written ``Task-*`` prompts at three levels:
+
+* LEVEL 1 (generic): role, scenario and code only,
+* LEVEL 2 (guided): adds an ``<analysis_focus>`` naming the vulnerability
+  class and functions, as in ``Task-5/prompt2.py``,
+* LEVEL 3 (targeted): also adds ``<analysis_focus_areas>`` built from
+  ``call_flow`` and ``context_hint``, as in ``Task-4/prompt3.py``.
+
+The ``<requirements>``, ``<severity_definitions>`` and ``<output_format>``
+sections are taken from :data:`REFERENCE_PROMPT` so generated prompts stay in
+step with the hand-written ones.
+
+:func:`generate` streams records from the loader into a process pool with a
+bounded number of records in flight and writes the rendered prompts as JSON
+lines into ``prompts-NNNNN-of-MMMMM.jsonl`` shards, assigned by record id.
+
+Run ``python -m blockbench generate --out DIR``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .blobs import record_files
+from .loader import ErrorHandler, iter_records
+from .packer import pack
+from .paths import cache_dir
+from .pool import bounded_map
+from .templates import FragmentTable, PromptTemplate
+
+REFERENCE_PROMPT = "Task-1/prompt_1.py"
+SHARED_SECTIONS = ("requirements", "severity_definitions", "output_format")
+LEVELS = (1, 2, 3)
+
+#: Called with a record id and the tokens its packed code is over budget by.
+OvershootHandler = Callable[[str, int], None]
+
+HEADERS = {
+    1: "# LEVEL 1: GENERIC PROMPT\n\n",
+    2: "# LEVEL 2: GUIDED PROMPT\n\n",
+    3: "# LEVEL 3: TARGETED PROMPT\n\n",
+}
+
+_shared: dict[str, str] | None = None
+
+
+def shared_sections() -> dict[str, str]:
+    """Sections every prompt reuses verbatim from the reference prompt."""
+    global _shared
+    if _shared is None:
+        reference = PromptTemplate.from_file(REFERENCE_PROMPT)
+        _shared = {name: reference.body(name) for name in SHARED_SECTIONS}
+    return _shared
+
+
+def _humanize(value: object) -> str:
+    return str(value or "").replace("_", " ").strip()
+
+
+def _project(record: dict) -> str:
+    return str(record.get("source_report") or "the protocol")
+
+
+def code_input(record: dict) -> str:
+    """Concatenate the record's files, each preceded by a path comment."""
+    parts = []
+    for entry in record_files(record):
+        content = entry.get("content")
+        if not isinstance(content, str) or not content.strip():
+            continue
+        path = entry.get("path", "unknown")
+        parts.append(f"// File: {path}\n{content.strip()}")
+    return "\n\n".join(parts)
+
+
+def _file_names(record: dict) -> list[str]:
+    return [
+        Path(str(entry.get("path", ""))).name
+        for entry in record_files(record)
+        if entry.get("content")
+    ]
+
+
+def render_prompts(
+    record: dict,
+    levels: Iterable[int] = LEVELS,
+    budget: int | None = None,
+    on_overshoot: OvershootHandler | None = None,
+) -> dict[int, str]:
+    """Render the requested prompt levels for one finding record.
+
+    With a token ``budget`` the code is fitted by :func:`.packer.pack`
+    instead of pasting every file in full; ``on_overshoot`` hears about
+    records whose vulnerable functions alone do not fit.
+    """
+    shared = shared_sections()
+    language = str(record.get("language") or "solidity").capitalize()
+    chain = str(record.get("chain") or "ethereum").capitalize()
+    project = _project(record)
+    if budget is None:
+        code = code_input(record)
+        files = _file_names(record)
+    else:
+        packed = pack(record, budget)
+        if packed.overshoot and on_overshoot is not None:
+            on_overshoot(str(record.get("id")), packed.overshoot)
+        code = packed.render()
+        files = [Path(f.path).name for f in packed.files]
+    primary = record.get("primary_file") or {}
+    functions = [str(f) for f in primary.get("vulnerable_functions") or ()]
+    vuln_type = _humanize(record.get("vulnerability_type"))
+
+    role = (
+        f'You are an AI Security Researcher auditing "{project}" - a set of '
+        f"{language} smart contracts deployed on {chain}."
+    )
+    background = (
+        f"We are preparing a security review of {project} and have received "
+        "reports of unexpected behavior in the contracts below. We need an "
+        "independent assessment before the next release."
+    )
+    instruction = (
+        "Analyze the provided smart contract code and perform a comprehensive "
+        "security audit. You must:"
+    )
+    constraints = "\n".join(
+        [
+            "Focus on actual code behavior, not theoretical issues",
+            f"Assume standard {chain} and {language} security practices",
+            "Base analysis solely on the provided code",
+            "Do not browse the web or use external knowledge for this task",
+            "Be concise and direct, avoid unnecessary explanations",
+        ]
+    )
+    if len(files) > 1:
+        note = (
+            f"You will be provided with {len(files)} contract files: "
+            f"{', '.join(files)}. Analyze how they interact."
+        )
+    else:
+        name = files[0] if files else "a contract file"
+        note = f"You will be provided with {name}. Analyze it carefully."
+
+    # A private table: code bodies are not worth interning across records.
+    table = FragmentTable()
+    prompts = {}
+    for level in levels:
+        sections: list[tuple[str, str]] = [
+            ("role_context", role),
+            ("background_scenario", background),
+        ]
+        if level >= 2:
+            focus = f"Pay particular attention to potential {vuln_type} issues"
+            if functions:
+                focus += f" in {', '.join(functions)}"
+            sections.append(("analysis_focus", focus + "."))
+        sections += [
+            ("task_instruction", instruction),
+            ("requirements", shared["requirements"]),
+        ]
+        if level >= 3:
+            areas = []
+            if record.get("call_flow"):
+                areas.append(f"- Trace the call flow: {record['call_flow']}")
+            if record.get("context_hint"):
+                areas.append(f"- {record['context_hint']}")
+            if areas:
+                sections.append(("analysis_focus_areas", "\n".join(areas)))
+        sections += [
+            ("severity_definitions", shared["severity_definitions"]),
+            ("constraints", constraints),
+            ("code_input", code),
+            ("output_format", shared["output_format"]),
+            ("note", note),
+        ]
+        template = PromptTemplate.build(sections, HEADERS[level], table)
+        prompts[level] = template.render()
+    return prompts
+
+
+def _render_job(
+    record: dict, levels: tuple[int, ...], budget: int | None
+) -> tuple[list[dict], list[tuple[str, int]]]:
+    overshoots: list[tuple[str, int]] = []
+    prompts = render_prompts(
+        record, levels, budget, lambda *over: overshoots.append(over)
+    )
+    rows = [
+        {"id": record.get("id"), "level": level, "prompt": text}
+        for level, text in prompts.items()
+    ]
+    return rows, overshoots
+
+
+def shard_of(record_id: str, shards: int) -> int:
+    """Stable shard assignment for a record id."""
+    return zlib.crc32(str(record_id).encode("utf-8")) % shards
+
+
+def generate(
+    out_dir: Path | str | None = None,
+    paths: Iterable[Path | str] | None = None,
+    levels: Iterable[int] = LEVELS,
+    shards: int = 8,
+    workers: int | None = None,
+    on_error: ErrorHandler | None = None,
+    budget: int | None = None,
+    on_overshoot: OvershootHandler | None = None,
+) -> dict[str, int]:
+    """Render prompts for every record into sharded JSON-lines files.
+
+    ``budget`` caps the code of each prompt in tokens (see :mod:`.packer`);
+    records that still exceed it are passed to ``on_overshoot``.
+
+    Returns ``{"records": n, "prompts": m}``.
+    """
+    out_dir = Path(out_dir) if out_dir is not None else cache_dir() / "prompts"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    levels = tuple(levels)
+    workers = workers or os.cpu_count() or 1
+    names = [
+        out_dir / f"prompts-{i:05d}-of-{shards:05d}.jsonl" for i in range(shards)
+    ]
+    handles = [path.open("w", encoding="utf-8") for path in names]
+    counts = {"records": 0, "prompts": 0}
+    try:
+        records = iter_records(paths, on_error)
+        with ProcessPoolExecutor(workers) as executor:
+            rows = bounded_map(
+                executor, _render_job, records, levels, budget, window=workers * 4
+            )
+            for batch, overshoots in rows:
+                if on_overshoot is not None:
+                    for record_id, tokens in overshoots:
+                        on_overshoot(record_id, tokens)
+                counts["records"] += 1
+                for row in batch:
+                    handle = handles[shard_of(row["id"], shards)]
+                    handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    counts["prompts"] += 1
+    finally:
+        for handle in handles:
+            handle.close()
+    return counts
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    usage = (
+        "usage: generate [--out DIR] [--shards N] [--workers N] "
+        "[--levels 1,2,3] [--budget TOKENS]"
+    )
+    options = {
+        "--out": None,
+        "--shards": "8",
+        "--workers": None,
+        "--levels": "1,2,3",
+        "--budget": None,
+    }
+    for name in options:
+        if name in argv:
+            i = argv.index(name)
+            if i + 1 == len(argv):
+                print(usage, file=sys.stderr)
+                return 2
+            options[name] = argv[i + 1]
+            del argv[i : i + 2]
+    try:
+        levels = [int(level) for level in options["--levels"].split(",")]
+    except ValueError:
+        levels = []
+    if argv or not levels or not set(levels) <= set(LEVELS):
+        print(usage, file=sys.stderr)
+        return 2
+    errors: list = []
+    overshoots: list[tuple[str, int]] = []
+    counts = generate(
+        options["--out"],
+        levels=levels,
+        shards=int(options["--shards"]),
+        workers=int(options["--workers"]) if options["--workers"] else None,
+        on_error=errors.append,
+        budget=int(options["--budget"]) if options["--budget"] else None,
+        on_overshoot=lambda *over: overshoots.append(over),
+    )
+    for error in errors:
+        print(f"skipped: {error}", file=sys.stderr)
+    for record_id, tokens in overshoots:
+        print(f"over budget: {record_id} by {tokens} tokens", file=sys.stderr)
+    print(f"{counts['records']} records -> {counts['prompts']} prompts")
+    return 0
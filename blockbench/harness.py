@@ -0,0 +1,634 @@
+"""Concurrent evaluation harness for running prompts against many models.
+
+A sweep is a set of :class:`Job` objects, one per (prompt, model, seed).
+:class:`Harness` runs them on a single asyncio loop.  Each backend has its
+own concurrency limit (a semaphore) and its own :class:`TokenBucket` rate
+limit.  A call that fails with :class:`TransientError` or times out is
+retried with exponential backoff and full jitter.  Results come back in
+completion order as :class:`Result` rows.
+
+Backends implement :class:`Backend` and are looked up by the prefix of a
+model spec: ``stub:grok`` asks :class:`StubBackend` to answer as ``grok``.
+Every spec must name its backend.  :data:`BACKENDS` maps prefixes to
+factories, and a dotted ``package.module.Class`` prefix imports one from
+elsewhere.  The stub replays canned responses from a JSON lines file, so a
+sweep can run offline; a job with no canned response fails.
+:class:`OpenAIBackend` talks to any OpenAI-compatible chat completions
+endpoint through ``urllib``.
+
+Run ``python -m blockbench evaluate --models stub:grok,stub:sonnet``.  By
+default the ``Task-*`` prompts are used; ``--prompts generated`` reads the
+output of ``generate``, and any other value is read as a ``generate`` output
+directory.  Results are written as JSON lines to
+``.blockbench/runs/results.jsonl``; responses are cached in
+``.blockbench/responses.sqlite`` (see :mod:`.responses`) and every job
+state change is journaled next to the results (see :mod:`.journal`) unless
+``--no-cache`` is given.  ``--resume`` continues an interrupted sweep from
+its journal.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from dataclasses import asdict, dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable, Iterator
+
+from .journal import Journal
+from .paths import REPO_ROOT, cache_dir
+from .responses import ResponseCache, response_key
+from .templates import FragmentTable, PromptTemplate, prompt_files
+
+#: Default number of retries after the first attempt.
+RETRIES = 4
+#: Jobs awaiting a retry whose attempt count :class:`StubBackend` remembers.
+STUB_ATTEMPTS = 4096
+
+
+class TransientError(Exception):
+    """A backend failure worth retrying: rate limits, timeouts, 5xx."""
+
+
+@dataclass(frozen=True)
+class Job:
+    """One prompt to send to one model with one sampling seed."""
+
+    prompt_id: str
+    prompt: str
+    model: str
+    seed: int = 0
+    temperature: float = 0.0
+
+    @property
+    def backend(self) -> str:
+        """The backend prefix of ``model``: ``stub`` in ``stub:grok``.
+
+        Empty for a spec without one, which no backend answers.
+        """
+        prefix, colon, _ = self.model.partition(":")
+        return prefix if colon else ""
+
+    @property
+    def model_name(self) -> str:
+        """Everything after the prefix, colons included: ``ft:gpt-4o:org::id``."""
+        prefix, colon, name = self.model.partition(":")
+        return name if colon else prefix
+
+    @cached_property
+    def key(self) -> str:
+        """The :mod:`.responses` cache key of this job."""
+        return response_key(self.prompt, self.model, self.temperature, self.seed)
+
+    @property
+    def journal_key(self) -> str:
+        """The :mod:`.journal` id of this job.
+
+        Two prompts can render to the same text and so share a cache key, but
+        they are still two jobs of the sweep.
+        """
+        return f"{self.key}:{self.prompt_id}"
+
+
+@dataclass(frozen=True)
+class Result:
+    prompt_id: str
+    model: str
+    seed: int
+    temperature: float
+    response: str | None
+    error: str | None
+    attempts: int
+    elapsed: float
+    cached: bool = False
+
+    @classmethod
+    def of(
+        cls,
+        job: Job,
+        response: str | None,
+        error: str | None,
+        attempts: int,
+        elapsed: float,
+        cached: bool = False,
+    ) -> "Result":
+        return cls(
+            job.prompt_id,
+            job.model,
+            job.seed,
+            job.temperature,
+            response,
+            error,
+            attempts,
+            round(elapsed, 4),
+            cached,
+        )
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_json(self) -> dict:
+        return asdict(self)
+
+
+class TokenBucket:
+    """``rate`` requests per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        # Single-threaded: nothing can run between the check and the take.
+        while True:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class Backend:
+    """A model provider.  Subclasses implement :meth:`complete`.
+
+    ``concurrency`` bounds the calls in flight, ``rate`` (requests per
+    second, ``None`` for unlimited) and ``burst`` configure the token bucket,
+    and ``timeout`` (seconds) bounds one call.
+    """
+
+    name = "backend"
+    concurrency = 4
+    rate: float | None = 1.0
+    burst: float | None = None
+    timeout: float | None = 300.0
+
+    async def complete(self, job: Job) -> str:
+        raise NotImplementedError
+
+
+class StubBackend(Backend):
+    """Offline backend that replays canned responses.
+
+    ``replay`` is a JSON lines file of ``{"prompt_id", "model", "seed",
+    "response"}`` rows; ``model`` and ``seed`` may be omitted to match any.
+    Jobs without a row fail.  ``latency`` (seconds) and ``failure_rate``
+    (0..1, deterministic per job and attempt) simulate a slow and flaky
+    provider; attempt counts are kept only while a job awaits its retry.
+    """
+
+    name = "stub"
+    concurrency = 64
+    rate = None
+
+    def __init__(
+        self,
+        replay: Path | str | None = None,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+    ) -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.responses: dict[tuple, str] = {}
+        self._attempts: dict[Job, int] = {}
+        if replay is not None:
+            with open(replay, encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        row = json.loads(line)
+                        key = (row["prompt_id"], row.get("model"), row.get("seed"))
+                        self.responses[key] = str(row["response"])
+
+    def lookup(self, job: Job) -> str | None:
+        for model in (job.model, job.model_name, None):
+            for seed in (job.seed, None):
+                response = self.responses.get((job.prompt_id, model, seed))
+                if response is not None:
+                    return response
+        return None
+
+    async def complete(self, job: Job) -> str:
+        attempt = self._attempts.pop(job, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate:
+            roll = random.Random(f"{job.prompt_id}|{job.model}|{job.seed}|{attempt}")
+            if roll.random() < self.failure_rate:
+                if len(self._attempts) >= STUB_ATTEMPTS:
+                    # Forget the oldest; a job that gave up never comes back.
+                    del self._attempts[next(iter(self._attempts))]
+                self._attempts[job] = attempt
+                raise TransientError("stub: simulated failure")
+        response = self.lookup(job)
+        if response is None:
+            raise LookupError(
+                f"no replay row for {job.prompt_id} ({job.model}, seed {job.seed})"
+            )
+        return response
+
+
+class OpenAIBackend(Backend):
+    """Any OpenAI-compatible ``/chat/completions`` endpoint.
+
+    The endpoint and key come from ``OPENAI_BASE_URL`` and ``OPENAI_API_KEY``
+    unless given.  Blocking ``urllib`` calls run in worker threads.
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        api_key: str | None = None,
+        concurrency: int | None = None,
+        rate: float | None = None,
+    ) -> None:
+        self.base_url = (
+            base_url or os.environ.get("OPENAI_BASE_URL") or "https://api.openai.com/v1"
+        ).rstrip("/")
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY", "")
+        if concurrency is not None:
+            self.concurrency = concurrency
+        if rate is not None:
+            self.rate = rate
+
+    def _post(self, job: Job) -> str:
+        body = {
+            "model": job.model_name,
+            "messages": [{"role": "user", "content": job.prompt}],
+            "temperature": job.temperature,
+            "seed": job.seed,
+        }
+        request = urllib.request.Request(
+            f"{self.base_url}/chat/completions",
+            data=json.dumps(body).encode("utf-8"),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            },
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = json.load(response)
+        except urllib.error.HTTPError as error:
+            if error.code == 429 or error.code >= 500:
+                raise TransientError(f"HTTP {error.code}") from error
+            raise
+        except (urllib.error.URLError, TimeoutError) as error:
+            raise TransientError(str(error)) from error
+        return str(data["choices"][0]["message"]["content"])
+
+    async def complete(self, job: Job) -> str:
+        return await asyncio.to_thread(self._post, job)
+
+
+#: Backend prefix -> factory taking the keyword options of the backend.
+BACKENDS: dict[str, Callable[..., Backend]] = {
+    "openai": OpenAIBackend,
+    "stub": StubBackend,
+}
+
+
+def make_backend(name: str, **options) -> Backend:
+    """Instantiate the backend registered as ``name``, or a dotted path."""
+    factory = BACKENDS.get(name)
+    if factory is None:
+        module, _, attr = name.rpartition(".")
+        if not module:
+            raise KeyError(f"unknown backend {name!r}")
+        factory = getattr(importlib.import_module(module), attr)
+    return factory(**options)
+
+
+def backends_for(
+    models: Iterable[str],
+    replay: Path | str | None = None,
+    concurrency: dict[str, float] | None = None,
+    rates: dict[str, float] | None = None,
+) -> dict[str, Backend]:
+    """One backend per prefix of ``models``, with overridden limits."""
+    concurrency, rates = concurrency or {}, rates or {}
+    backends = {}
+    for name in {Job("", "", model).backend for model in models}:
+        if not name:
+            raise ValueError("model specs need a backend prefix, e.g. stub:NAME")
+        extra = {"replay": replay} if name == "stub" else {}
+        backend = backends[name] = make_backend(name, **extra)
+        if name in concurrency:
+            backend.concurrency = int(concurrency[name])
+        if name in rates:
+            backend.rate = rates[name] or None
+    return backends
+
+
+class Harness:
+    """Run jobs against their backends with limits, rate control and retries.
+
+    With a ``cache``, jobs answered before are not sent again and successful
+    responses are stored.  A ``journal`` (which needs the cache its ``done``
+    entries point into) records the state of every job as it changes.
+    """
+
+    def __init__(
+        self,
+        backends: dict[str, Backend],
+        retries: int = RETRIES,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        seed: int | None = None,
+        cache: ResponseCache | None = None,
+        journal: Journal | None = None,
+    ) -> None:
+        if journal is not None and cache is None:
+            raise ValueError("a journal needs a response cache")
+        self.backends = backends
+        self.cache = cache
+        self.journal = journal
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = random.Random(seed)
+        self._slots: dict[str, asyncio.Semaphore] = {}
+        self._buckets: dict[str, TokenBucket | None] = {}
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number ``attempt`` (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return self.rng.uniform(0, ceiling)
+
+    def _limits(self, name: str) -> tuple[asyncio.Semaphore, TokenBucket | None]:
+        if name not in self._slots:
+            backend = self.backends[name]
+            self._slots[name] = asyncio.Semaphore(backend.concurrency)
+            self._buckets[name] = (
+                TokenBucket(backend.rate, backend.burst) if backend.rate else None
+            )
+        return self._slots[name], self._buckets[name]
+
+    async def run_job(self, job: Job) -> Result:
+        began = time.monotonic()
+        journal = self.journal
+        name = job.journal_key
+        ref = journal.completed(name) if journal is not None else None
+        if self.cache is not None:
+            response = self.cache.get(ref or job.key)
+            if response is not None:
+                if journal is not None and ref is None:
+                    journal.record(name, "done", ref=job.key)
+                return Result.of(job, response, None, 0, 0.0, cached=True)
+        if journal is not None and ref is not None:
+            # Finished in an earlier run, but the response has since been
+            # evicted: say so rather than paying for it again unasked.  The
+            # next resume runs the job again.
+            error = f"lost: response {ref[:12]} is no longer cached"
+            journal.record(name, "lost", error=error)
+            return Result.of(job, None, error, 0, 0.0)
+        backend = self.backends.get(job.backend)
+        if backend is None:
+            error = f"no backend {job.backend!r}"
+            if not job.backend:
+                error = f"no backend prefix in {job.model!r}"
+            if journal is not None:
+                journal.record(name, "failed", error=error)
+            return Result.of(job, None, error, 0, 0.0)
+        if journal is not None:
+            journal.record(name, "running")
+        slots, bucket = self._limits(job.backend)
+        error = ""
+        for attempt in range(1, self.retries + 2):
+            async with slots:
+                if bucket is not None:
+                    await bucket.acquire()
+                try:
+                    response = await asyncio.wait_for(
+                        backend.complete(job), backend.timeout
+                    )
+                except (TransientError, asyncio.TimeoutError) as exc:
+                    error = f"{type(exc).__name__}: {exc}"
+                except Exception as exc:
+                    error = f"{type(exc).__name__}: {exc}"
+                    if journal is not None:
+                        journal.record(name, "failed", error=error)
+                    return Result.of(
+                        job, None, error, attempt, time.monotonic() - began
+                    )
+                else:
+                    if self.cache is not None:
+                        self.cache.put(job.key, job.model, response)
+                    if journal is not None:
+                        journal.record(name, "done", ref=job.key)
+                    return Result.of(
+                        job, response, None, attempt, time.monotonic() - began
+                    )
+            if attempt <= self.retries:
+                # Back off outside the slot so other jobs can use it.
+                await asyncio.sleep(self.backoff(attempt))
+        if journal is not None:
+            journal.record(name, "failed", error=error)
+        return Result.of(job, None, error, self.retries + 1, time.monotonic() - began)
+
+    async def run(
+        self, jobs: Iterable[Job], window: int | None = None
+    ) -> AsyncIterator[Result]:
+        """Yield results in completion order, ``window`` jobs in flight."""
+        window = window or 2 * sum(b.concurrency for b in self.backends.values())
+        pending: set[asyncio.Task] = set()
+        journal = self.journal
+        for job in jobs:
+            if journal is not None and journal.completed(job.journal_key) is None:
+                journal.record(
+                    job.journal_key,
+                    "queued",
+                    prompt_id=job.prompt_id,
+                    model=job.model,
+                    seed=job.seed,
+                )
+            pending.add(asyncio.ensure_future(self.run_job(job)))
+            if len(pending) >= window:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+
+
+def evaluate(
+    jobs: Iterable[Job],
+    backends: dict[str, Backend],
+    on_result: Callable[[Result], None] | None = None,
+    **options,
+) -> list[Result]:
+    """Run ``jobs`` to completion; ``options`` go to :class:`Harness`."""
+
+    async def sweep() -> list[Result]:
+        results = []
+        async for result in Harness(backends, **options).run(jobs):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+        return results
+
+    return asyncio.run(sweep())
+
+
+def task_prompts(root: Path = REPO_ROOT) -> Iterator[tuple[str, str]]:
+    """``(prompt_id, text)`` for every hand-written ``Task-*`` prompt."""
+    table = FragmentTable(root)
+    for path in prompt_files(root):
+        prompt_id = path.relative_to(root).with_suffix("").as_posix()
+        yield prompt_id, PromptTemplate.from_file(path, table).render()
+
+
+def generated_prompts(directory: Path | str | None = None) -> Iterator[tuple[str, str]]:
+    """``(prompt_id, text)`` from the shards written by ``generate``."""
+    directory = Path(directory) if directory else cache_dir() / "prompts"
+    for shard in sorted(directory.glob("prompts-*.jsonl")):
+        with shard.open(encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    row = json.loads(line)
+                    yield f"{row['id']}/L{row['level']}", row["prompt"]
+
+
+def make_jobs(
+    prompts: Iterable[tuple[str, str]],
+    models: Iterable[str],
+    seeds: Iterable[int] = (0,),
+    temperature: float = 0.0,
+) -> Iterator[Job]:
+    """The cross product of prompts, models and seeds, prompt-major."""
+    models, seeds = list(models), list(seeds)
+    for prompt_id, text in prompts:
+        for model in models:
+            for seed in seeds:
+                yield Job(prompt_id, text, model, seed, temperature)
+
+
+def _parse_limits(spec: str | None) -> dict[str, float]:
+    """``"stub=8,openai=2"`` -> ``{"stub": 8.0, "openai": 2.0}``."""
+    limits = {}
+    for part in (spec or "").split(","):
+        if part:
+            name, _, value = part.partition("=")
+            limits[name] = float(value)
+    return limits
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    usage = (
+        "usage: evaluate --models BACKEND:MODEL,... [--seeds 0,1] "
+        "[--temperature T] [--prompts tasks|generated|DIR] [--replay FILE] "
+        "[--concurrency BACKEND=N,...] [--rate BACKEND=R,...] [--retries N] "
+        "[--out FILE] [--resume] [--no-cache]"
+    )
+    options = {
+        "--models": None,
+        "--seeds": "0",
+        "--temperature": "0",
+        "--prompts": "tasks",
+        "--replay": None,
+        "--concurrency": None,
+        "--rate": None,
+        "--retries": str(RETRIES),
+        "--out": None,
+    }
+    flags = {flag: flag in argv for flag in ("--no-cache", "--resume")}
+    for flag, given in flags.items():
+        if given:
+            argv.remove(flag)
+    for name in options:
+        if name in argv:
+            i = argv.index(name)
+            if i + 1 == len(argv):
+                print(usage, file=sys.stderr)
+                return 2
+            options[name] = argv[i + 1]
+            del argv[i : i + 2]
+    models = options["--models"].split(",") if options["--models"] else []
+    bare = [model for model in models if not Job("", "", model).backend]
+    if bare:
+        print(f"evaluate: no backend in {', '.join(bare)}", file=sys.stderr)
+    if argv or not models or bare:
+        print(usage, file=sys.stderr)
+        return 2
+    seeds = [int(seed) for seed in options["--seeds"].split(",")]
+    if options["--prompts"] == "tasks":
+        prompts = task_prompts()
+    elif options["--prompts"] == "generated":
+        prompts = generated_prompts()
+    else:
+        prompts = generated_prompts(options["--prompts"])
+    backends = backends_for(
+        models,
+        options["--replay"],
+        _parse_limits(options["--concurrency"]),
+        _parse_limits(options["--rate"]),
+    )
+    jobs = make_jobs(prompts, models, seeds, float(options["--temperature"]))
+
+    out = Path(options["--out"] or cache_dir() / "runs" / "results.jsonl")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    cache = journal = None
+    if not flags["--no-cache"]:
+        cache = ResponseCache.on_disk()
+        journal = Journal(out.with_suffix(".journal"), resume=flags["--resume"])
+        if flags["--resume"]:
+            counts = journal.counts()
+            print(
+                f"resuming: {counts['done']} done, {counts['running']} "
+                f"interrupted, {counts['failed']} failed, {counts['lost']} lost",
+                file=sys.stderr,
+            )
+    began = time.monotonic()
+    with out.open("w", encoding="utf-8") as handle:
+
+        def write(result: Result) -> None:
+            handle.write(json.dumps(result.to_json(), ensure_ascii=False) + "\n")
+
+        try:
+            results = evaluate(
+                jobs,
+                backends,
+                on_result=write,
+                retries=int(options["--retries"]),
+                cache=cache,
+                journal=journal,
+            )
+        finally:
+            if journal is not None:
+                journal.close()
+    failed = [result for result in results if not result.ok]
+    for result in failed:
+        print(
+            f"failed: {result.prompt_id} {result.model} seed={result.seed}: "
+            f"{result.error}",
+            file=sys.stderr,
+        )
+    cached = sum(result.cached for result in results)
+    print(
+        f"{len(results)} jobs in {time.monotonic() - began:.1f} s, "
+        f"{cached} cached, {len(failed)} failed -> {out}"
+    )
+    return 1 if failed else 0
@@ -0,0 +1,348 @@
+"""Bitmap indexes over finding metadata.
+
+Evaluation sweeps select subsets such as "medium, tier 3, multi_file,
+spearbit".  :class:`MetadataIndex` keeps one bitmap (a Python ``int`` used as
+a bit set) per value of each indexed field, so boolean combinations resolve
+with integer ``&``/``|``/``~`` and never touch code bodies::
+
+    index = MetadataIndex.open()
+    index.refresh()  # only re-reads files that changed since the last run
+    ids = index.select(Q(severity="medium", difficulty_tier=3)
+                       & Q(source_platform=["spearbit", "mixbytes"]))
+
+Each row remembers the file it came from.  :meth:`MetadataIndex.refresh`
+compares file sizes and modification times against the stored signatures and
+re-indexes only new or changed files, dropping rows of deleted ones.  Rows
+freed that way are reused by later additions, so editing files over and over
+does not grow the index.
+
+Run ``python -m blockbench index severity=medium difficulty_tier=3``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Iterable
+
+from .loader import ErrorHandler, finding_files, iter_file
+from .paths import REPO_ROOT, cache_dir
+
+INDEXED_FIELDS = (
+    "severity",
+    "vulnerability_type",
+    "difficulty_tier",
+    "context_level",
+    "source_platform",
+    "chain",
+    "language",
+    "contest_date",
+    "is_vulnerable",
+)
+
+
+def default_path() -> Path:
+    return cache_dir() / "metadata-index.json"
+
+
+class Q:
+    """A boolean query over indexed fields.
+
+    ``Q(field=value, ...)`` matches rows where every field equals its value;
+    a list, tuple or set value matches any of its members.  Queries combine
+    with ``&``, ``|`` and ``~``.
+    """
+
+    def __init__(self, **criteria: Any) -> None:
+        self._op = "and"
+        self._children: list[Any] = list(criteria.items())
+
+    @classmethod
+    def _node(cls, op: str, children: list[Any]) -> "Q":
+        node = cls()
+        node._op, node._children = op, children
+        return node
+
+    def __and__(self, other: "Q") -> "Q":
+        return Q._node("and", [self, other])
+
+    def __or__(self, other: "Q") -> "Q":
+        return Q._node("or", [self, other])
+
+    def __invert__(self) -> "Q":
+        return Q._node("not", [self])
+
+    def evaluate(self, index: "MetadataIndex") -> int:
+        """Resolve the query to a bitmap of matching rows."""
+        if self._op == "not":
+            return index.live & ~self._children[0].evaluate(index)
+        result = index.live if self._op == "and" else 0
+        for child in self._children:
+            if isinstance(child, Q):
+                bits = child.evaluate(index)
+            else:
+                field, wanted = child
+                if isinstance(wanted, (list, tuple, set, frozenset)):
+                    bits = 0
+                    for value in wanted:
+                        bits |= index.bitmap(field, value)
+                else:
+                    bits = index.bitmap(field, wanted)
+            result = result & bits if self._op == "and" else result | bits
+        return result
+
+    def __repr__(self) -> str:
+        if self._op == "not":
+            return f"~{self._children[0]!r}"
+        if all(not isinstance(c, Q) for c in self._children):
+            args = ", ".join(f"{k}={v!r}" for k, v in self._children)
+            return f"Q({args})"
+        joiner = " & " if self._op == "and" else " | "
+        return "(" + joiner.join(repr(c) for c in self._children) + ")"
+
+
+def _key(value: Any) -> str:
+    # JSON keeps 3, "3" and True distinct when the index is persisted.
+    return json.dumps(value)
+
+
+def _signature(path: Path) -> list[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _relative(path: Path) -> str:
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def _iter_bits(bits: int) -> Iterable[int]:
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class MetadataIndex:
+    """Per-value bitmaps over :data:`INDEXED_FIELDS` for the whole corpus."""
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path) if path is not None else default_path()
+        self.ids: list[str | None] = []
+        self.sources: list[str | None] = []
+        self.live = 0
+        self._bitmaps: dict[str, dict[str, int]] = {f: {} for f in INDEXED_FIELDS}
+        self._files: dict[str, dict[str, Any]] = {}
+
+    @classmethod
+    def open(cls, path: Path | str | None = None) -> "MetadataIndex":
+        """Load a persisted index, or return an empty one if none exists."""
+        index = cls(path)
+        if index.path.exists():
+            data = json.loads(index.path.read_text(encoding="utf-8"))
+            index.ids = data["ids"]
+            index.sources = data["sources"]
+            index.live = int(data["live"], 16)
+            index._files = data["files"]
+            for field in INDEXED_FIELDS:
+                stored = data["bitmaps"].get(field, {})
+                index._bitmaps[field] = {k: int(v, 16) for k, v in stored.items()}
+        return index
+
+    def save(self) -> None:
+        data = {
+            "ids": self.ids,
+            "sources": self.sources,
+            "live": format(self.live, "x"),
+            "files": self._files,
+            "bitmaps": {
+                field: {k: format(v, "x") for k, v in values.items()}
+                for field, values in self._bitmaps.items()
+            },
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, self.path)
+
+    def __len__(self) -> int:
+        return self.live.bit_count()
+
+    def add(self, record: dict, source: str = "") -> int:
+        """Index a single record and return its row number.
+
+        The lowest row freed by :meth:`remove_file` is reused, if any.
+        """
+        free = ~self.live & ((1 << len(self.ids)) - 1)
+        if free:
+            row = (free & -free).bit_length() - 1
+            self.ids[row] = record.get("id")
+            self.sources[row] = source
+        else:
+            row = len(self.ids)
+            self.ids.append(record.get("id"))
+            self.sources.append(source)
+        bit = 1 << row
+        self.live |= bit
+        for field in INDEXED_FIELDS:
+            if field in record:
+                values = self._bitmaps[field]
+                key = _key(record[field])
+                values[key] = values.get(key, 0) | bit
+        return row
+
+    def remove_file(self, path: Path | str) -> int:
+        """Drop every row that came from ``path``; return how many."""
+        key = path if path in self._files else _relative(Path(path))
+        entry = self._files.pop(key, None)
+        if entry is None:
+            return 0
+        mask = 0
+        for row in entry["rows"]:
+            mask |= 1 << row
+            self.ids[row] = self.sources[row] = None
+        self.live &= ~mask
+        for values in self._bitmaps.values():
+            for key in list(values):
+                values[key] &= ~mask
+                if not values[key]:
+                    del values[key]
+        return len(entry["rows"])
+
+    def add_file(
+        self, path: Path | str, on_error: ErrorHandler | None = None
+    ) -> int:
+        """(Re-)index one findings file; return the number of rows added."""
+        path = Path(path)
+        self.remove_file(path)
+        source = _relative(path)
+        rows = [self.add(record, source) for record in iter_file(path, on_error)]
+        self._files[source] = {"signature": _signature(path), "rows": rows}
+        return len(rows)
+
+    def refresh(
+        self,
+        paths: Iterable[Path | str] | None = None,
+        on_error: ErrorHandler | None = None,
+    ) -> list[str]:
+        """Bring the index up to date with ``paths`` (default: the corpus).
+
+        Files whose size and mtime are unchanged are skipped.  Returns the
+        relative paths that were (re-)indexed or removed.
+        """
+        if paths is None:
+            paths = finding_files()
+        current = {_relative(Path(p)): Path(p) for p in paths}
+        touched = []
+        for source in list(self._files):
+            if source not in current:
+                self.remove_file(source)
+                touched.append(source)
+        for source, path in current.items():
+            entry = self._files.get(source)
+            if entry is None or entry["signature"] != _signature(path):
+                self.add_file(path, on_error)
+                touched.append(source)
+        return touched
+
+    def values(self, field: str) -> list[Any]:
+        """Return the distinct values indexed for ``field``."""
+        return [json.loads(key) for key in self._bitmaps[field]]
+
+    def bitmap(self, field: str, value: Any) -> int:
+        if field not in self._bitmaps:
+            raise KeyError(f"{field!r} is not an indexed field")
+        return self._bitmaps[field].get(_key(value), 0)
+
+    def between(self, field: str, low: Any = None, high: Any = None) -> int:
+        """Bitmap of rows whose ``field`` lies in ``[low, high]``.
+
+        Useful for ``contest_date`` ranges; it only compares index keys.
+        """
+        bits = 0
+        for key, rows in self._bitmaps[field].items():
+            value = json.loads(key)
+            if value is None:
+                continue
+            if (low is None or value >= low) and (high is None or value <= high):
+                bits |= rows
+        return bits
+
+    def rows(self, query: Q | int | None = None) -> list[int]:
+        """Return matching row numbers for a :class:`Q` or a raw bitmap."""
+        if query is None:
+            bits = self.live
+        elif isinstance(query, Q):
+            bits = query.evaluate(self)
+        else:
+            bits = query & self.live
+        return list(_iter_bits(bits))
+
+    def select(self, query: Q | int | None = None, **criteria: Any) -> list[str]:
+        """Return the ids of matching records.
+
+        Keyword criteria are AND-ed with ``query``, so
+        ``index.select(severity="high")`` is shorthand for
+        ``index.select(Q(severity="high"))``.
+        """
+        if criteria:
+            query = Q(**criteria) if query is None else query & Q(**criteria)
+        return [self.ids[row] for row in self.rows(query)]
+
+    def count(self, query: Q | int | None = None, **criteria: Any) -> int:
+        if criteria:
+            query = Q(**criteria) if query is None else query & Q(**criteria)
+        if query is None:
+            return len(self)
+        bits = query.evaluate(self) if isinstance(query, Q) else query & self.live
+        return bits.bit_count()
+
+
+def parse_criteria(args: list[str]) -> dict[str, Any]:
+    """Parse ``FIELD=VALUE[,VALUE...]`` arguments into :class:`Q` keywords.
+
+    Raises :class:`ValueError` for an argument without ``=`` or a field
+    outside :data:`INDEXED_FIELDS`.
+    """
+    criteria: dict[str, Any] = {}
+    for arg in args:
+        field, equals, text = arg.partition("=")
+        if not equals:
+            raise ValueError(f"expected FIELD=VALUE, got {arg!r}")
+        if field not in INDEXED_FIELDS:
+            raise ValueError(
+                f"unknown field {field!r}; fields are {', '.join(INDEXED_FIELDS)}"
+            )
+        values = []
+        for item in text.split(","):
+            try:
+                values.append(json.loads(item))
+            except ValueError:
+                values.append(item)
+        criteria[field] = values
+    return criteria
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        criteria = parse_criteria(argv)
+    except ValueError as exc:
+        print(f"index: {exc}", file=sys.stderr)
+        print("usage: index [FIELD=VALUE[,VALUE]]...", file=sys.stderr)
+        return 2
+    index = MetadataIndex.open()
+    touched = index.refresh()
+    if touched:
+        index.save()
+        print(f"re-indexed {len(touched)} file(s)", file=sys.stderr)
+    for record_id in index.select(**criteria):
+        print(record_id)
+    return 0
@@ -0,0 +1,117 @@
+"""Append-only job journal for resumable sweeps.
+
+Every state change of a sweep job is appended to a JSON lines file as
+``{"job", "state", ...}``.  The states are ``queued``, ``running``,
+``done`` (with ``ref``, the :mod:`.responses` cache key holding the
+response), ``failed`` (with ``error``) and ``lost``.  Jobs are identified by
+:attr:`.harness.Job.journal_key`, their cache key and prompt id, so the same
+prompt, model, temperature and seed is the same job in every run.
+
+Reopening a journal replays it and keeps the last state of each job.  A
+resumed sweep answers ``done`` jobs from the cache entry their ``ref`` names.
+If that entry has been evicted, the job is marked ``lost`` and reported,
+rather than sent to the model again unasked; it runs on the next resume, as
+does every job that is not ``done``.  A crash can cut the final line short;
+such a line is ignored on replay.
+
+Entries are buffered and written in batches, so bookkeeping costs a few
+microseconds per job.  Losing the unflushed tail in a crash is harmless:
+those responses are already in the cache and are found there on resume.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+STATES = ("queued", "running", "done", "failed", "lost")
+
+
+class Journal:
+    """The job states of one sweep, persisted as an append-only log."""
+
+    def __init__(
+        self,
+        path: Path | str,
+        resume: bool = True,
+        flush_every: int = 256,
+        flush_interval: float = 0.5,
+    ) -> None:
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        #: Job key -> its last journal entry.
+        self.states: dict[str, dict] = {}
+        self._buffer: list[str] = []
+        self._flushed = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            self._replay()
+            self.compact()
+        self._handle = self.path.open("a" if resume else "w", encoding="utf-8")
+
+    def _replay(self) -> None:
+        with self.path.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash.
+                    continue
+                if entry.get("state") in STATES:
+                    previous = self.states.get(entry["job"], {})
+                    self.states[entry["job"]] = {**previous, **entry}
+
+    def compact(self) -> None:
+        """Rewrite the journal with only the last entry of each job."""
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            for entry in self.states.values():
+                handle.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(tmp, self.path)
+
+    def record(self, job: str, state: str, **fields) -> None:
+        entry = {"job": job, "state": state, **fields}
+        previous = self.states.get(job)
+        # Keep descriptive fields from earlier entries in memory only.
+        self.states[job] = {**previous, **entry} if previous else entry
+        self._buffer.append(json.dumps(entry, separators=(",", ":")) + "\n")
+        if (
+            len(self._buffer) >= self.flush_every
+            or time.monotonic() - self._flushed >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._handle.write("".join(self._buffer))
+            self._handle.flush()
+            self._buffer.clear()
+        self._flushed = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def completed(self, job: str) -> str | None:
+        """The response reference of ``job`` if it finished earlier."""
+        entry = self.states.get(job)
+        if entry is not None and entry["state"] == "done":
+            return entry.get("ref")
+        return None
+
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys(STATES, 0)
+        for entry in self.states.values():
+            counts[entry["state"]] += 1
+        return counts
@@ -0,0 +1,105 @@
+"""Source language detection and language-neutral outlines.
+
+File extensions are not reliable here: ``Task-1/problem.rs`` holds Solidity
+verifier code.  :func:`detect_language` scores a body against markers of each
+language and only falls back to the extension when the content is
+inconclusive; :func:`outline` and :func:`identifiers` then dispatch to
+:mod:`.solidity` or :mod:`.rust`, so callers such as the slicer and packer
+never need to know which one they are looking at.
+
+Run ``python -m blockbench outline FILE...`` to print the detected language
+and declarations of each file.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+from pathlib import Path
+
+from . import rust, solidity
+from .solidity import Declaration
+
+LANGUAGES = ("solidity", "rust")
+SUFFIXES = {".sol": "solidity", ".rs": "rust"}
+
+#: Container and callable kinds across languages.
+CONTAINERS = solidity.CONTAINERS | rust.CONTAINERS
+CALLABLES = solidity.CALLABLES | rust.CALLABLES
+
+# (pattern, weight) pairs that are characteristic of one language.
+_MARKERS = {
+    "solidity": [
+        (re.compile(r"^\s*pragma\s+solidity\b", re.MULTILINE), 10),
+        (re.compile(r"\b(?:contract|interface|library)\s+\w+[^;{]*\{"), 4),
+        (re.compile(r"\bfunction\s+\w+\s*\("), 2),
+        (re.compile(r"\b(?:u?int\d*|address|bytes\d*)\s+(?:memory|calldata)\b"), 2),
+        (re.compile(r"\b(?:msg\.sender|emit|modifier|mapping\s*\()"), 1),
+    ],
+    "rust": [
+        (re.compile(r"\bfn\s+\w+\s*[<(]"), 2),
+        # Not Yul's ``let x := ...`` from Solidity assembly blocks.
+        (re.compile(r"\blet\s+(?:mut\s+)?\w+\s*(?::[^=]|=)"), 2),
+        (re.compile(r"\bimpl\b[^{;]*\{"), 4),
+        (re.compile(r"^\s*use\s+\w+(?:::\w+)+", re.MULTILINE), 4),
+        (re.compile(r"&(?:mut\s+)?self\b|->\s*(?:Self|Result|Option)\b"), 2),
+        (re.compile(r"#!?\[\w+"), 1),
+    ],
+}
+
+
+def language_scores(text: str) -> dict[str, int]:
+    return {
+        language: sum(weight * len(p.findall(text)) for p, weight in markers)
+        for language, markers in _MARKERS.items()
+    }
+
+
+def detect_language(text: str, path: str | Path = "") -> str:
+    """``"solidity"``, ``"rust"`` or ``"unknown"``, judged by content first."""
+    scores = language_scores(text)
+    best = max(scores, key=scores.get)
+    ranked = sorted(scores.values(), reverse=True)
+    if ranked[0] > 0 and ranked[0] > ranked[1]:
+        return best
+    return SUFFIXES.get(Path(str(path)).suffix.lower(), "unknown")
+
+
+def outline(
+    text: str, path: str | Path = "", language: str | None = None
+) -> list[Declaration]:
+    """Declarations of ``text`` in the detected (or given) language."""
+    language = language or detect_language(text, path)
+    if language == "rust":
+        return rust.outline(text)
+    return solidity.outline(text)
+
+
+def identifiers(
+    text: str,
+    start: int = 0,
+    end: int | None = None,
+    language: str = "solidity",
+) -> set[str]:
+    if language == "rust":
+        return rust.identifiers(text, start, end)
+    return solidity.identifiers(text, start, end)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: outline FILE...", file=sys.stderr)
+        return 2
+    for name in argv:
+        text = Path(name).read_text(encoding="utf-8")
+        language = detect_language(text, name)
+        suffix = SUFFIXES.get(Path(name).suffix.lower())
+        note = f" (extension says {suffix})" if suffix and suffix != language else ""
+        print(f"{name}: {language}{note}")
+        for decl in outline(text, name, language):
+            print(
+                f"  {decl.kind} {decl.qualified_name} "
+                f"[{decl.start_line}-{decl.end_line}]"
+            )
+    return 0
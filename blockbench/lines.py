@@ -0,0 +1,215 @@
+"""Line-offset tables and the ``vulnerable_lines`` integrity pass.
+
+A :class:`LineTable` turns a body into an ``array`` of line start offsets
+once (memoised by content digest), after which line ranges, excerpts and
+"which function holds line N" are constant-time or ``bisect`` lookups.  Lines
+are counted on ``\\n``, ``\\r\\n`` and ``\\r`` alike, as everywhere else in the
+package, so CRLF sherlock bodies number like the original files.
+
+:func:`check_vulnerable_lines` flags a record whose ``primary_file`` has no
+``vulnerable_lines``, or cites lines that are not integers, lie past the end
+of the file, or hold only whitespace (other than inside a cited range).  Run
+``python -m blockbench lines [--json]`` to check the whole corpus; records the
+loader cannot decode are reported as well.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_right
+from dataclasses import asdict, dataclass
+
+from .blobs import blob_digest
+from .languages import CALLABLES, outline
+from .loader import LoadError, iter_records
+from .solidity import Declaration
+
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+_BLANK = re.compile(r"[ \t\f\v]*")
+
+_tables: dict[str, "LineTable"] = {}
+
+
+@dataclass(frozen=True)
+class Issue:
+    """A problem found in a record by one of the integrity checks."""
+
+    record_id: str
+    field: str
+    code: str
+    severity: str
+    message: str
+
+
+class LineTable:
+    """Start offsets of every line of a body, plus its function spans."""
+
+    __slots__ = ("text", "starts", "count", "_first", "_last", "_functions")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.starts = array("q", [0])
+        self.starts.extend(m.end() for m in _LINE_BREAK.finditer(text))
+        # A trailing line break does not start another line.
+        self.count = len(self.starts)
+        if self.starts[-1] == len(text):
+            self.count -= 1
+        self._functions: list[Declaration] | None = None
+        self._first = array("q")
+        self._last = array("q")
+
+    @classmethod
+    def for_text(cls, text: str) -> "LineTable":
+        """The table of ``text``, built once per distinct body."""
+        digest = blob_digest(text)
+        table = _tables.get(digest)
+        if table is None:
+            table = _tables[digest] = cls(text)
+        return table
+
+    def __contains__(self, line: object) -> bool:
+        return isinstance(line, int) and 1 <= line <= self.count
+
+    def line_of(self, offset: int) -> int:
+        """1-based line holding character ``offset``."""
+        return bisect_right(self.starts, offset)
+
+    def span(self, line: int) -> tuple[int, int]:
+        """Offsets of ``line`` without its terminator."""
+        if line not in self:
+            raise IndexError(f"line {line} outside 1..{self.count}")
+        start = self.starts[line - 1]
+        end = self.starts[line] if line < len(self.starts) else len(self.text)
+        while end > start and self.text[end - 1] in "\r\n":
+            end -= 1
+        return start, end
+
+    def line(self, line: int) -> str:
+        start, end = self.span(line)
+        return self.text[start:end]
+
+    def excerpt(self, first: int, last: int) -> str:
+        """Lines ``first`` to ``last`` inclusive, clamped to the body."""
+        first, last = max(first, 1), min(last, self.count)
+        if first > last:
+            return ""
+        return self.text[self.starts[first - 1] : self.span(last)[1]]
+
+    def is_blank(self, line: int) -> bool:
+        start, end = self.span(line)
+        return _BLANK.match(self.text, start, end).end() == end
+
+    def _index_functions(self) -> None:
+        functions = [d for d in outline(self.text) if d.kind in CALLABLES]
+        functions.sort(key=lambda d: d.start_line)
+        self._functions = functions
+        self._first = array("q", (d.start_line for d in functions))
+        self._last = array("q", (d.end_line for d in functions))
+
+    def function_at(self, line: int) -> Declaration | None:
+        """The function whose line range holds ``line``, if any."""
+        if self._functions is None:
+            self._index_functions()
+        # Functions do not nest, so only the last one starting at or before
+        # ``line`` can hold it.
+        i = bisect_right(self._first, line) - 1
+        if i >= 0 and self._last[i] >= line:
+            return self._functions[i]
+        return None
+
+
+def check_vulnerable_lines(record: dict) -> list[Issue]:
+    """Integrity issues of a record's ``primary_file.vulnerable_lines``."""
+    record_id = str(record.get("id", ""))
+    field = "primary_file.vulnerable_lines"
+    primary = record.get("primary_file") or {}
+    lines = primary.get("vulnerable_lines")
+    if not lines:
+        return [Issue(record_id, field, "missing", "warning", "no vulnerable lines")]
+    table = LineTable.for_text(str(primary.get("content") or ""))
+    issues = []
+    blank = []
+    outside = []
+    cited = {line for line in lines if isinstance(line, int)}
+    for line in lines:
+        if not isinstance(line, int) or isinstance(line, bool):
+            issues.append(
+                Issue(record_id, field, "invalid", "error", f"{line!r} is not a line")
+            )
+        elif line not in table:
+            outside.append(line)
+        elif table.is_blank(line):
+            # Blank lines inside a cited range are expected; at its edges or
+            # on their own they suggest the numbering is off.
+            if line - 1 not in cited or line + 1 not in cited:
+                blank.append(line)
+    if outside:
+        issues.append(
+            Issue(
+                record_id,
+                field,
+                "out-of-range",
+                "error",
+                f"{_ranges(outside)} past the end of "
+                f"{primary.get('path') or 'the file'} ({table.count} lines)",
+            )
+        )
+    if blank:
+        issues.append(
+            Issue(
+                record_id,
+                field,
+                "whitespace-only",
+                "warning",
+                f"{_ranges(blank)} only whitespace",
+            )
+        )
+    return issues
+
+
+def _ranges(lines: list[int]) -> str:
+    """``[3, 4, 5, 9]`` -> ``"lines 3-5, 9 are"``; ``[3]`` -> ``"line 3 is"``."""
+    parts = []
+    numbers = sorted(set(lines))
+    first = previous = numbers[0]
+    for number in numbers[1:] + [None]:
+        if number is not None and number == previous + 1:
+            previous = number
+            continue
+        parts.append(str(first) if first == previous else f"{first}-{previous}")
+        if number is not None:
+            first = previous = number
+    if len(numbers) == 1:
+        return f"line {parts[0]} is"
+    return f"lines {', '.join(parts)} are"
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    began = time.perf_counter()
+    malformed: list[LoadError] = []
+    records = 0
+    issues: list[Issue] = []
+    for record in iter_records(on_error=malformed.append):
+        records += 1
+        issues.extend(check_vulnerable_lines(record))
+    elapsed = time.perf_counter() - began
+    if "--json" in argv:
+        print(json.dumps([asdict(issue) for issue in issues], indent=2))
+    else:
+        for issue in issues:
+            print(f"{issue.severity}: {issue.record_id}: {issue.message}")
+    for error in malformed:
+        print(f"malformed: {error}", file=sys.stderr)
+    errors = sum(issue.severity == "error" for issue in issues)
+    print(
+        f"{records} records loaded and checked in {elapsed * 1000:.1f} ms: "
+        f"{len(malformed)} malformed, {errors} errors, "
+        f"{len(issues) - errors} warnings",
+        file=sys.stderr,
+    )
+    return 1 if errors or malformed else 0
@@ -0,0 +1,154 @@
+"""Streaming, fault-tolerant loader for the finding record files.
+
+The finding files (``sherlock/*.json``, ``solodit/*.json`` and
+``gold_standard/*.json``) are JSON arrays of flat-ish finding objects.  Rather
+than ``json.load`` a whole file, :func:`iter_file` reads it in fixed-size
+chunks and decodes one record at a time, so memory stays bounded by the
+largest single record.  When a record is malformed the loader reports where
+it failed and resynchronises at the next top-level ``{"id": ...}``.
+
+Run ``python -m blockbench load`` for a per-file summary of the corpus.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from .paths import FINDING_DIRS, REPO_ROOT
+
+CHUNK_SIZE = 64 * 1024
+
+# Every record starts with its ``id`` key.  Inside JSON strings a quote is
+# always escaped, so this pattern cannot match the body of a valid string.
+_RECORD_START = re.compile(r'\{\s*"id"\s*:')
+_SKIP = frozenset(" \t\r\n,[]")
+_DECODER = json.JSONDecoder()
+
+
+@dataclass(frozen=True)
+class LoadError:
+    """A record that could not be decoded."""
+
+    path: Path
+    line: int
+    column: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line}:{self.column}: {self.message}"
+
+
+ErrorHandler = Callable[[LoadError], None]
+
+
+def finding_files(root: Path = REPO_ROOT) -> list[Path]:
+    """Return every finding JSON file under ``root`` in a stable order."""
+    files: list[Path] = []
+    for name in FINDING_DIRS:
+        files.extend(sorted((root / name).glob("*.json")))
+    return files
+
+
+def iter_file(
+    path: Path | str,
+    on_error: ErrorHandler | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[dict]:
+    """Yield the finding records of one file, skipping malformed ones.
+
+    ``on_error`` is called with a :class:`LoadError` for each record that
+    fails to decode; by default failures are silently skipped.
+    """
+    path = Path(path)
+    with path.open("r", encoding="utf-8") as fh:
+        buf = ""
+        pos = 0
+        line_base = 1  # line number of buf[0]
+        col_base = 0  # column of buf[0] when buf starts mid-line
+        eof = False
+
+        def location(index: int) -> tuple[int, int]:
+            newlines = buf.count("\n", 0, index)
+            if newlines:
+                return line_base + newlines, index - buf.rfind("\n", 0, index)
+            return line_base, col_base + index + 1
+
+        while True:
+            while pos < len(buf) and buf[pos] in _SKIP:
+                pos += 1
+
+            # Drop consumed text so the buffer only ever holds the record
+            # being decoded plus at most one chunk of look-ahead.
+            if pos > chunk_size:
+                line, col = location(pos)
+                line_base, col_base = line, col - 1
+                buf, pos = buf[pos:], 0
+
+            if pos >= len(buf):
+                if eof:
+                    return
+                data = fh.read(chunk_size)
+                eof = not data
+                buf += data
+                continue
+
+            try:
+                record, end = _DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError as exc:
+                following = _RECORD_START.search(buf, pos + 1)
+                if following is None and not eof:
+                    # Probably just a record split across chunks.
+                    data = fh.read(chunk_size)
+                    eof = not data
+                    buf += data
+                    continue
+                if on_error is not None:
+                    line, col = location(exc.pos)
+                    on_error(LoadError(path, line, col, exc.msg))
+                if following is None:
+                    return
+                pos = following.start()
+                continue
+
+            scalar = not isinstance(record, (dict, list))
+            if scalar and end == len(buf) and not eof:
+                # A bare number may continue in the next chunk.
+                data = fh.read(chunk_size)
+                eof = not data
+                if data:
+                    buf += data
+                    continue
+            pos = end
+            if isinstance(record, dict):
+                yield record
+            elif on_error is not None:
+                line, col = location(pos)
+                on_error(LoadError(path, line, col, "expected a finding object"))
+
+
+def iter_records(
+    paths: Iterable[Path | str] | None = None,
+    on_error: ErrorHandler | None = None,
+) -> Iterator[dict]:
+    """Yield finding records from ``paths`` (default: the whole corpus)."""
+    for path in finding_files() if paths is None else paths:
+        yield from iter_file(path, on_error)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    paths = [Path(p) for p in argv] or finding_files()
+    failures = 0
+    for path in paths:
+        errors: list[LoadError] = []
+        count = sum(1 for _ in iter_file(path, errors.append))
+        print(f"{path}: {count} records, {len(errors)} malformed")
+        for error in errors:
+            print(f"  {error}")
+        failures += len(errors)
+    return 1 if failures else 0
@@ -0,0 +1,257 @@
+"""Token-budget-aware packing of a finding's code for prompts.
+
+Some bodies are far larger than a model context (hybra M08's primary file is
+56 KB), and ``multi_file`` findings bring several context files of varying
+relevance.  :func:`pack` fits ``primary_file`` plus the most relevant
+``context_files`` into a token budget:
+
+1. Symbols are collected from ``vulnerable_functions`` and the
+   ``Contract.function()`` references in ``call_flow``, plus the functions
+   those call within :data:`CALLEE_DEPTH` hops across the record's files
+   (see :mod:`.callgraph`).
+2. Context files are ranked by how many of those symbols they declare or
+   mention (declarations weigh most).
+3. Each file is added at the first level that fits the remaining budget:
+   ``full`` text, ``elided`` (imports dropped and bodies of unrelated
+   functions replaced by a marker), ``focused`` (the
+   :func:`.slicer.slice_code` excerpt of the relevant functions) or ``core``
+   (the excerpt of the finding's own functions and lines, without callees).
+   Trimming always happens at function boundaries, never mid-function.
+
+The primary file is kept even when its ``core`` excerpt alone exceeds the
+budget; :attr:`PackedContext.overshoot` says by how much.
+
+Token counts use :func:`estimate_tokens` unless a tokenizer is supplied.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .blobs import record_files
+from .callgraph import CallGraph
+from .languages import CALLABLES, CONTAINERS, outline
+from .slicer import slice_code
+from .solidity import Declaration
+
+#: Rough characters per token for code under BPE tokenizers.
+CHARS_PER_TOKEN = 3.5
+DEFAULT_BUDGET = 16_000
+#: How far down the call graph the finding's functions pull in callees.
+CALLEE_DEPTH = 2
+
+LEVELS = ("full", "elided", "focused", "core")
+
+_CALL = re.compile(r"([A-Za-z_$][\w$]*)\s*\.\s*([A-Za-z_$][\w$]*)\s*\(")
+_BARE_CALL = re.compile(r"(?<![\w$.])([A-Za-z_$][\w$]*)\s*\(")
+_IMPORT_LINE = re.compile(r"^[ \t]*import\b[^\n]*(?:\r?\n|\r)?", re.MULTILINE)
+
+Tokenizer = Callable[[str], int]
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text) / CHARS_PER_TOKEN + 0.5)
+
+
+@dataclass(frozen=True)
+class Symbols:
+    """Function and contract names a finding points at."""
+
+    functions: frozenset[str]
+    contracts: frozenset[str]
+
+
+def finding_symbols(record: dict) -> Symbols:
+    functions: set[str] = set()
+    contracts: set[str] = set()
+    primary = record.get("primary_file") or {}
+    for name in primary.get("vulnerable_functions") or ():
+        head, _, tail = str(name).rpartition(".")
+        functions.add(tail)
+        if head:
+            contracts.add(head)
+    flow = str(record.get("call_flow") or "")
+    for contract, function in _CALL.findall(flow):
+        contracts.add(contract)
+        functions.add(function)
+    for function in _BARE_CALL.findall(flow):
+        functions.add(function)
+    return Symbols(frozenset(functions), frozenset(contracts))
+
+
+def with_callees(
+    record: dict, symbols: Symbols, depth: int = CALLEE_DEPTH
+) -> Symbols:
+    """``symbols`` plus the functions they reach through the call graph."""
+    graph = CallGraph.for_record(record)
+    functions = set(symbols.functions)
+    contracts = set(symbols.contracts)
+    for name in symbols.functions:
+        for qualified in graph.lookup(None, name):
+            for callee in graph.callees(qualified, depth):
+                contract, _, function = callee.rpartition(".")
+                functions.add(function)
+                if contract:
+                    contracts.add(contract)
+    return Symbols(frozenset(functions), frozenset(contracts))
+
+
+def relevance(text: str, symbols: Symbols, decls: list[Declaration]) -> int:
+    """Score a file by the finding symbols it declares or mentions."""
+    score = 0
+    for decl in decls:
+        if decl.kind in CALLABLES and decl.name in symbols.functions:
+            score += 3
+        elif decl.kind in CONTAINERS and decl.name in symbols.contracts:
+            score += 2
+    for name in symbols.functions | symbols.contracts:
+        if re.search(rf"(?<![\w$]){re.escape(name)}(?![\w$])", text):
+            score += 1
+    return score
+
+
+def _keep(decl: Declaration, symbols: Symbols, lines: set[int]) -> bool:
+    if decl.name in symbols.functions:
+        return True
+    return any(decl.start_line <= line <= decl.end_line for line in lines)
+
+
+def elide(
+    text: str,
+    symbols: Symbols,
+    lines: set[int] = frozenset(),
+    decls: list[Declaration] | None = None,
+) -> str:
+    """Drop imports and replace unrelated function bodies with a marker."""
+    decls = outline(text) if decls is None else decls
+    pieces = []
+    position = 0
+    for decl in decls:
+        if decl.kind not in CALLABLES or decl.body is None:
+            continue
+        if _keep(decl, symbols, lines) or decl.body[0] < position:
+            continue
+        start, end = decl.body
+        omitted = decl.end_line - decl.start_line
+        pieces.append(text[position:start])
+        pieces.append(f"{{ /* ... {omitted} lines omitted ... */ }}")
+        position = end
+    pieces.append(text[position:])
+    return _IMPORT_LINE.sub("", "".join(pieces))
+
+
+def focus(
+    text: str,
+    symbols: Symbols,
+    lines: set[int] = frozenset(),
+    decls: list[Declaration] | None = None,
+) -> str:
+    """Keep only the slice of relevant functions (see :mod:`.slicer`)."""
+    return slice_code(text, sorted(lines), sorted(symbols.functions), decls=decls).text
+
+
+@dataclass
+class PackedFile:
+    path: str
+    text: str
+    level: str
+    tokens: int
+    primary: bool = False
+
+
+@dataclass
+class PackedContext:
+    budget: int
+    files: list[PackedFile] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> int:
+        return sum(f.tokens for f in self.files)
+
+    @property
+    def overshoot(self) -> int:
+        """Tokens over :attr:`budget` (0 when the files fit)."""
+        return max(self.tokens - self.budget, 0)
+
+    def render(self) -> str:
+        """Code for ``<code_input>``, each file preceded by its path."""
+        return "\n\n".join(
+            f"// File: {f.path}\n{f.text.strip()}" for f in self.files if f.text
+        )
+
+
+def _variants(
+    text: str,
+    symbols: Symbols,
+    core: Symbols,
+    lines: set[int],
+    decls: list[Declaration] | None = None,
+) -> list[tuple[str, str]]:
+    """Each level of ``text``; ``core`` are the symbols without callees."""
+    decls = outline(text) if decls is None else decls
+    return [
+        ("full", text),
+        ("elided", elide(text, symbols, lines, decls)),
+        ("focused", focus(text, symbols, lines, decls)),
+        ("core", focus(text, core, lines, decls)),
+    ]
+
+
+def pack(
+    record: dict,
+    budget: int = DEFAULT_BUDGET,
+    count_tokens: Tokenizer = estimate_tokens,
+) -> PackedContext:
+    """Fit a record's files into ``budget`` tokens.
+
+    The primary file is always included, at the smallest level if nothing
+    fits.  Context files are added in relevance order and dropped when even
+    their core form does not fit.
+    """
+    core = finding_symbols(record)
+    symbols = with_callees(record, core)
+    packed = PackedContext(budget)
+    files = list(record_files(record))
+    if not files:
+        return packed
+    primary, context = files[0], files[1:]
+
+    remaining = budget
+    text = str(primary.get("content") or "")
+    path = str(primary.get("path", ""))
+    wanted = primary.get("vulnerable_lines") or ()
+    lines = {n for n in wanted if isinstance(n, int)}
+    variants = _variants(text, symbols, core, lines, outline(text, path))
+    for level, body in variants:
+        tokens = count_tokens(body)
+        if (body and tokens <= remaining) or level == LEVELS[-1]:
+            if not body:
+                # Nothing recognisable to focus on: fall back to the elided
+                # text and let it overshoot rather than send no code.
+                level, body = variants[1]
+                tokens = count_tokens(body)
+            packed.files.append(PackedFile(path, body, level, tokens, True))
+            remaining -= tokens
+            break
+
+    ranked = []
+    for order, entry in enumerate(context):
+        body = str(entry.get("content") or "")
+        decls = outline(body, str(entry.get("path", "")))
+        score = relevance(body, symbols, decls)
+        ranked.append((-score, order, entry, body, decls))
+    ranked.sort(key=lambda item: item[:2])
+    for _, _, entry, body, decls in ranked:
+        path = str(entry.get("path", ""))
+        for level, variant in _variants(body, symbols, core, set(), decls):
+            tokens = count_tokens(variant)
+            if variant and tokens <= remaining:
+                packed.files.append(PackedFile(path, variant, level, tokens))
+                remaining -= tokens
+                break
+        else:
+            packed.dropped.append(path)
+    return packed
@@ -0,0 +1,620 @@
+"""Solidity parser with a persistent, incremental AST cache.
+
+:func:`parse` turns a Solidity body into a tree of :class:`Node` objects:
+pragmas, imports, contracts (with their bases), ``using`` directives,
+functions and modifiers (parameters, visibility, applied modifiers and the
+calls made in the body), state variables, events, errors, structs and enums.
+The declarations are those of :func:`.solidity.outline`, so the tree agrees
+with the outline used by the slicer and packer; this module adds the details
+of each.  Excerpts are accepted the same way: members outside any contract
+become top-level nodes and statements that cannot be placed are skipped.
+
+A body is first split into its top-level declarations and each one is parsed
+on its own, with offsets and lines relative to the declaration.
+:class:`AstCache` stores those per-declaration trees on disk under the digest
+of the declaration text, and the list of declarations under the digest of the
+whole body.  An unchanged body is loaded without lexing; an edited one is
+split again and only the declarations whose text changed are parsed.
+
+Run ``python -m blockbench parse`` to parse the task sources and every
+finding body (``--stats`` prints cache counters), or ``parse FILE`` to print
+the tree of one file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Iterator
+
+from .blobs import blob_digest, record_files
+from .codesearch import task_files
+from .languages import detect_language
+from .loader import iter_records
+from .paths import cache_dir
+from .solidity import (
+    CALLABLES,
+    CONTAINERS,
+    HEADER_KEYWORDS,
+    Declaration,
+    LineIndex,
+    Token,
+    match_brace,
+    outline,
+    statement_end,
+    tokenize,
+)
+
+#: Bumped whenever the shape of cached trees changes.
+FORMAT = 2
+
+VISIBILITY = frozenset({"public", "external", "internal", "private"})
+MUTABILITY = frozenset({"view", "pure", "payable", "constant"})
+_LOCATIONS = frozenset({"memory", "calldata", "storage", "indexed"})
+# Words followed by "(" that are not calls.
+_NOT_CALLS = frozenset(
+    {"if", "for", "while", "return", "returns", "catch", "function", "mapping"}
+)
+
+
+@dataclass(frozen=True)
+class Node:
+    """A declaration in a Solidity body.
+
+    ``start``/``end`` are character offsets (``end`` exclusive) and
+    ``start_line``/``end_line`` 1-based inclusive lines.  ``attrs`` holds the
+    kind-specific details (``bases``, ``parameters``, ``modifiers``,
+    ``calls`` ...) as plain JSON values.
+    """
+
+    kind: str
+    name: str
+    start: int
+    end: int
+    start_line: int
+    end_line: int
+    attrs: dict[str, Any] = field(default_factory=dict, compare=False)
+    children: tuple["Node", ...] = ()
+
+    def walk(self) -> Iterator["Node"]:
+        """This node and all its descendants, in source order."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_json(self) -> list:
+        return [
+            self.kind,
+            self.name,
+            self.start,
+            self.end,
+            self.start_line,
+            self.end_line,
+            self.attrs,
+            [child.to_json() for child in self.children],
+        ]
+
+    @classmethod
+    def from_json(cls, data: list) -> "Node":
+        kind, name, start, end, first, last, attrs, children = data
+        return cls(
+            kind,
+            name,
+            start,
+            end,
+            first,
+            last,
+            attrs,
+            tuple(cls.from_json(child) for child in children),
+        )
+
+    def shifted(self, offset: int, lines: int) -> "Node":
+        """The node moved ``offset`` characters and ``lines`` lines down."""
+        attrs = self.attrs
+        if "calls" in attrs:
+            attrs = dict(attrs)
+            attrs["calls"] = [[r, n, line + lines] for r, n, line in attrs["calls"]]
+        return Node(
+            self.kind,
+            self.name,
+            self.start + offset,
+            self.end + offset,
+            self.start_line + lines,
+            self.end_line + lines,
+            attrs,
+            tuple(child.shifted(offset, lines) for child in self.children),
+        )
+
+
+def walk(nodes: list[Node]) -> Iterator[Node]:
+    for node in nodes:
+        yield from node.walk()
+
+
+# -- lexing helpers ---------------------------------------------------------
+
+
+def _join(tokens: list[Token]) -> str:
+    """Compact source text of ``tokens``: spaces only between words."""
+    out = []
+    previous = None
+    for token in tokens:
+        if previous is not None and previous.kind in ("ident", "number"):
+            if token.kind in ("ident", "number"):
+                out.append(" ")
+        out.append(token.value)
+        previous = token
+    return "".join(out)
+
+
+def _group_end(tokens: list[Token], i: int, stop: int) -> int:
+    """Index of the ``)`` closing the ``(`` at ``tokens[i]``."""
+    depth = 0
+    for j in range(i, stop + 1):
+        if tokens[j].value == "(":
+            depth += 1
+        elif tokens[j].value == ")":
+            depth -= 1
+            if depth == 0:
+                return j
+    return stop
+
+
+def _split(tokens: list[Token], separator: str = ",") -> list[list[Token]]:
+    """Split on ``separator`` outside brackets."""
+    parts: list[list[Token]] = [[]]
+    depth = 0
+    for token in tokens:
+        if token.value in "([{":
+            depth += 1
+        elif token.value in ")]}":
+            depth -= 1
+        if depth == 0 and token.value == separator:
+            parts.append([])
+        else:
+            parts[-1].append(token)
+    return [part for part in parts if part]
+
+
+def _parameters(tokens: list[Token]) -> list[list[str]]:
+    """``[[type, name], ...]`` for the contents of a parameter list."""
+    result = []
+    for part in _split(tokens):
+        words = [t for t in part if t.value not in _LOCATIONS]
+        name = ""
+        if len(words) > 1 and words[-1].kind == "ident":
+            name = words.pop().value
+        result.append([_join(words), name])
+    return result
+
+
+def _calls(tokens: list[Token], lines: LineIndex) -> list[list]:
+    """``[[receiver, name, line], ...]`` for each call in ``tokens``.
+
+    ``receiver`` is the expression before the final ``.`` with argument lists
+    collapsed to ``()`` (``IERC20(token).transfer`` -> ``IERC20()``), ``"new"``
+    for contract creation, or ``None`` for a bare call.
+    """
+    calls = []
+    for i, token in enumerate(tokens[:-1]):
+        if token.kind != "ident" or tokens[i + 1].value != "(":
+            continue
+        if token.value in _NOT_CALLS:
+            continue
+        before = tokens[i - 1].value if i else ""
+        if before in ("emit", "revert"):
+            # Event emission and custom errors.
+            continue
+        receiver = "new" if before == "new" else None
+        if before == ".":
+            parts: list[str] = []
+            j = i - 2
+            while j >= 0:
+                if tokens[j].value == ")":
+                    depth = 0
+                    while j >= 0:
+                        if tokens[j].value == ")":
+                            depth += 1
+                        elif tokens[j].value == "(":
+                            depth -= 1
+                            if depth == 0:
+                                break
+                        j -= 1
+                    parts.append("()")
+                    j -= 1
+                    continue
+                if tokens[j].value == "]":
+                    while j >= 0 and tokens[j].value != "[":
+                        j -= 1
+                    parts.append("[]")
+                    j -= 1
+                    continue
+                if tokens[j].kind == "ident":
+                    parts.append(tokens[j].value)
+                    if j > 0 and tokens[j - 1].value == ".":
+                        parts.append(".")
+                        j -= 2
+                        continue
+                break
+            receiver = "".join(reversed(parts)) or None
+        calls.append([receiver, token.value, lines.line(token.start)])
+    return calls
+
+
+# -- declarations -----------------------------------------------------------
+
+
+def _callable(tokens, first, last, brace, lines) -> tuple[str, dict]:
+    keyword = tokens[first].value
+    i = first + 1
+    name = keyword
+    if keyword in ("function", "modifier") and i <= last:
+        if tokens[i].kind == "ident":
+            name = tokens[i].value
+            i += 1
+    attrs: dict[str, Any] = {"parameters": [], "modifiers": []}
+    header_end = brace - 1 if brace is not None else last
+    if i <= header_end and tokens[i].value == "(":
+        close = _group_end(tokens, i, header_end)
+        attrs["parameters"] = _parameters(tokens[i + 1 : close])
+        i = close + 1
+    while i <= header_end:
+        token = tokens[i]
+        value = token.value
+        following = tokens[i + 1].value if i + 1 <= header_end else ""
+        if value == "returns" and following == "(":
+            close = _group_end(tokens, i + 1, header_end)
+            attrs["returns"] = _parameters(tokens[i + 2 : close])
+            i = close + 1
+            continue
+        if value in VISIBILITY:
+            attrs["visibility"] = value
+        elif value in MUTABILITY:
+            attrs["mutability"] = value
+        elif value in ("virtual", "override"):
+            attrs[value] = True
+        elif token.kind == "ident" and value not in HEADER_KEYWORDS:
+            attrs["modifiers"].append(value)
+        if following == "(":
+            i = _group_end(tokens, i + 1, header_end)
+        i += 1
+    if brace is not None:
+        attrs["calls"] = _calls(tokens[brace + 1 : last], lines)
+    return name, attrs
+
+
+def _variable(tokens, first, last) -> tuple[str, dict] | None:
+    depth = 0
+    head: list[Token] = []
+    for token in tokens[first:last]:
+        if token.value in "([":
+            depth += 1
+        elif token.value in ")]":
+            depth -= 1
+        elif depth == 0 and token.value == "=":
+            break
+        head.append(token)
+    if len(head) < 2 or head[-1].kind != "ident":
+        return None
+    name = head[-1].value
+    if name in HEADER_KEYWORDS or name == head[0].value:
+        return None
+    attrs: dict[str, Any] = {}
+    type_tokens: list[Token] = []
+    for token in head[:-1]:
+        if token.value in VISIBILITY:
+            attrs["visibility"] = token.value
+        elif token.value in ("constant", "immutable", "override", "transient"):
+            attrs[token.value] = True
+        else:
+            type_tokens.append(token)
+    attrs["type"] = _join(type_tokens)
+    return name, attrs
+
+
+def _import(tokens: list[Token]) -> dict:
+    attrs: dict[str, Any] = {"path": "", "symbols": []}
+    for i, token in enumerate(tokens):
+        if token.kind == "string" and not attrs["path"]:
+            attrs["path"] = token.value.strip("\"'")
+        elif token.value == "as" and i + 1 < len(tokens):
+            if tokens[i - 1].value == "*" or tokens[i - 1].kind == "string":
+                attrs["alias"] = tokens[i + 1].value
+        elif token.value == "{":
+            for part in _split(tokens[i + 1 : match_brace(tokens, i)]):
+                attrs["symbols"].append(part[0].value)
+    return attrs
+
+
+def _using(tokens: list[Token]) -> tuple[str, dict]:
+    words = [t.value for t in tokens[1:] if t.value != ";"]
+    target = "*"
+    if "for" in words:
+        split = words.index("for")
+        target = "".join(w for w in words[split + 1 :] if w != "global") or "*"
+        words = words[:split]
+    library = "".join(words)
+    return library, {"for": target}
+
+
+def _details(decl: Declaration, tokens, first, last, brace, lines) -> Node:
+    """The :class:`Node` for ``decl``, spanning ``tokens[first:last + 1]``."""
+    kind, name = decl.kind, decl.name
+    attrs: dict[str, Any] = {}
+    if kind in CONTAINERS:
+        i = first + 1 if tokens[first].value == "abstract" else first
+        end = brace if brace is not None else last + 1
+        attrs["bases"] = [
+            part[0].value
+            for part in _split(tokens[i + 3 : end])
+            if tokens[i + 2].value == "is" and part[0].kind == "ident"
+        ]
+        attrs["abstract"] = i > first
+    elif kind in CALLABLES:
+        name, attrs = _callable(tokens, first, last, brace, lines)
+    elif kind == "pragma":
+        attrs["value"] = _join(tokens[first + 1 : last])
+    elif kind == "import":
+        attrs = _import(tokens[first : last + 1])
+        name = attrs["path"]
+    elif kind == "using":
+        name, attrs = _using(tokens[first : last + 1])
+    elif kind in ("event", "error") and first + 2 <= last:
+        if tokens[first + 2].value == "(":
+            close = _group_end(tokens, first + 2, last)
+            attrs["parameters"] = _parameters(tokens[first + 3 : close])
+    elif kind == "struct" and brace is not None:
+        attrs["fields"] = [
+            field
+            for part in _split(tokens[brace + 1 : last], ";")
+            for field in _parameters(part)
+        ]
+    elif kind == "enum" and brace is not None:
+        attrs["members"] = [part[0].value for part in _split(tokens[brace + 1 : last])]
+    elif kind == "type":
+        attrs["type"] = _join(tokens[first + 3 : last]) if first + 3 <= last else ""
+    elif kind == "variable":
+        variable = _variable(tokens, first, last)
+        if variable is not None:
+            attrs = variable[1]
+    return Node(kind, name, decl.start, decl.end, decl.start_line, decl.end_line, attrs)
+
+
+def _parse(text: str) -> list[Node]:
+    """Nest the details of each declaration in :func:`.solidity.outline`."""
+    tokens = list(tokenize(text))
+    lines = LineIndex(text)
+    starts = {token.start: i for i, token in enumerate(tokens)}
+    ends = {token.end: i for i, token in enumerate(tokens)}
+    roots: list[Node] = []
+    # Open containers: the node without children, and the children so far.
+    stack: list[tuple[Node, list[Node]]] = []
+
+    def close() -> None:
+        node, children = stack.pop()
+        node = replace(node, children=tuple(children))
+        (stack[-1][1] if stack else roots).append(node)
+
+    for decl in outline(text, tokens):
+        while stack and decl.start >= stack[-1][0].end:
+            close()
+        brace = starts[decl.body[0]] if decl.body is not None else None
+        node = _details(decl, tokens, starts[decl.start], ends[decl.end], brace, lines)
+        if decl.kind in CONTAINERS:
+            stack.append((node, []))
+        else:
+            (stack[-1][1] if stack else roots).append(node)
+    while stack:
+        close()
+    return roots
+
+
+# -- incremental parsing ----------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A top-level declaration: its text, offset and first line."""
+
+    text: str
+    start: int
+    line: int
+
+    @property
+    def digest(self) -> str:
+        return blob_digest(self.text)
+
+
+def segments(text: str) -> list[Segment]:
+    """Split ``text`` into its top-level declarations."""
+    tokens = list(tokenize(text))
+    lines = LineIndex(text)
+    result = []
+    i = 0
+    while i < len(tokens):
+        if tokens[i].value in ("}", ";"):
+            # Stray closers from excerpts that start inside a block.
+            i += 1
+            continue
+        first = i
+        last, _ = statement_end(tokens, i)
+        last = max(first, last)
+        start, end = tokens[first].start, tokens[last].end
+        result.append(Segment(text[start:end], start, lines.line(start)))
+        i = last + 1
+    return result
+
+
+def parse_segment(text: str) -> list[Node]:
+    """Parse one top-level declaration, positioned at offset 0, line 1."""
+    return _parse(text)
+
+
+def parse(text: str) -> list[Node]:
+    """Parse ``text`` without a cache."""
+    nodes: list[Node] = []
+    for segment in segments(text):
+        for node in parse_segment(segment.text):
+            nodes.append(node.shifted(segment.start, segment.line - 1))
+    return nodes
+
+
+class AstCache:
+    """Parsed trees keyed by content digest.
+
+    Entries are kept in memory and, when ``root`` is given, persisted as
+    ``root/bodies/<2 hex>/<62 hex>.json`` (the segment list of a body) and
+    ``root/decls/<2 hex>/<62 hex>.json`` (the tree of one declaration).
+    """
+
+    def __init__(self, root: Path | str | None = None) -> None:
+        self.root = Path(root) if root is not None else None
+        self._bodies: dict[str, list[list]] = {}
+        self._decls: dict[str, list[Node]] = {}
+        #: Bodies answered from the cache / split again.
+        self.hits = 0
+        self.misses = 0
+        #: Declarations reused / parsed while handling misses.
+        self.reused = 0
+        self.parsed = 0
+
+    @classmethod
+    def on_disk(cls) -> "AstCache":
+        return cls(cache_dir() / f"ast-v{FORMAT}")
+
+    def _path(self, kind: str, digest: str) -> Path:
+        assert self.root is not None
+        return self.root / kind / digest[:2] / f"{digest[2:]}.json"
+
+    def _read(self, kind: str, digest: str) -> Any:
+        if self.root is None:
+            return None
+        try:
+            with self._path(kind, digest).open(encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, kind: str, digest: str, data: Any) -> None:
+        if self.root is None:
+            return
+        path = self._path(kind, digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def _declaration(self, digest: str, text: str | None) -> list[Node] | None:
+        nodes = self._decls.get(digest)
+        if nodes is None:
+            data = self._read("decls", digest)
+            if data is not None:
+                nodes = [Node.from_json(item) for item in data]
+            elif text is not None:
+                nodes = parse_segment(text)
+                self._write("decls", digest, [n.to_json() for n in nodes])
+                self.parsed += 1
+            else:
+                return None
+            self._decls[digest] = nodes
+        return nodes
+
+    def _assemble(
+        self, layout: list[list], texts: dict[str, str]
+    ) -> list[Node] | None:
+        nodes = []
+        for digest, start, line in layout:
+            tree = self._declaration(digest, texts.get(digest))
+            if tree is None:
+                return None
+            nodes.extend(node.shifted(start, line - 1) for node in tree)
+        return nodes
+
+    def parse(self, text: str) -> list[Node]:
+        """Parse ``text``, reusing every declaration parsed before."""
+        digest = blob_digest(text)
+        layout = self._bodies.get(digest) or self._read("bodies", digest)
+        if layout is not None:
+            nodes = self._assemble(layout, {})
+            if nodes is not None:
+                self._bodies[digest] = layout
+                self.hits += 1
+                return nodes
+        self.misses += 1
+        texts = {}
+        layout = []
+        for segment in segments(text):
+            texts[segment.digest] = segment.text
+            layout.append([segment.digest, segment.start, segment.line])
+        parsed = self.parsed
+        nodes = self._assemble(layout, texts)
+        assert nodes is not None
+        self.reused += len(layout) - (self.parsed - parsed)
+        self._bodies[digest] = layout
+        self._write("bodies", digest, layout)
+        return nodes
+
+
+def corpus_sources() -> Iterator[tuple[str, str]]:
+    """``(label, text)`` for every Solidity task file and finding body.
+
+    The language is detected from the content, so ``Task-1/problem.rs`` is
+    included.
+    """
+    for path in task_files():
+        text = path.read_text(encoding="utf-8")
+        if detect_language(text, path) == "solidity":
+            yield str(path), text
+    for record in iter_records(on_error=lambda error: None):
+        for entry in record_files(record):
+            content = entry.get("content")
+            path = str(entry.get("path", ""))
+            if not isinstance(content, str):
+                continue
+            if detect_language(content, path) == "solidity":
+                yield f"{record.get('id')}:{path}", content
+
+
+def _print_tree(nodes: list[Node], depth: int = 0) -> None:
+    for node in nodes:
+        details = ""
+        if node.kind in CONTAINERS and node.attrs.get("bases"):
+            details = " is " + ", ".join(node.attrs["bases"])
+        elif node.kind in CALLABLES:
+            details = f" ({len(node.attrs.get('calls', []))} calls)"
+            if node.attrs.get("modifiers"):
+                details += " " + " ".join(node.attrs["modifiers"])
+        print(
+            f"{'  ' * depth}{node.kind} {node.name}"
+            f" [{node.start_line}-{node.end_line}]{details}"
+        )
+        _print_tree(list(node.children), depth + 1)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    cache = AstCache.on_disk()
+    files = [a for a in argv if not a.startswith("--")]
+    if files:
+        for name in files:
+            _print_tree(cache.parse(Path(name).read_text(encoding="utf-8")))
+        return 0
+    began = time.perf_counter()
+    bodies = declarations = 0
+    for _, text in corpus_sources():
+        bodies += 1
+        declarations += sum(1 for _ in walk(cache.parse(text)))
+    elapsed = time.perf_counter() - began
+    print(f"{bodies} bodies, {declarations} declarations in {elapsed:.2f}s")
+    if "--stats" in argv:
+        print(
+            f"bodies: {cache.hits} cached, {cache.misses} parsed; declarations: "
+            f"{cache.reused} reused, {cache.parsed} parsed"
+        )
+    return 0
@@ -0,0 +1,21 @@
+"""Well-known locations inside the dataset checkout."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+#: Directories holding finding records, in the order they are loaded.
+FINDING_DIRS = ("sherlock", "solodit", "gold_standard")
+
+
+def cache_dir() -> Path:
+    """Return the directory used for derived artefacts (indexes, caches).
+
+    Defaults to ``.blockbench/`` at the repository root and can be moved with
+    the ``BLOCKBENCH_CACHE`` environment variable.
+    """
+    override = os.environ.get("BLOCKBENCH_CACHE")
+    return Path(override) if override else REPO_ROOT / ".blockbench"
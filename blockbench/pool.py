@@ -0,0 +1,24 @@
+"""Process pool helpers shared by the parallel commands."""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Iterable, Iterator
+
+
+def bounded_map(
+    executor: Executor, fn, items: Iterable, *args, window: int
+) -> Iterator:
+    """Like ``executor.map`` but with at most ``window`` items in flight.
+
+    ``items`` is consumed lazily, so a stream of records is never held in
+    memory at once; results come back in input order.
+    """
+    pending: deque[Future] = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,237 @@
+"""Check that ``call_flow`` and ``context_hint`` still match the code.
+
+Both fields cite code: ``call_flow`` is a chain of ``Contract.function()``
+steps and ``context_hint`` mentions functions and line ranges ("the digest
+creation at lines 118-129", "(MajorityVotingBase line 578)").  Edits to
+``primary_file``/``context_files`` silently invalidate them.  For each record
+:func:`check_record` builds the record's call graph once (see
+:mod:`.callgraph`) and reports an :class:`Issue` for
+
+* ``unknown-symbol``: a cited function the record's files neither declare
+  nor call (an error in ``call_flow``, a warning in ``context_hint``, which
+  may describe a function that is missing on purpose),
+* ``line-out-of-range``: a cited line past the end of the file (error),
+* ``line-outside-function``: a cited range not inside the function named
+  next to it (warning),
+* ``unlinked-step``: a ``call_flow`` step not reachable through calls from
+  any earlier step (warning; flows also list successive transactions).
+
+:func:`check_corpus` spreads records over worker processes.  Run
+``python -m blockbench refcheck [--out FILE] [--workers N]``; the JSON report
+lists every issue and every malformed record, and the exit status is 1 if any
+error was found or any record could not be read.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterable
+
+from .blobs import record_files
+from .callgraph import CallGraph, check_flow, flow_refs, looks_like_identifier
+from .lines import Issue, LineTable
+from .loader import ErrorHandler, LoadError, iter_records
+from .paths import cache_dir
+from .pool import bounded_map
+
+_LINE_REF = re.compile(
+    r"\b(?:lines?|L)\s*(\d+)(?:\s*(?:-|–|to)\s*L?(\d+))?", re.IGNORECASE
+)
+_SENTENCE = re.compile(r"(?<=[.!?])\s+(?=[A-Z])|\s*(?:->|→)\s*")
+_NAMED_FUNCTION = re.compile(r"\b(?:the\s+)?([A-Za-z_$][\w$]*)\s+function\b")
+
+
+def _file_of(record: dict, graph: CallGraph, sentence: str) -> dict:
+    """The file a line reference points into: a named contract's, else primary."""
+    primary = record.get("primary_file") or {}
+    for contract in graph.contracts.values():
+        if re.search(rf"\b{re.escape(contract.name)}\b", sentence):
+            for entry in record_files(record):
+                if entry.get("path") == contract.path:
+                    return entry
+    return primary
+
+
+def _hint_refs(sentence: str) -> list[tuple[str | None, str]]:
+    """Functions a prose sentence cites: ``C.f()``, ``_f()``, "the f function"."""
+    refs = flow_refs(sentence) if "(" in sentence else []
+    for name in _NAMED_FUNCTION.findall(sentence):
+        if (None, name) not in refs and looks_like_identifier(name):
+            refs.append((None, name))
+    return refs
+
+
+def check_record(record: dict) -> list[Issue]:
+    """All reference issues of one record."""
+    record_id = str(record.get("id", ""))
+    graph = CallGraph.for_record(record)
+    called = {call.name for call in graph.unresolved}
+    issues: list[Issue] = []
+    flow = check_flow(record, graph)
+    for step in flow.unknown:
+        issues.append(
+            Issue(
+                record_id,
+                "call_flow",
+                "unknown-symbol",
+                "error",
+                f"step {step.text!r} names no function in the record's files",
+            )
+        )
+    for link in flow.missing:
+        issues.append(
+            Issue(
+                record_id,
+                "call_flow",
+                "unlinked-step",
+                "warning",
+                f"no call path to {link.target.text!r} from an earlier step",
+            )
+        )
+
+    counts: dict[str, int] = {}
+    for field in ("context_hint", "call_flow"):
+        text = str(record.get(field) or "")
+        for sentence in _SENTENCE.split(text):
+            refs = _hint_refs(sentence)
+            if field == "context_hint":
+                for contract, name in refs:
+                    declared = graph.lookup(contract, name)
+                    external = (contract and contract not in graph.contracts) or (
+                        name in called
+                    )
+                    plausible = contract or looks_like_identifier(name)
+                    if plausible and not declared and not external:
+                        issues.append(
+                            Issue(
+                                record_id,
+                                field,
+                                "unknown-symbol",
+                                # Hints also describe what is missing.
+                                "warning",
+                                f"{name}() is not declared in the record's files",
+                            )
+                        )
+            for match in _LINE_REF.finditer(sentence):
+                first = int(match.group(1))
+                last = int(match.group(2) or first)
+                entry = _file_of(record, graph, sentence)
+                path = str(entry.get("path", ""))
+                if path not in counts:
+                    content = str(entry.get("content") or "")
+                    counts[path] = LineTable.for_text(content).count
+                if last > counts[path] or first < 1 or last < first:
+                    issues.append(
+                        Issue(
+                            record_id,
+                            field,
+                            "line-out-of-range",
+                            "error",
+                            f"{match.group()} is outside {path or 'the file'} "
+                            f"({counts[path]} lines)",
+                        )
+                    )
+                    continue
+                spans = [
+                    node
+                    for contract, name in refs
+                    for qualified in graph.lookup(contract, name)
+                    for node_path, node in [graph.functions[qualified]]
+                    if node_path == path
+                ]
+                if spans and not any(
+                    n.start_line <= first and last <= n.end_line for n in spans
+                ):
+                    names = ", ".join(sorted({n.name for n in spans}))
+                    issues.append(
+                        Issue(
+                            record_id,
+                            field,
+                            "line-outside-function",
+                            "warning",
+                            f"{match.group()} is not inside {names}",
+                        )
+                    )
+    return issues
+
+
+def _check_job(record: dict) -> tuple[str, list[Issue]]:
+    return str(record.get("id", "")), check_record(record)
+
+
+def check_corpus(
+    paths: Iterable[Path | str] | None = None,
+    workers: int | None = None,
+    on_error: ErrorHandler | None = None,
+) -> tuple[int, list[Issue]]:
+    """Check every record in parallel; returns ``(records, issues)``."""
+    workers = workers or os.cpu_count() or 1
+    records = 0
+    issues: list[Issue] = []
+    with ProcessPoolExecutor(workers) as executor:
+        results = bounded_map(
+            executor, _check_job, iter_records(paths, on_error), window=workers * 4
+        )
+        for _, found in results:
+            records += 1
+            issues.extend(found)
+    return records, issues
+
+
+def report(
+    records: int, issues: list[Issue], malformed: Iterable[LoadError] = ()
+) -> dict:
+    """The JSON report: counts by code, every issue and every malformed record."""
+    by_code: dict[str, int] = {}
+    for issue in issues:
+        by_code[issue.code] = by_code.get(issue.code, 0) + 1
+    return {
+        "records": records,
+        "errors": sum(issue.severity == "error" for issue in issues),
+        "warnings": sum(issue.severity == "warning" for issue in issues),
+        "by_code": dict(sorted(by_code.items())),
+        "issues": [asdict(issue) for issue in issues],
+        "malformed": [str(error) for error in malformed],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    usage = "usage: refcheck [--out FILE] [--workers N]"
+    options = {"--out": None, "--workers": None}
+    for name in options:
+        if name in argv:
+            i = argv.index(name)
+            if i + 1 == len(argv):
+                print(usage, file=sys.stderr)
+                return 2
+            options[name] = argv[i + 1]
+            del argv[i : i + 2]
+    if argv:
+        print(usage, file=sys.stderr)
+        return 2
+    out = Path(options["--out"] or cache_dir() / "refcheck.json")
+    workers = int(options["--workers"]) if options["--workers"] else None
+    malformed: list[LoadError] = []
+    records, issues = check_corpus(workers=workers, on_error=malformed.append)
+    data = report(records, issues, malformed)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    for error in malformed:
+        print(f"malformed: {error}", file=sys.stderr)
+    for issue in issues:
+        print(
+            f"{issue.severity}: {issue.record_id} {issue.field}: {issue.message}",
+            file=sys.stderr,
+        )
+    print(
+        f"{records} records, {len(malformed)} malformed, {data['errors']} errors, "
+        f"{data['warnings']} warnings -> {out}"
+    )
+    return 1 if data["errors"] or malformed else 0
@@ -0,0 +1,211 @@
+"""Persistent cache of model responses.
+
+Responses are stored in SQLite under a key that hashes the rendered prompt
+text, the model spec, the temperature and the seed (:func:`response_key`).
+Changing a prompt, a model or a sampling setting gives a new key, and
+re-running an unchanged sweep, for example to try a new scorer, makes no
+model calls at all.
+
+The cache is bounded by the total size of its responses.  When a write
+pushes it past ``max_bytes``, the least recently used entries are evicted.
+The total is kept in the one-row ``totals`` table by triggers, so checking
+it on every write does not scan the cache and stays right when several
+processes share the file.
+``hits``, ``misses``, ``writes`` and ``evicted`` count the activity of one
+:class:`ResponseCache` object; the ``counters`` table keeps the same counts
+for every process that has used the file (:meth:`ResponseCache.counters`).
+
+:class:`.harness.Harness` consults the cache before calling a backend.  Run
+``python -m blockbench responses stats`` to see the cache size and counts, or
+``responses prune --max-mb N`` to shrink it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from .paths import cache_dir
+
+#: Default size bound of the cached responses, in bytes.
+MAX_BYTES = 512 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals SELECT 0, COALESCE(SUM(size), 0) FROM responses;
+CREATE TRIGGER IF NOT EXISTS responses_added AFTER INSERT ON responses BEGIN
+    UPDATE totals SET size = size + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_removed AFTER DELETE ON responses BEGIN
+    UPDATE totals SET size = size - OLD.size;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_resized AFTER UPDATE OF size ON responses
+BEGIN
+    UPDATE totals SET size = size + NEW.size - OLD.size;
+END;
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters VALUES
+    ('hits', 0), ('misses', 0), ('writes', 0), ('evicted', 0);
+"""
+
+
+def response_key(prompt: str, model: str, temperature: float, seed: int) -> str:
+    """SHA-256 over the prompt text and the settings that shape a response."""
+    prompt_digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    config = json.dumps([prompt_digest, model, float(temperature), int(seed)])
+    return hashlib.sha256(config.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Model responses in SQLite with least-recently-used eviction.
+
+    ``path`` of ``None`` keeps the cache in memory.
+    """
+
+    def __init__(
+        self, path: Path | str | None = None, max_bytes: int = MAX_BYTES
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.max_bytes = max_bytes
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path) if self.path else ":memory:")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evicted = 0
+
+    @classmethod
+    def on_disk(cls) -> "ResponseCache":
+        return cls(cache_dir() / "responses.sqlite")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def get(self, key: str) -> str | None:
+        row = self._db.execute(
+            "SELECT response FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            with self._db:
+                self._count("misses")
+            return None
+        self.hits += 1
+        with self._db:
+            self._db.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._count("hits")
+        return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._db:
+            # An upsert rather than INSERT OR REPLACE, whose implicit
+            # delete does not fire the trigger that maintains the total.
+            self._db.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET model = excluded.model,"
+                " response = excluded.response, size = excluded.size,"
+                " created = excluded.created, accessed = excluded.accessed",
+                (key, model, response, size, now, now),
+            )
+            self._count("writes")
+        self.writes += 1
+        if self.size() > self.max_bytes:
+            self.prune(self.max_bytes)
+
+    def __contains__(self, key: object) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def size(self) -> int:
+        """Total bytes of the cached responses."""
+        return self._db.execute("SELECT size FROM totals").fetchone()[0]
+
+    def prune(self, max_bytes: int) -> int:
+        """Evict least recently used entries until at most ``max_bytes``."""
+        excess = self.size() - max_bytes
+        if excess <= 0:
+            return 0
+        victims = []
+        for key, size in self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed"
+        ):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        with self._db:
+            self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+            self._count("evicted", len(victims))
+        self.evicted += len(victims)
+        return len(victims)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        self._db.execute(
+            "UPDATE counters SET count = count + ? WHERE name = ?", (n, name)
+        )
+
+    def counters(self) -> dict[str, int]:
+        """Hits, misses, writes and evictions over the life of the file."""
+        return dict(self._db.execute("SELECT name, count FROM counters").fetchall())
+
+    def by_model(self) -> dict[str, int]:
+        return dict(
+            self._db.execute(
+                "SELECT model, COUNT(*) FROM responses GROUP BY model ORDER BY model"
+            ).fetchall()
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["stats"] and len(argv) == 1:
+        cache = ResponseCache.on_disk()
+        print(f"{len(cache)} responses, {cache.size() / 1e6:.1f} MB -> {cache.path}")
+        counts = cache.counters()
+        print(
+            f"{counts['hits']} hits, {counts['misses']} misses, "
+            f"{counts['writes']} writes, {counts['evicted']} evicted"
+        )
+        for model, count in cache.by_model().items():
+            print(f"  {model}: {count}")
+        return 0
+    if argv[:1] == ["prune"] and len(argv) == 3 and argv[1] == "--max-mb":
+        cache = ResponseCache.on_disk()
+        evicted = cache.prune(int(float(argv[2]) * 1e6))
+        print(f"evicted {evicted} responses, {cache.size() / 1e6:.1f} MB left")
+        return 0
+    print("usage: responses stats | responses prune --max-mb N", file=sys.stderr)
+    return 2
@@ -0,0 +1,212 @@
+"""Tolerant Rust lexer and declaration outline.
+
+The counterpart of :mod:`.solidity` for Rust sources: :func:`outline` returns
+the same :class:`.solidity.Declaration` records, so slicing, packing and
+search treat both languages alike.  ``impl`` blocks, traits and modules are
+containers; an ``impl`` is named after its self type, so methods read as
+``Type.method`` just like ``Contract.function``.
+
+The lexer understands nested block comments, raw and byte strings, character
+literals and lifetimes; attributes (``#[...]``) are skipped.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterator
+
+from .solidity import Declaration, LineIndex, Token, match_brace
+
+_TOKEN = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*)
+  | (?P<string>b?r(?P<hashes>\#*)".*?"(?P=hashes)|b?"(?:\\.|[^"\\])*"?)
+  | (?P<char>b?'(?:\\.|[^'\\\n])')
+  | (?P<lifetime>'[A-Za-z_]\w*)
+  | (?P<number>0[xXoObB][0-9a-fA-F_]*|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?\w*)
+  | (?P<ident>r\#[A-Za-z_]\w*|[A-Za-z_]\w*)
+  | (?P<punct>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+CONTAINERS = frozenset({"impl", "trait", "mod"})
+CALLABLES = frozenset({"function"})
+ITEMS = frozenset({"struct", "enum", "union", "const", "static", "type"})
+# Words that may precede an item without changing its kind.
+_QUALIFIERS = frozenset(
+    {"pub", "unsafe", "async", "extern", "default", "crate", "super", "in"}
+)
+
+
+def tokenize(text: str) -> Iterator[Token]:
+    """Yield significant tokens (no whitespace, comments or lifetimes)."""
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        kind = match.lastgroup
+        end = match.end()
+        if match.group() == "/*":
+            depth = 1
+            while depth and end < len(text):
+                pair = text[end : end + 2]
+                if pair == "/*":
+                    depth += 1
+                    end += 2
+                elif pair == "*/":
+                    depth -= 1
+                    end += 2
+                else:
+                    end += 1
+        elif kind not in ("ws", "comment", "lifetime"):
+            yield Token(kind, match.group(), match.start(), end)
+        position = end
+
+
+def _statement_end(tokens: list[Token], i: int) -> tuple[int, int | None]:
+    """Like :func:`.solidity.statement_end`, also skipping ``[...]``."""
+    depth = 0
+    for j in range(i, len(tokens)):
+        value = tokens[j].value
+        if value in "([":
+            depth += 1
+        elif value in ")]":
+            depth = max(0, depth - 1)
+        elif depth == 0 and value == ";":
+            return j, None
+        elif depth == 0 and value == "{":
+            return match_brace(tokens, j), j
+        elif depth == 0 and value == "}":
+            return j - 1, None
+    return len(tokens) - 1, None
+
+
+def _skip_attribute(tokens: list[Token], i: int) -> int:
+    """Index after an attribute starting at ``tokens[i] == "#"``."""
+    j = i + 1
+    if j < len(tokens) and tokens[j].value == "!":
+        j += 1
+    if j >= len(tokens) or tokens[j].value != "[":
+        return i + 1
+    depth = 0
+    for k in range(j, len(tokens)):
+        if tokens[k].value == "[":
+            depth += 1
+        elif tokens[k].value == "]":
+            depth -= 1
+            if depth == 0:
+                return k + 1
+    return len(tokens)
+
+
+def _impl_name(tokens: list[Token], first: int, brace: int | None) -> str:
+    """Self type of ``impl<..> [Trait for] Type<..> [where ..] {``."""
+    end = brace if brace is not None else len(tokens)
+    words: list[str] = []
+    depth = 0
+    for token in tokens[first + 1 : end]:
+        if token.value == "<":
+            depth += 1
+        elif token.value == ">":
+            depth -= 1
+        elif depth == 0 and token.value == "where":
+            break
+        elif depth == 0 and token.value == "for":
+            words = []
+        elif depth == 0 and token.kind == "ident":
+            words.append(token.value)
+    return words[-1] if words else "impl"
+
+
+def outline(text: str) -> list[Declaration]:
+    """Return the declarations of ``text`` in source order."""
+    tokens = list(tokenize(text))
+    lines = LineIndex(text)
+    result: list[Declaration] = []
+
+    def declare(kind, name, container, first, last, brace) -> None:
+        last = max(first, last)
+        start, end = tokens[first].start, tokens[last].end
+        body = (tokens[brace].start, tokens[last].end) if brace is not None else None
+        result.append(
+            Declaration(
+                kind,
+                name,
+                container,
+                start,
+                end,
+                lines.line(start),
+                lines.line(max(start, end - 1)),
+                body,
+            )
+        )
+
+    def walk(i: int, stop: int, container: str | None) -> None:
+        first = None
+        while i <= stop:
+            token = tokens[i]
+            value = token.value
+            if value == "#":
+                i = _skip_attribute(tokens, i)
+                continue
+            if token.kind != "ident":
+                if value == "(" and first is not None:
+                    # pub(crate) and friends
+                    while i <= stop and tokens[i].value != ")":
+                        i += 1
+                elif token.kind != "string":
+                    first = None
+                i += 1
+                continue
+            if first is None:
+                first = i
+            following = tokens[i + 1] if i + 1 <= stop else None
+            if value in _QUALIFIERS or (
+                value == "const" and following and following.value == "fn"
+            ):
+                i += 1
+                continue
+            if value == "fn" and following and following.kind == "ident":
+                last, brace = _statement_end(tokens, i + 2)
+                last = min(last, stop)
+                declare("function", following.value, container, first, last, brace)
+            elif value in ("impl", "trait", "mod") and following:
+                last, brace = _statement_end(tokens, i + 1)
+                last = min(last, stop)
+                if value == "impl":
+                    name = _impl_name(tokens, i, brace)
+                else:
+                    name = following.value
+                declare(value, name, container, first, last, brace)
+                if brace is not None:
+                    walk(brace + 1, last - 1, name)
+            elif value == "use":
+                last = i
+                while last < stop and tokens[last].value != ";":
+                    last += 1
+                name = "".join(t.value for t in tokens[i + 1 : last])
+                declare("use", name, container, first, last, None)
+            elif value in ITEMS and following:
+                last, brace = _statement_end(tokens, i + 1)
+                last = min(last, stop)
+                declare(value, following.value, container, first, last, brace)
+            elif value == "macro_rules" and i + 2 <= stop:
+                last, brace = _statement_end(tokens, i + 2)
+                last = min(last, stop)
+                declare("macro", tokens[i + 2].value, container, first, last, brace)
+            else:
+                first = None
+                i += 1
+                continue
+            first = None
+            i = last + 1
+
+    if tokens:
+        walk(0, len(tokens) - 1, None)
+    return result
+
+
+def identifiers(text: str, start: int = 0, end: int | None = None) -> set[str]:
+    """Identifiers used in ``text[start:end]`` (outside comments/strings)."""
+    return {t.value for t in tokenize(text[start:end]) if t.kind == "ident"}
@@ -0,0 +1,417 @@
+"""The finding record schema, compiled to validator functions.
+
+:data:`RECORD` defines the 23-field record schema once, as a subset of
+JSON Schema: ``type``, ``properties``, ``required``,
+``additionalProperties``, ``items``, ``enum``, ``pattern``, ``minLength``,
+``minimum`` and ``maximum``.  :func:`compile_schema` turns a schema into
+the Python source of one straight-line function, with every constant
+hoisted out and every regular expression compiled, and ``exec``s it.  So
+validating a record only runs type tests and dictionary lookups, about
+10 microseconds per record; the schema is not interpreted again.  Decoding
+the JSON costs far more, which is why files are spread over processes.
+
+Every problem is reported as an :class:`~.lines.Issue` whose ``field`` is
+the JSON pointer of the offending value (``/primary_file/vulnerable_lines/3``)
+and whose ``code`` is ``type``, ``missing``, ``unknown-field``, ``enum``,
+``pattern``, ``length`` or ``range``.  :func:`validate_files` checks the
+finding files in parallel, one file per worker process, and reports the
+records the loader could not decode at all.  :func:`duplicate_ids` finds ids
+used by more than one record.
+
+Run ``python -m blockbench schema [FILES...] [--workers N] [--json]``; the
+exit status is 1 if any record is malformed or breaks the schema, so the
+command can serve as a pre-commit check.  ``schema --source`` prints the
+generated validator.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from .lines import Issue
+from .loader import LoadError, finding_files, iter_file
+
+_NAME = {"type": "string", "pattern": r"^[a-z0-9_]+$"}
+_TEXT = {"type": "string", "minLength": 1}
+_URL = {"type": "string", "pattern": r"^https?://\S+$"}
+
+#: Schema of one file entry in ``primary_file`` and ``context_files``.
+_FILE = {
+    "path": _TEXT,
+    "content": {"type": "string"},
+}
+
+#: The shared schema of every finding record.
+RECORD: dict = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string", "pattern": r"^\S+$"},
+        "subset": _NAME,
+        "language": _NAME,
+        "chain": _NAME,
+        "source_platform": _NAME,
+        "source_report": _TEXT,
+        "source_finding_id": _TEXT,
+        "report_url": _URL,
+        "github_repo_url": _URL,
+        "contest_date": {"type": "string", "pattern": r"^\d{4}-\d{2}-\d{2}$"},
+        "severity": {"type": "string", "enum": ["critical", "high", "medium", "low"]},
+        "vulnerability_type": _NAME,
+        "difficulty_tier": {"type": "integer", "minimum": 1},
+        "context_level": {
+            "type": "string",
+            "enum": ["single_file", "multi_file", "cross_contract"],
+        },
+        "finding_title": _TEXT,
+        "finding_description": _TEXT,
+        "attack_scenario": _TEXT,
+        "fix_description": _TEXT,
+        "primary_file": {
+            "type": "object",
+            "properties": {
+                **_FILE,
+                "vulnerable_lines": {
+                    "type": "array",
+                    "items": {"type": "integer", "minimum": 1},
+                },
+                "vulnerable_functions": {"type": "array", "items": _TEXT},
+            },
+            "required": ["path", "content", "vulnerable_lines", "vulnerable_functions"],
+            "additionalProperties": False,
+        },
+        "context_files": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {**_FILE, "relevance": {"type": "string"}},
+                "required": ["path", "content"],
+                "additionalProperties": False,
+            },
+        },
+        "call_flow": {"type": "string"},
+        "context_hint": {"type": "string"},
+        "is_vulnerable": {"type": "boolean"},
+    },
+    # Every field but ``source_report``, which some reports do not name.
+    "required": [
+        "id", "subset", "language", "chain", "source_platform",
+        "source_finding_id", "report_url", "github_repo_url", "contest_date",
+        "severity", "vulnerability_type", "difficulty_tier", "context_level",
+        "finding_title", "finding_description", "attack_scenario",
+        "fix_description", "primary_file", "context_files", "call_flow",
+        "context_hint", "is_vulnerable",
+    ],
+    "additionalProperties": False,
+}  # fmt: skip
+
+#: ``type`` name -> the test the generated code applies to ``{}``.
+_TYPE_TESTS = {
+    "string": "type({}) is str",
+    "integer": "type({}) is int",
+    "number": "type({}) in (int, float)",
+    "boolean": "type({}) is bool",
+    "object": "type({}) is dict",
+    "array": "type({}) is list",
+    "null": "{} is None",
+}
+_KEYWORDS = {
+    "type",
+    "properties",
+    "required",
+    "additionalProperties",
+    "items",
+    "enum",
+    "pattern",
+    "minLength",
+    "minimum",
+    "maximum",
+}
+_JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    dict: "object",
+    list: "array",
+    type(None): "null",
+}
+_BOUNDS = (("minimum", "<", "below"), ("maximum", ">", "above"))
+_MISSING = object()
+
+#: A compiled validator: value -> ``(pointer, code, message)`` per problem.
+Validator = Callable[[Any], "list[tuple[str, str, str]]"]
+
+
+def _kind(value: Any) -> str:
+    return _JSON_TYPES.get(type(value), type(value).__name__)
+
+
+def _escape(key: str) -> str:
+    """One JSON pointer reference token (RFC 6901)."""
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+class _Compiler:
+    """Generates the source of a validator, one schema node at a time.
+
+    A pointer is carried as the inside of an f-string: static keys are
+    escaped once here, and array indexes are ``{i<n>}`` placeholders, so the
+    pointer string is only built when a problem is reported.
+    """
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self.constants: dict[str, Any] = {}
+        self._names = 0
+
+    def name(self, prefix: str) -> str:
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def constant(self, value: Any) -> str:
+        name = self.name("_k")
+        self.constants[name] = value
+        return name
+
+    def emit(self, depth: int, line: str) -> None:
+        self.lines.append("    " * depth + line)
+
+    def report(self, depth: int, pointer: str, code: str, message: str) -> None:
+        self.emit(depth, f'errors.append((f"{pointer}", {code!r}, {message}))')
+
+    def node(self, schema: dict, value: str, pointer: str, depth: int) -> None:
+        unknown = schema.keys() - _KEYWORDS
+        if unknown:
+            raise ValueError(f"unsupported schema keywords: {sorted(unknown)}")
+        kind = schema.get("type")
+        if kind not in _TYPE_TESTS:
+            raise ValueError(f"every schema node needs a type, got {kind!r}")
+        self.emit(depth, f"if not {_TYPE_TESTS[kind].format(value)}:")
+        self.report(
+            depth + 1, pointer, "type", f'f"expected {kind}, got {{_kind({value})}}"'
+        )
+        start = len(self.lines)
+        self.emit(depth, "else:")
+        depth += 1
+        if "enum" in schema:
+            choices = tuple(schema["enum"])
+            self.emit(depth, f"if {value} not in {self.constant(choices)}:")
+            listed = ", ".join(map(str, choices))
+            self.report(
+                depth + 1, pointer, "enum", f'f"{{{value}!r}} is not one of {listed}"'
+            )
+        if "pattern" in schema:
+            regex = self.constant(re.compile(schema["pattern"]))
+            self.emit(depth, f"if not {regex}.search({value}):")
+            self.report(
+                depth + 1,
+                pointer,
+                "pattern",
+                f'f"{{{value}!r}} does not match " + {regex}.pattern',
+            )
+        if "minLength" in schema:
+            shortest = int(schema["minLength"])
+            self.emit(depth, f"if len({value}) < {shortest}:")
+            message = "empty" if shortest == 1 else f"under {shortest} characters"
+            self.report(depth + 1, pointer, "length", repr(message))
+        for keyword, operator, side in _BOUNDS:
+            if keyword in schema:
+                bound = schema[keyword]
+                self.emit(depth, f"if {value} {operator} {bound!r}:")
+                self.report(
+                    depth + 1,
+                    pointer,
+                    "range",
+                    f'f"{{{value}}} is {side} the {keyword} of {bound}"',
+                )
+        if kind == "object":
+            self.properties(schema, value, pointer, depth)
+        if kind == "array" and "items" in schema:
+            index = self.name("i")
+            item = self.name("v")
+            self.emit(depth, f"for {index}, {item} in enumerate({value}):")
+            self.node(schema["items"], item, f"{pointer}/{{{index}}}", depth + 1)
+        if len(self.lines) == start + 1:
+            # Nothing beyond the type test.
+            del self.lines[start:]
+
+    def properties(self, schema: dict, value: str, pointer: str, depth: int) -> None:
+        properties = schema.get("properties", {})
+        required = set(schema.get("required", ()))
+        for key in required - properties.keys():
+            raise ValueError(f"required field {key!r} has no schema")
+        for key, subschema in properties.items():
+            child = self.name("v")
+            token = _escape(key).replace("{", "{{").replace("}", "}}")
+            self.emit(depth, f"{child} = {value}.get({key!r}, _MISSING)")
+            if key in required:
+                self.emit(depth, f"if {child} is _MISSING:")
+                self.report(
+                    depth + 1, f"{pointer}/{token}", "missing", '"field is missing"'
+                )
+                self.emit(depth, "else:")
+            else:
+                self.emit(depth, f"if {child} is not _MISSING:")
+            self.node(subschema, child, f"{pointer}/{token}", depth + 1)
+        if schema.get("additionalProperties", True) is False:
+            known = self.constant(frozenset(properties))
+            extra = self.name("k")
+            self.emit(depth, f"for {extra} in sorted({value}.keys() - {known}):")
+            self.report(
+                depth + 1,
+                f"{pointer}/{{_escape({extra})}}",
+                "unknown-field",
+                '"field is not in the schema"',
+            )
+
+
+def schema_source(schema: dict) -> tuple[str, dict[str, Any]]:
+    """The source of the validator of ``schema`` and the constants it uses."""
+    compiler = _Compiler()
+    compiler.emit(0, "def validate(v0):")
+    compiler.emit(1, "errors = []")
+    compiler.node(schema, "v0", "", 1)
+    compiler.emit(1, "return errors")
+    return "\n".join(compiler.lines) + "\n", compiler.constants
+
+
+def compile_schema(schema: dict) -> Validator:
+    """Compile ``schema`` into a function listing the problems of a value."""
+    source, constants = schema_source(schema)
+    namespace = {"_MISSING": _MISSING, "_kind": _kind, "_escape": _escape, **constants}
+    exec(compile(source, "<schema>", "exec"), namespace)
+    return namespace["validate"]
+
+
+validate_record = compile_schema(RECORD)
+
+
+def check_record(record: dict, label: str = "") -> list[Issue]:
+    """Schema problems of one record; ``label`` names records without an id."""
+    record_id = record.get("id")
+    if not isinstance(record_id, str):
+        record_id = label
+    return [
+        Issue(record_id, pointer, code, "error", message)
+        for pointer, code, message in validate_record(record)
+    ]
+
+
+@dataclass(frozen=True)
+class FileReport:
+    """The outcome of validating one finding file."""
+
+    path: str
+    records: int
+    ids: tuple[str, ...]
+    issues: tuple[Issue, ...]
+    #: Records the loader could not decode, as ``path:line:column: message``.
+    malformed: tuple[str, ...]
+
+
+def validate_file(path: Path | str) -> FileReport:
+    malformed: list[LoadError] = []
+    ids: list[str] = []
+    issues: list[Issue] = []
+    records = 0
+    for records, record in enumerate(iter_file(path, malformed.append), 1):
+        issues.extend(check_record(record, f"<record {records}>"))
+        if isinstance(record.get("id"), str):
+            ids.append(record["id"])
+    return FileReport(
+        str(path), records, tuple(ids), tuple(issues), tuple(map(str, malformed))
+    )
+
+
+def validate_files(
+    paths: Iterable[Path | str] | None = None, workers: int | None = None
+) -> list[FileReport]:
+    """Validate finding files in parallel, one file per task, in order."""
+    paths = list(finding_files() if paths is None else paths)
+    workers = min(workers or os.cpu_count() or 1, len(paths) or 1)
+    if workers == 1:
+        return [validate_file(path) for path in paths]
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(validate_file, paths))
+
+
+def duplicate_ids(reports: Iterable[FileReport]) -> list[Issue]:
+    """An issue for every repeated use of a record id, across all files."""
+    seen: dict[str, str] = {}
+    issues = []
+    for report in reports:
+        for record_id in report.ids:
+            if record_id in seen:
+                message = f"id already used in {seen[record_id]}"
+                issues.append(Issue(record_id, "/id", "duplicate-id", "error", message))
+            else:
+                seen[record_id] = report.path
+    return issues
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    usage = "usage: schema [FILES...] [--workers N] [--json] | schema --source"
+    workers = None
+    if "--workers" in argv:
+        i = argv.index("--workers")
+        try:
+            workers = int(argv[i + 1])
+        except (IndexError, ValueError):
+            print(usage, file=sys.stderr)
+            return 2
+        del argv[i : i + 2]
+    flags = {flag: flag in argv for flag in ("--json", "--source")}
+    argv = [arg for arg in argv if arg not in flags]
+    if any(arg.startswith("-") for arg in argv):
+        print(usage, file=sys.stderr)
+        return 2
+    if flags["--source"]:
+        print(schema_source(RECORD)[0], end="")
+        return 0
+    reports = validate_files([Path(p) for p in argv] or None, workers)
+    duplicates = duplicate_ids(reports)
+    records = sum(report.records for report in reports)
+    errors = sum(len(report.issues) for report in reports) + len(duplicates)
+    malformed = sum(len(report.malformed) for report in reports)
+    if flags["--json"]:
+        data = {
+            "records": records,
+            "errors": errors,
+            "malformed": malformed,
+            "files": [
+                {
+                    "path": report.path,
+                    "records": report.records,
+                    "malformed": list(report.malformed),
+                    "issues": [asdict(issue) for issue in report.issues],
+                }
+                for report in reports
+            ],
+            "duplicates": [asdict(issue) for issue in duplicates],
+        }
+        print(json.dumps(data, indent=2))
+    else:
+        for report in reports:
+            for line in report.malformed:
+                print(f"malformed: {line}")
+            for issue in report.issues:
+                print(
+                    f"{report.path}: {issue.record_id}#{issue.field}: "
+                    f"{issue.message} [{issue.code}]"
+                )
+        for issue in duplicates:
+            print(f"{issue.record_id}#{issue.field}: {issue.message} [{issue.code}]")
+    print(
+        f"{records} records in {len(reports)} files: {errors} schema errors, "
+        f"{malformed} malformed",
+        file=sys.stderr,
+    )
+    return 1 if errors or malformed else 0
@@ -0,0 +1,433 @@
+"""Automatic grading of audit reports against the finding ground truth.
+
+Every prompt asks for a SECURITY AUDIT REPORT with the sections
+VULNERABILITY IDENTIFICATION, IMPACT ANALYSIS and RECOMMENDED REMEDIATION.
+:func:`parse_report` splits a response into those sections and tolerates
+markdown headings, bold text, numbering and missing sections.  Each section
+is then matched against the record it was generated from (:class:`Truth`):
+
+* identification: the content words of ``finding_title`` and
+  ``finding_description`` (3 points),
+* impact: the content words of ``attack_scenario`` (2 points),
+* remediation: the content words of ``fix_description`` (2 points),
+* functions: share of ``vulnerable_functions`` named (2 points),
+* lines: F1 of the cited lines against ``vulnerable_lines``, with a
+  tolerance of :data:`LINE_SLACK` lines (1 point); citing more than
+  :data:`MAX_CITED` lines earns nothing.
+
+Words are compared with an F-measure.  A recall of :data:`FULL_RECALL` or
+more counts as complete, because a correct report rarely repeats the
+write-up word for word.  A precision of :data:`FULL_PRECISION` or more
+counts as exact, so padding a section with unrelated words costs marks.
+Fenced blocks and code lines (comments, function headers, statements and
+block edges) are stripped first (:func:`strip_code`), so code pasted back
+earns nothing; indented prose is kept.  A response that only echoes the
+primary file or the prompt averages under half a point on the shipped corpus,
+while one restating the write-up scores close to 10.
+
+When a record lacks a component, for example a fix given as "No mitigation
+provided", that component's points are shared among the others.  The total
+runs from 0 to 10, the axis of the ``Task-*/results.svg`` charts.
+
+Scoring works on batches.  Ground truth is tokenised once per record.
+Each distinct response in a batch is graded once.  Batches are spread over
+worker processes.
+
+Run ``python -m blockbench score [RESULTS] [--out FILE] [--workers N]`` on
+the output of ``evaluate``.  Only responses to generated
+prompts (``RECORD_ID/L<level>``) can be graded; the hand-written ``Task-*``
+prompts have no finding records.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .loader import iter_records
+from .paths import cache_dir
+from .pool import bounded_map
+
+SECTIONS = ("identification", "impact", "remediation")
+HEADINGS = {
+    "identification": "VULNERABILITY IDENTIFICATION",
+    "impact": "IMPACT ANALYSIS",
+    "remediation": "RECOMMENDED REMEDIATION",
+}
+#: Points per component; they add up to 10.
+WEIGHTS = {
+    "identification": 3.0,
+    "impact": 2.0,
+    "remediation": 2.0,
+    "functions": 2.0,
+    "lines": 1.0,
+}
+FULL_RECALL = 0.6
+#: Share of a section's content words that must come from the truth for
+#: full marks; longer, padded sections earn less.
+FULL_PRECISION = 0.25
+LINE_SLACK = 2
+#: Citing more lines than this, or than three times the vulnerable lines,
+#: earns no line credit.
+MAX_CITED = 40
+#: Longest cited range that is expanded into single lines.
+MAX_RANGE = 200
+BATCH = 2000
+
+_WORD = re.compile(r"[a-z0-9_]+")
+_IDENT = re.compile(r"[A-Za-z_$][\w$]*")
+_HEADING = re.compile(
+    r"^[\s#*_>\-\d.)]*(VULNERABILITY\s+IDENTIFICATION|IMPACT\s+ANALYSIS|"
+    r"RECOMMENDED\s+REMEDIATION)\b[\s*_:]*",
+    re.IGNORECASE | re.MULTILINE,
+)
+_LINE_REF = re.compile(
+    r"\b(?:[Ll]ines?|LINES?|L)\s*#?(\d+)(?:\s*(?:-|–|to)\s*L?(\d+))?"
+)
+_FENCE = re.compile(
+    r"^[ \t]*(```|~~~).*?(?:^[ \t]*\1[^\n]*$|\Z)", re.MULTILINE | re.DOTALL
+)
+# Lines only code has: comments ("//", "/*", "*/", NatSpec "* @"), function
+# headers, and statements and blocks ending in ";", "{", "}" or "(" (perhaps
+# before a trailing comment).  Prose is kept however it is indented.
+_COMMENT_LINE = re.compile(r"[ \t]*(?://|/\*|\*/|\*[ \t]*@)")
+_CODE_LINE = re.compile(
+    _COMMENT_LINE.pattern
+    + r".*"
+    r"|[ \t]*(?:function|modifier|constructor|(?:pub(?:\([\w ]+\))?\s+)?fn)\b"
+    r"[\w$ ]*\(.*"
+    r"|.*[;{}(][ \t]*(?://.*)?\r?"
+)
+_NO_FIX = re.compile(r"^\s*no (?:mitigation|fix|remediation)\b", re.IGNORECASE)
+_STOPWORDS = frozenset(
+    """
+    a about above after again all also an and any are as at be because been
+    before being but by can could did do does doing down during each either
+    for from further had has have having here how if in into is it its itself
+    just may might more most must no not now of off on once only or other our
+    out over own same should so some such than that the their them then there
+    these they this those through to too under until up upon very was we were
+    what when where which while who whom why will with would you your
+    """.split()
+)
+
+
+def content_words(text: str) -> set[str]:
+    """Lower-case words of three or more characters, minus stopwords."""
+    words = set(_WORD.findall(text.lower()))
+    return {word for word in words if len(word) > 2} - _STOPWORDS
+
+
+def strip_code(text: str) -> str:
+    """``text`` without fenced blocks and code lines.
+
+    A code line that leaves a bracket open also takes the lines up to where
+    it closes (parameter lists, struct literals), or up to a blank line.
+    """
+    kept = []
+    depth = 0
+    for line in _FENCE.sub("", text).split("\n"):
+        if not line.strip():
+            depth = 0
+        elif depth or _CODE_LINE.fullmatch(line):
+            if not _COMMENT_LINE.match(line):
+                depth += sum(map(line.count, "([{")) - sum(map(line.count, ")]}"))
+                depth = max(depth, 0)
+            continue
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def parse_report(text: str) -> dict[str, str]:
+    """Split a response into :data:`SECTIONS`; missing sections are empty.
+
+    A response without any heading counts as one identification section.
+    """
+    sections = dict.fromkeys(SECTIONS, "")
+    matches = list(_HEADING.finditer(text))
+    if not matches:
+        sections["identification"] = text.strip()
+        return sections
+    for match, following in zip(matches, matches[1:] + [None]):
+        heading = " ".join(match.group(1).upper().split())
+        name = next(n for n, h in HEADINGS.items() if h == heading)
+        end = following.start() if following is not None else len(text)
+        body = text[match.end() : end].strip()
+        sections[name] = f"{sections[name]}\n{body}".strip()
+    return sections
+
+
+def cited_lines(text: str) -> set[int]:
+    lines: set[int] = set()
+    for match in _LINE_REF.finditer(text):
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if first <= last <= first + MAX_RANGE:
+            lines.update(range(first, last + 1))
+        else:
+            lines.add(first)
+    return lines
+
+
+@dataclass(frozen=True)
+class Truth:
+    """The gradeable facts of one finding record."""
+
+    record_id: str
+    identification: frozenset[str]
+    impact: frozenset[str]
+    remediation: frozenset[str]
+    functions: frozenset[str]
+    lines: frozenset[int]
+
+    @cached_property
+    def near_lines(self) -> frozenset[int]:
+        """``lines`` widened by :data:`LINE_SLACK` on either side."""
+        return frozenset(_widen(self.lines))
+
+    @classmethod
+    def of(cls, record: dict) -> "Truth":
+        primary = record.get("primary_file") or {}
+        fix = str(record.get("fix_description") or "")
+        return cls(
+            str(record.get("id", "")),
+            frozenset(
+                content_words(
+                    f"{record.get('finding_title') or ''} "
+                    f"{record.get('finding_description') or ''}"
+                )
+            ),
+            frozenset(content_words(str(record.get("attack_scenario") or ""))),
+            frozenset() if _NO_FIX.match(fix) else frozenset(content_words(fix)),
+            frozenset(
+                str(f).rpartition(".")[2]
+                for f in primary.get("vulnerable_functions") or ()
+            ),
+            frozenset(
+                line
+                for line in primary.get("vulnerable_lines") or ()
+                if isinstance(line, int) and not isinstance(line, bool)
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class Score:
+    prompt_id: str
+    model: str
+    seed: int
+    record_id: str
+    level: int
+    score: float
+    identification: float
+    impact: float
+    remediation: float
+    functions: float
+    lines: float
+    # Set for jobs that failed or lost their response; the row scores 0 and
+    # is left out of the means and of ``stats ingest``.
+    error: str | None = None
+
+
+def _match(truth: frozenset[str], words: set[str]) -> float:
+    """F-measure of ``words`` against ``truth``, each side scaled to full."""
+    hits = len(truth & words)
+    if not hits:
+        return 0.0
+    recall = min(1.0, hits / len(truth) / FULL_RECALL)
+    precision = min(1.0, hits / len(words) / FULL_PRECISION)
+    return 2 * recall * precision / (recall + precision)
+
+
+def _widen(lines: Iterable[int]) -> set[int]:
+    return {n + d for n in lines for d in range(-LINE_SLACK, LINE_SLACK + 1)}
+
+
+def _line_f1(truth: Truth, cited: set[int]) -> float:
+    if not cited or len(cited) > max(MAX_CITED, 3 * len(truth.lines)):
+        return 0.0
+    precision = len(cited & truth.near_lines) / len(cited)
+    recall = len(truth.lines & _widen(cited)) / len(truth.lines)
+    if not precision or not recall:
+        return 0.0
+    return 2 * precision * recall / (precision + recall)
+
+
+def grade(response: str, truth: Truth) -> dict[str, float | None]:
+    """Component scores in 0..1 (``None`` where the truth is missing)."""
+    # Code pasted back is not analysis: names and words only count in prose.
+    sections = parse_report(strip_code(response))
+    words = {name: content_words(body) for name, body in sections.items()}
+    everything = set().union(*words.values())
+    prose = "\n".join(sections.values())
+    parts: dict[str, float | None] = {}
+    for name in SECTIONS:
+        expected = getattr(truth, name)
+        # Credit words that landed in a neighbouring section at half weight.
+        parts[name] = (
+            max(_match(expected, words[name]), _match(expected, everything) / 2)
+            if expected
+            else None
+        )
+    parts["functions"] = (
+        len(truth.functions.intersection(_IDENT.findall(prose)))
+        / len(truth.functions)
+        if truth.functions
+        else None
+    )
+    parts["lines"] = (
+        _line_f1(truth, cited_lines(prose)) if truth.lines else None
+    )
+    return parts
+
+
+def total(parts: dict[str, float | None]) -> float:
+    """Weighted 0-10 total; missing components share out their points."""
+    present = {n: WEIGHTS[n] for n, part in parts.items() if part is not None}
+    if not present:
+        return 0.0
+    scale = sum(WEIGHTS.values()) / sum(present.values())
+    points = sum(parts[name] * weight * scale for name, weight in present.items())
+    return round(points, 2)
+
+
+def _split_prompt_id(prompt_id: str) -> tuple[str, int] | None:
+    """``"gs_x_H1/L2"`` -> ``("gs_x_H1", 2)``; ``None`` for task prompts."""
+    record_id, _, level = prompt_id.rpartition("/")
+    if not record_id or not re.fullmatch(r"L\d+", level):
+        return None
+    return record_id, int(level[1:])
+
+
+def score_batch(rows: list[dict], truths: dict[str, Truth]) -> list[Score]:
+    """Grade result rows (as written by ``evaluate``) that have ground truth."""
+    scores = []
+    # Low-temperature sweeps repeat responses across seeds; grade each once.
+    graded: dict[tuple[str, str], dict[str, float | None]] = {}
+    for row in rows:
+        parsed = _split_prompt_id(str(row.get("prompt_id", "")))
+        if parsed is None or parsed[0] not in truths:
+            continue
+        record_id, level = parsed
+        response = row.get("response")
+        error = None
+        if response is None:
+            parts = {name: 0.0 for name in WEIGHTS}
+            error = str(row.get("error") or "no response")
+        else:
+            key = (record_id, str(response))
+            parts = graded.get(key)
+            if parts is None:
+                parts = graded[key] = grade(key[1], truths[record_id])
+        scores.append(
+            Score(
+                row["prompt_id"],
+                str(row.get("model", "")),
+                int(row.get("seed", 0)),
+                record_id,
+                level,
+                total(parts),
+                *(round(parts[name] or 0.0, 3) for name in WEIGHTS),
+                error,
+            )
+        )
+    return scores
+
+
+# Each worker process receives the truths once, from its initializer, rather
+# than with every batch.
+_truths: dict[str, Truth] = {}
+
+
+def _share_truths(truths: dict[str, Truth]) -> None:
+    global _truths
+    _truths = truths
+
+
+def _score_shared(rows: list[dict]) -> list[Score]:
+    return score_batch(rows, _truths)
+
+
+def _batches(rows: Iterable[dict]) -> Iterator[list[dict]]:
+    batch: list[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def score_results(
+    rows: Iterable[dict],
+    truths: dict[str, Truth] | None = None,
+    workers: int | None = None,
+) -> Iterator[Score]:
+    """Grade result rows in batches spread over worker processes."""
+    if truths is None:
+        truths = {
+            truth.record_id: truth
+            for truth in map(Truth.of, iter_records(on_error=lambda error: None))
+        }
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for batch in _batches(rows):
+            yield from score_batch(batch, truths)
+        return
+    with ProcessPoolExecutor(
+        workers, initializer=_share_truths, initargs=(truths,)
+    ) as executor:
+        for scores in bounded_map(
+            executor, _score_shared, _batches(rows), window=workers * 2
+        ):
+            yield from scores
+
+
+def read_results(path: Path | str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    usage = "usage: score [RESULTS] [--out FILE] [--workers N]"
+    options = {"--out": None, "--workers": None}
+    for name in options:
+        if name in argv:
+            i = argv.index(name)
+            if i + 1 == len(argv):
+                print(usage, file=sys.stderr)
+                return 2
+            options[name] = argv[i + 1]
+            del argv[i : i + 2]
+    if len(argv) > 1:
+        print(usage, file=sys.stderr)
+        return 2
+    results = Path(argv[0] if argv else cache_dir() / "runs" / "results.jsonl")
+    out = Path(options["--out"] or results.with_name("scores.jsonl"))
+    workers = int(options["--workers"]) if options["--workers"] else None
+    by_model: dict[str, list[float]] = {}
+    failed = 0
+    with out.open("w", encoding="utf-8") as handle:
+        for score in score_results(read_results(results), workers=workers):
+            handle.write(json.dumps(asdict(score)) + "\n")
+            if score.error is not None:
+                failed += 1
+            else:
+                by_model.setdefault(score.model, []).append(score.score)
+    for model, values in sorted(by_model.items()):
+        print(f"{model}: {sum(values) / len(values):.2f} over {len(values)} responses")
+    print(f"{sum(map(len, by_model.values()))} responses scored -> {out}")
+    if failed:
+        print(f"{failed} failed jobs flagged, not scored")
+    return 0
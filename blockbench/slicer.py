@@ -0,0 +1,180 @@
+"""Function-level slicing of finding code.
+
+A finding's ``primary_file`` records ``vulnerable_lines`` and
+``vulnerable_functions``, yet prompts used to carry the whole file.
+:func:`slice_code` keeps only
+
+* the functions enclosing a vulnerable line or named as vulnerable,
+* the modifiers those functions apply,
+* the state variables, events, errors, structs and enums they reference,
+* the pragma, and the header and closing brace of each enclosing contract,
+
+in original order, with ``// ...`` marking the gaps.  The result keeps a line
+map so every excerpt line can be traced back to the original file.
+
+Run ``python -m blockbench slice RECORD_ID`` to print a record's slice with
+original line numbers in the margin.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+from dataclasses import dataclass, field
+
+from .languages import CALLABLES, CONTAINERS, detect_language, identifiers, outline
+from .lines import LineTable
+from .loader import iter_records
+from .solidity import Declaration, enclosing, header_modifiers
+
+_LINES = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+$")
+_REFERENCED = frozenset(
+    {"variable", "event", "error", "struct", "enum", "type", "const", "static"}
+)
+GAP = "// ..."
+
+
+def split_lines(text: str) -> list[str]:
+    """Lines of ``text`` without terminators, treating CR, LF, CRLF alike."""
+    return [m.group().rstrip("\r\n") for m in _LINES.finditer(text) if m.group()]
+
+
+@dataclass
+class Slice:
+    """An excerpt of a file plus the original line of each excerpt line."""
+
+    path: str
+    text: str
+    line_map: list[int | None] = field(default_factory=list)
+    functions: list[str] = field(default_factory=list)
+
+    def original_line(self, line: int) -> int | None:
+        """Original 1-based line of excerpt line ``line`` (None for gaps)."""
+        if 1 <= line <= len(self.line_map):
+            return self.line_map[line - 1]
+        return None
+
+    def annotated(self) -> str:
+        """The excerpt with original line numbers in a left margin."""
+        rows = []
+        for number, line in zip(self.line_map, self.text.split("\n")):
+            margin = f"{number:>5}" if number is not None else "     "
+            rows.append(f"{margin} | {line}")
+        return "\n".join(rows)
+
+
+def _span(decl: Declaration) -> range:
+    return range(decl.start_line, decl.end_line + 1)
+
+
+def slice_code(
+    text: str,
+    lines: list[int] | tuple[int, ...] = (),
+    functions: list[str] | tuple[str, ...] = (),
+    path: str = "",
+    decls: list[Declaration] | None = None,
+) -> Slice:
+    """Cut the minimal excerpt of ``text`` covering ``lines`` and ``functions``.
+
+    ``functions`` may be bare names or ``Contract.name``.  The slice is
+    empty when none of them can be located in ``text``.  The language is
+    detected from the content (see :mod:`.languages`).
+    """
+    language = detect_language(text, path)
+    decls = outline(text, path, language) if decls is None else decls
+    table = LineTable.for_text(text)
+    wanted_names = {str(f).rpartition(".")[2] for f in functions}
+    callables = [d for d in decls if d.kind in CALLABLES]
+
+    selected: list[Declaration] = [d for d in callables if d.name in wanted_names]
+    loose_lines: set[int] = set()
+    for line in lines:
+        if line not in table:
+            continue
+        owner = enclosing(callables, line)
+        if owner is None:
+            owner = enclosing([d for d in decls if d.kind not in CONTAINERS], line)
+        if owner is None:
+            loose_lines.add(line)
+        elif owner not in selected:
+            selected.append(owner)
+    if not selected and not loose_lines:
+        return Slice(path, "")
+
+    # Pull in modifiers applied by the selected callables, then everything the
+    # selection references, until nothing new is added.
+    modifiers = {d.name: d for d in callables if d.kind == "modifier"}
+    referenced = {d.name: d for d in decls if d.kind in _REFERENCED}
+    pending = list(selected)
+    while pending:
+        decl = pending.pop()
+        names = identifiers(text, decl.start, decl.end, language)
+        if decl.kind in CALLABLES and language == "solidity":
+            names.update(header_modifiers(text, decl))
+        for name in names:
+            extra = modifiers.get(name) or referenced.get(name)
+            if extra is not None and extra not in selected:
+                selected.append(extra)
+                pending.append(extra)
+
+    keep: set[int] = set(loose_lines)
+    for decl in selected:
+        keep.update(_span(decl))
+    for decl in decls:
+        if decl.kind == "pragma":
+            keep.update(_span(decl))
+    containers = [d for d in decls if d.kind in CONTAINERS]
+    for decl in selected:
+        # Every container enclosing the declaration, matched by offsets since
+        # names repeat (several ``impl`` blocks for one Rust type).
+        for container in containers:
+            if not container.start < decl.start < container.end:
+                continue
+            header_end = container.start_line
+            if container.body is not None:
+                header_end = max(header_end, table.line_of(container.body[0]))
+            keep.update(range(container.start_line, header_end + 1))
+            keep.add(container.end_line)
+
+    out: list[str] = []
+    line_map: list[int | None] = []
+    previous = 0
+    for number in sorted(n for n in keep if n in table):
+        line = table.line(number)
+        if previous and number > previous + 1:
+            indent = re.match(r"\s*", line).group()
+            out.append(indent + GAP)
+            line_map.append(None)
+        out.append(line)
+        line_map.append(number)
+        previous = number
+    names = [d.qualified_name for d in selected if d.kind in CALLABLES]
+    return Slice(path, "\n".join(out), line_map, names)
+
+
+def slice_record(record: dict) -> Slice:
+    """Slice a record's ``primary_file`` around its vulnerable code."""
+    primary = record.get("primary_file") or {}
+    return slice_code(
+        str(primary.get("content") or ""),
+        primary.get("vulnerable_lines") or (),
+        primary.get("vulnerable_functions") or (),
+        str(primary.get("path", "")),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: slice RECORD_ID", file=sys.stderr)
+        return 2
+    for record in iter_records():
+        if record.get("id") == argv[0]:
+            result = slice_record(record)
+            content = str(record["primary_file"].get("content", ""))
+            total = LineTable.for_text(content).count
+            print(f"// {result.path}: {len(result.line_map)} of {total} lines")
+            print(result.annotated())
+            return 0
+    print(f"no record with id {argv[0]!r}", file=sys.stderr)
+    return 1
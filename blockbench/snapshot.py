@@ -0,0 +1,497 @@
+"""Compiled, memory-mapped snapshot of the finding corpus.
+
+Parsing the pretty-printed JSON on every run is wasteful when most tools only
+filter on a few metadata fields.  A snapshot stores the shared record schema
+column by column:
+
+* categorical fields (``severity``, ``vulnerability_type`` ...) as ``uint32``
+  dictionary codes,
+* ``difficulty_tier`` and ``is_vulnerable`` as fixed-width integers,
+* prose fields as ``(offset, length)`` spans into a string heap,
+* ``primary_file``/``context_files`` as JSON in the heap whose ``content`` is
+  replaced by a span, with every distinct code body written only once.
+
+The file is opened with :mod:`mmap`, so :meth:`Snapshot.where` filters on the
+integer columns without decoding any text, and a code body is only read when
+:meth:`Snapshot.record` or :meth:`Snapshot.file_content` touches it.
+
+File layout (all integers native-endian, blocks 8-byte aligned)::
+
+    b"BBSNAP01" | u64 header length | JSON header | column blocks | heap
+
+Run ``python -m blockbench snapshot build`` to compile the corpus and
+``python -m blockbench snapshot query severity=medium`` to filter it.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from .blobs import blob_digest
+from .loader import ErrorHandler, iter_records
+from .paths import cache_dir
+
+MAGIC = b"BBSNAP01"
+VERSION = 1
+
+CATEGORICAL = "cat"
+INTEGER = "int"
+BOOLEAN = "bool"
+STRING = "str"
+JSON = "json"
+
+#: Column kind for every field of the shared record schema, in record order.
+#: Fields not listed here are stored as JSON columns.
+SCHEMA: dict[str, str] = {
+    "id": STRING,
+    "subset": CATEGORICAL,
+    "language": CATEGORICAL,
+    "chain": CATEGORICAL,
+    "source_platform": CATEGORICAL,
+    "source_report": CATEGORICAL,
+    "source_finding_id": STRING,
+    "report_url": STRING,
+    "github_repo_url": STRING,
+    "contest_date": CATEGORICAL,
+    "severity": CATEGORICAL,
+    "vulnerability_type": CATEGORICAL,
+    "difficulty_tier": INTEGER,
+    "context_level": CATEGORICAL,
+    "finding_title": STRING,
+    "finding_description": STRING,
+    "attack_scenario": STRING,
+    "fix_description": STRING,
+    "primary_file": JSON,
+    "context_files": JSON,
+    "call_flow": STRING,
+    "context_hint": STRING,
+    "is_vulnerable": BOOLEAN,
+}
+
+_TYPECODES = {CATEGORICAL: "I", INTEGER: "i", BOOLEAN: "b", STRING: "Q", JSON: "Q"}
+_NULL_CODE = 0xFFFFFFFF
+_NULL_INT = -(2**31)
+_NULL_BOOL = -1
+_NULL_SPAN = 0xFFFFFFFFFFFFFFFF
+# Fields absent from a record (as opposed to explicit nulls) use the sentinel
+# one past the null value, or a null span of length one.
+_MISSING = {
+    CATEGORICAL: _NULL_CODE - 1,
+    INTEGER: _NULL_INT + 1,
+    BOOLEAN: _NULL_BOOL - 1,
+}
+
+
+def default_path() -> Path:
+    return cache_dir() / "corpus.snap"
+
+
+def _pad(fh, alignment: int = 8) -> None:
+    remainder = fh.tell() % alignment
+    if remainder:
+        fh.write(b"\0" * (alignment - remainder))
+
+
+class _HeapWriter:
+    """Append-only string heap spooled to a temporary file."""
+
+    def __init__(self) -> None:
+        self._fh = tempfile.TemporaryFile()
+        self._bodies: dict[str, tuple[int, int]] = {}
+        self.size = 0
+
+    def add(self, text: str) -> tuple[int, int]:
+        data = text.encode("utf-8")
+        offset = self.size
+        self._fh.write(data)
+        self.size += len(data)
+        return offset, len(data)
+
+    def add_body(self, text: str) -> tuple[int, int]:
+        """Add a code body, reusing the span of an identical earlier body."""
+        digest = blob_digest(text)
+        span = self._bodies.get(digest)
+        if span is None:
+            span = self._bodies[digest] = self.add(text)
+        return span
+
+    def copy_to(self, out) -> None:
+        self._fh.seek(0)
+        while chunk := self._fh.read(1 << 20):
+            out.write(chunk)
+        self._fh.close()
+
+
+def _file_entry(entry: Any, heap: _HeapWriter) -> Any:
+    if not isinstance(entry, dict) or not isinstance(entry.get("content"), str):
+        return entry
+    entry = dict(entry)
+    entry["content_span"] = list(heap.add_body(entry.pop("content")))
+    return entry
+
+
+def build_snapshot(
+    out_path: Path | str | None = None,
+    paths: Iterable[Path | str] | None = None,
+    on_error: ErrorHandler | None = None,
+) -> Path:
+    """Compile finding records into a snapshot file and return its path."""
+    out_path = Path(out_path) if out_path is not None else default_path()
+    kinds = dict(SCHEMA)
+    columns: dict[str, array] = {}
+    dictionaries: dict[str, dict[str, int]] = {}
+    heap = _HeapWriter()
+    rows = 0
+
+    def column(name: str) -> array:
+        if name not in columns:
+            kind = kinds.setdefault(name, JSON)
+            if kind in (STRING, JSON):
+                fill = [_NULL_SPAN, 1] * rows
+            else:
+                fill = [_MISSING[kind]] * rows
+            columns[name] = array(_TYPECODES[kind], fill)
+            if kind == CATEGORICAL:
+                dictionaries[name] = {}
+        return columns[name]
+
+    for name in SCHEMA:
+        column(name)
+
+    for record in iter_records(paths, on_error):
+        for name in record:
+            column(name)
+        for name, values in columns.items():
+            kind = kinds[name]
+            value = record.get(name)
+            if name not in record:
+                if kind in (STRING, JSON):
+                    values.extend((_NULL_SPAN, 1))
+                else:
+                    values.append(_MISSING[kind])
+            elif kind == CATEGORICAL:
+                if value is None:
+                    values.append(_NULL_CODE)
+                else:
+                    codes = dictionaries[name]
+                    values.append(codes.setdefault(str(value), len(codes)))
+            elif kind == INTEGER:
+                values.append(_NULL_INT if value is None else int(value))
+            elif kind == BOOLEAN:
+                values.append(_NULL_BOOL if value is None else int(bool(value)))
+            elif value is None:
+                values.extend((_NULL_SPAN, 0))
+            elif kind == STRING:
+                values.extend(heap.add(str(value)))
+            else:
+                if name == "primary_file":
+                    value = _file_entry(value, heap)
+                elif name == "context_files" and isinstance(value, list):
+                    value = [_file_entry(entry, heap) for entry in value]
+                values.extend(heap.add(json.dumps(value, ensure_ascii=False)))
+        rows += 1
+
+    header: dict[str, Any] = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "rows": rows,
+        "columns": [],
+    }
+    # Offsets depend on the header length, so lay the blocks out relative to
+    # the end of the header and fix them up once its size is known.
+    relative = 0
+    for name, values in columns.items():
+        entry: dict[str, Any] = {
+            "name": name,
+            "kind": kinds[name],
+            "offset": relative,
+        }
+        if name in dictionaries:
+            entry["dictionary"] = list(dictionaries[name])
+        header["columns"].append(entry)
+        relative += -(-len(values) * values.itemsize // 8) * 8
+    header["heap_size"] = heap.size
+
+    def encoded(base: int) -> bytes:
+        data = dict(header)
+        data["columns"] = [
+            dict(c, offset=c["offset"] + base) for c in header["columns"]
+        ]
+        data["heap_offset"] = base + relative
+        return json.dumps(data).encode("utf-8")
+
+    base = 0
+    while True:
+        blob = encoded(base)
+        start = len(MAGIC) + 8 + len(blob)
+        aligned = -(-start // 8) * 8
+        if aligned == base:
+            break
+        base = aligned
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_path.parent)
+    with os.fdopen(fd, "wb") as out:
+        out.write(MAGIC)
+        out.write(struct.pack("<Q", len(blob)))
+        out.write(blob)
+        for values in columns.values():
+            _pad(out)
+            values.tofile(out)
+        _pad(out)
+        heap.copy_to(out)
+    os.replace(tmp, out_path)
+    return out_path
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a compiled snapshot."""
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path) if path is not None else default_path()
+        with self.path.open("rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not a blockbench snapshot")
+        (length,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self._mmap[start : start + length])
+        if header["version"] != VERSION or header["byteorder"] != sys.byteorder:
+            self._mmap.close()
+            raise ValueError(f"{self.path} was written by an incompatible build")
+        self.rows: int = header["rows"]
+        self._heap = header["heap_offset"]
+        self._view = memoryview(self._mmap)
+        self._kinds: dict[str, str] = {}
+        self._columns: dict[str, memoryview] = {}
+        self._dictionaries: dict[str, list[str]] = {}
+        self._lookup: dict[str, dict[str, int]] = {}
+        for entry in header["columns"]:
+            name, kind = entry["name"], entry["kind"]
+            typecode = _TYPECODES[kind]
+            count = self.rows * (2 if kind in (STRING, JSON) else 1)
+            size = count * struct.calcsize(typecode)
+            raw = self._view[entry["offset"] : entry["offset"] + size]
+            self._kinds[name] = kind
+            self._columns[name] = raw.cast(typecode)
+            if kind == CATEGORICAL:
+                values = entry["dictionary"]
+                self._dictionaries[name] = values
+                self._lookup[name] = {value: i for i, value in enumerate(values)}
+
+    def close(self) -> None:
+        for view in self._columns.values():
+            view.release()
+        self._columns.clear()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._kinds)
+
+    def kind(self, name: str) -> str:
+        return self._kinds[name]
+
+    def categories(self, name: str) -> list[str]:
+        """Return the distinct values of a categorical column."""
+        return list(self._dictionaries[name])
+
+    def codes(self, name: str) -> memoryview:
+        """Return the raw fixed-width column (codes, integers or spans)."""
+        return self._columns[name]
+
+    def _text(self, offset: int, length: int) -> str:
+        start = self._heap + offset
+        return str(self._view[start : start + length], "utf-8")
+
+    def has(self, row: int, name: str) -> bool:
+        """Return whether the source record carried the field at all."""
+        kind = self._kinds[name]
+        values = self._columns[name]
+        if kind in (STRING, JSON):
+            return not (values[2 * row] == _NULL_SPAN and values[2 * row + 1] == 1)
+        return values[row] != _MISSING[kind]
+
+    def get(self, row: int, name: str) -> Any:
+        """Decode a single cell; absent fields and nulls both give ``None``."""
+        kind = self._kinds[name]
+        values = self._columns[name]
+        if kind == CATEGORICAL:
+            code = values[row]
+            if code >= _MISSING[kind]:
+                return None
+            return self._dictionaries[name][code]
+        if kind == INTEGER:
+            value = values[row]
+            return None if value <= _MISSING[kind] else value
+        if kind == BOOLEAN:
+            value = values[row]
+            return None if value < 0 else bool(value)
+        offset, length = values[2 * row], values[2 * row + 1]
+        if offset == _NULL_SPAN:
+            return None
+        text = self._text(offset, length)
+        return text if kind == STRING else json.loads(text)
+
+    def column(self, name: str) -> list[Any]:
+        """Decode a whole column."""
+        return [self.get(row, name) for row in range(self.rows)]
+
+    def where(self, **criteria: Any) -> list[int]:
+        """Return the rows whose fields equal the given values.
+
+        A criterion may be a single value or a list/tuple/set of accepted
+        values.  Only fixed-width columns are consulted, so no text is read
+        for categorical, integer and boolean fields.
+        """
+        rows: Iterable[int] = range(self.rows)
+        for name, wanted in criteria.items():
+            if isinstance(wanted, (list, tuple, set, frozenset)):
+                accepted = wanted
+            else:
+                accepted = [wanted]
+            kind = self._kinds[name]
+            values = self._columns[name]
+            if kind == CATEGORICAL:
+                lookup = self._lookup[name]
+                codes = {lookup[str(v)] for v in accepted if str(v) in lookup}
+            elif kind == INTEGER:
+                codes = {int(v) for v in accepted}
+            elif kind == BOOLEAN:
+                codes = {int(bool(v)) for v in accepted}
+            else:
+                rows = [r for r in rows if self.get(r, name) in accepted]
+                continue
+            rows = [r for r in rows if values[r] in codes]
+        return list(rows)
+
+    def file_content(self, entry: dict) -> str:
+        """Return the body for a file entry produced with ``load_code=False``."""
+        return self._text(*entry["content_span"])
+
+    def record(self, row: int, load_code: bool = True) -> dict:
+        """Materialise one row as a finding dict.
+
+        With ``load_code=False`` file entries keep their ``content_span``
+        instead of the body; pass them to :meth:`file_content` on demand.
+        """
+        record = {}
+        for name in self._kinds:
+            if not self.has(row, name):
+                continue
+            value = self.get(row, name)
+            if load_code and name == "primary_file" and isinstance(value, dict):
+                value = self._inline(value)
+            elif load_code and name == "context_files" and isinstance(value, list):
+                value = [self._inline(entry) for entry in value]
+            record[name] = value
+        return record
+
+    def _inline(self, entry: Any) -> Any:
+        if not isinstance(entry, dict) or "content_span" not in entry:
+            return entry
+        result = {}
+        for key, value in entry.items():
+            if key == "content_span":
+                result["content"] = self._text(*value)
+            else:
+                result[key] = value
+        return result
+
+    def __iter__(self) -> Iterator[dict]:
+        for row in range(self.rows):
+            yield self.record(row)
+
+
+def _parse_criteria(args: list[str]) -> dict[str, Any]:
+    criteria: dict[str, Any] = {}
+    for arg in args:
+        name, equals, value = arg.partition("=")
+        if not equals:
+            raise ValueError(f"expected FIELD=VALUE, got {arg!r}")
+        values: list[Any] = value.split(",")
+        if SCHEMA.get(name) == INTEGER:
+            try:
+                values = [int(v) for v in values]
+            except ValueError:
+                raise ValueError(f"{name} takes integers, not {value!r}") from None
+        elif SCHEMA.get(name) == BOOLEAN:
+            values = [v.lower() in ("1", "true", "yes") for v in values]
+        criteria[name] = values
+    return criteria
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    usage = (
+        "usage: snapshot build [--out PATH] | "
+        "snapshot query [--out PATH] FIELD=VALUE[,VALUE]..."
+    )
+    if not argv or argv[0] not in ("build", "query"):
+        print(usage, file=sys.stderr)
+        return 2
+    out = None
+    args = argv[1:]
+    if "--out" in args:
+        i = args.index("--out")
+        if i + 1 == len(args):
+            print(usage, file=sys.stderr)
+            return 2
+        out = Path(args[i + 1])
+        del args[i : i + 2]
+    if argv[0] == "build":
+        errors: list = []
+        path = build_snapshot(out, on_error=errors.append)
+        for error in errors:
+            print(f"skipped: {error}", file=sys.stderr)
+        with Snapshot(path) as snap:
+            print(f"{path}: {len(snap)} records, {path.stat().st_size} bytes")
+        return 0
+    try:
+        criteria = _parse_criteria(args)
+    except ValueError as exc:
+        print(f"snapshot query: {exc}", file=sys.stderr)
+        return 2
+    try:
+        snap = Snapshot(out)
+    except FileNotFoundError:
+        path = out or default_path()
+        print(
+            f"snapshot query: no snapshot at {path}; run `snapshot build` first",
+            file=sys.stderr,
+        )
+        return 2
+    except ValueError as exc:
+        print(f"snapshot query: {exc}; run `snapshot build` again", file=sys.stderr)
+        return 2
+    with snap:
+        unknown = sorted(set(criteria) - set(snap.columns))
+        if unknown:
+            print(
+                f"snapshot query: unknown field {', '.join(unknown)}; "
+                f"fields are {', '.join(snap.columns)}",
+                file=sys.stderr,
+            )
+            return 2
+        for row in snap.where(**criteria):
+            print(snap.get(row, "id"))
+    return 0
@@ -0,0 +1,318 @@
+"""Tolerant Solidity lexer and declaration outline.
+
+Finding bodies range from whole files to pasted excerpts that start in the
+middle of a contract, so the outline never fails: it tracks brace depth over
+a token stream that skips comments and strings, and records the contracts,
+functions, modifiers and other declarations it can recognise together with
+their offsets and 1-based line ranges.
+
+:func:`outline` is the only declaration walker: :mod:`.parser` builds its
+cached AST from the same declarations, adding the details of each.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterator
+
+_TOKEN = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?)
+  | (?P<number>0[xX][0-9a-fA-F_]*|\d[\d_]*(?:\.\d+)?(?:[eE]-?\d+)?)
+  | (?P<ident>[A-Za-z_$][A-Za-z0-9_$]*)
+  | (?P<punct>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+CONTAINERS = frozenset({"contract", "interface", "library"})
+CALLABLES = frozenset(
+    {"function", "modifier", "constructor", "fallback", "receive"}
+)
+MEMBERS = frozenset({"event", "error", "struct", "enum", "using", "type"})
+
+#: Words that may appear in a function header without naming a modifier.
+HEADER_KEYWORDS = frozenset(
+    {
+        "public",
+        "external",
+        "internal",
+        "private",
+        "view",
+        "pure",
+        "payable",
+        "virtual",
+        "override",
+        "returns",
+        "memory",
+        "calldata",
+        "storage",
+        "immutable",
+        "constant",
+    }
+)
+# Statements at contract level that are not state variable declarations.
+_NOT_VARIABLES = frozenset({"if", "for", "while", "do", "return", "emit", "revert"})
+
+
+@dataclass(frozen=True)
+class Token:
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+def tokenize(text: str) -> Iterator[Token]:
+    """Yield significant tokens (no whitespace or comments)."""
+    for match in _TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind in ("ws", "comment"):
+            continue
+        yield Token(kind, match.group(), match.start(), match.end())
+
+
+@dataclass(frozen=True)
+class Declaration:
+    """A recognised declaration.
+
+    ``start``/``end`` are character offsets (``end`` exclusive) and
+    ``start_line``/``end_line`` are 1-based and inclusive.  ``body`` is the
+    offset range of the ``{...}`` block, if there is one.
+    """
+
+    kind: str
+    name: str
+    container: str | None
+    start: int
+    end: int
+    start_line: int
+    end_line: int
+    body: tuple[int, int] | None = None
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.container}.{self.name}" if self.container else self.name
+
+
+class LineIndex:
+    """Maps character offsets to 1-based line numbers."""
+
+    def __init__(self, text: str) -> None:
+        self.starts = [0] + [m.end() for m in _LINE_BREAK.finditer(text)]
+
+    def line(self, offset: int) -> int:
+        return bisect_right(self.starts, offset)
+
+
+def match_brace(tokens: list[Token], i: int) -> int:
+    """Index of the ``}`` closing the ``{`` at ``tokens[i]`` (or the last)."""
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j].value == "{":
+            depth += 1
+        elif tokens[j].value == "}":
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(tokens) - 1
+
+
+def statement_end(tokens: list[Token], i: int) -> tuple[int, int | None]:
+    """From ``tokens[i]``, find the end of a declaration.
+
+    Returns ``(last token index, index of the opening brace or None)``.
+    Parentheses are skipped so that ``;`` inside parameter lists is ignored.
+    """
+    parens = 0
+    for j in range(i, len(tokens)):
+        value = tokens[j].value
+        if value == "(":
+            parens += 1
+        elif value == ")":
+            parens = max(0, parens - 1)
+        elif parens == 0 and value == ";":
+            return j, None
+        elif parens == 0 and value == "{":
+            return match_brace(tokens, j), j
+        elif parens == 0 and value == "}":
+            return j - 1, None
+    return len(tokens) - 1, None
+
+
+def _variable_name(tokens: list[Token], first: int, last: int) -> str | None:
+    """Name of a ``Type [attributes] name [= value];`` declaration."""
+    name = None
+    depth = 0
+    for token in tokens[first:last]:
+        if token.value in "([":
+            depth += 1
+        elif token.value in ")]":
+            depth -= 1
+        elif depth == 0 and token.value == "=":
+            break
+        elif depth == 0 and token.kind == "ident":
+            name = token.value
+    if name in HEADER_KEYWORDS or name == tokens[first].value:
+        return None
+    return name
+
+
+def outline(text: str, tokens: list[Token] | None = None) -> list[Declaration]:
+    """Return the declarations of ``text`` in source order.
+
+    Containers (contracts, interfaces, libraries) come before their members.
+    Outside a container only ``constant`` variables are declarations; other
+    statements come from excerpts.  ``tokens`` may pass ``text`` already
+    lexed.
+    """
+    if tokens is None:
+        tokens = list(tokenize(text))
+    lines = LineIndex(text)
+    result: list[Declaration] = []
+
+    def declare(kind, name, container, first, last, brace) -> None:
+        last = max(first, last)
+        start, end = tokens[first].start, tokens[last].end
+        body = None
+        if brace is not None:
+            body = (tokens[brace].start, tokens[last].end)
+        result.append(
+            Declaration(
+                kind,
+                name,
+                container,
+                start,
+                end,
+                lines.line(start),
+                lines.line(max(start, end - 1)),
+                body,
+            )
+        )
+
+    def walk(i: int, stop: int, container: str | None) -> None:
+        while i <= stop:
+            token = tokens[i]
+            value = token.value
+            if token.kind != "ident":
+                i += 1
+                continue
+            first = i
+            following = tokens[i + 1] if i + 1 <= stop else None
+            if value == "abstract" and following and following.value == "contract":
+                i += 1
+                value = "contract"
+                following = tokens[i + 1] if i + 1 <= stop else None
+            if value in CONTAINERS and following and following.kind == "ident":
+                name = tokens[i + 1].value
+                last, brace = statement_end(tokens, i + 2)
+                declare(value, name, container, first, last, brace)
+                if brace is not None:
+                    walk(brace + 1, last - 1, name)
+                i = last + 1
+                continue
+            if value in CALLABLES:
+                name = value
+                if value in ("function", "modifier") and i + 1 <= stop:
+                    if tokens[i + 1].kind == "ident":
+                        name = tokens[i + 1].value
+                last, brace = statement_end(tokens, i + 1)
+                declare(value, name, container, first, min(last, stop), brace)
+                i = last + 1
+                continue
+            named = following is not None and following.kind == "ident"
+            if (value in MEMBERS and named) or value in ("pragma", "import"):
+                name = following.value if following is not None else value
+                last, brace = statement_end(tokens, i + 1)
+                last = min(last, stop)
+                declare(value, name, container, first, last, brace)
+                i = last + 1
+                continue
+            if container is not None and value not in _NOT_VARIABLES:
+                last, brace = statement_end(tokens, i)
+                last = min(last, stop)
+                if brace is None and tokens[last].value == ";":
+                    name = _variable_name(tokens, i, last)
+                    if name:
+                        declare("variable", name, container, first, last, None)
+                i = last + 1
+                continue
+            if container is None and (i == 0 or tokens[i - 1].value in ";{}"):
+                # A file-level constant; other statements are skipped a
+                # token at a time so declarations after them are still found.
+                last, brace = statement_end(tokens, i)
+                last = min(last, stop)
+                if brace is None and tokens[last].value == ";":
+                    constant = any(t.value == "constant" for t in tokens[i:last])
+                    name = _variable_name(tokens, i, last) if constant else None
+                    if name:
+                        declare("variable", name, container, first, last, None)
+                        i = last + 1
+                        continue
+            i += 1
+
+    if tokens:
+        walk(0, len(tokens) - 1, None)
+    return result
+
+
+def functions(text: str) -> list[Declaration]:
+    """Callable declarations (functions, modifiers, constructors ...)."""
+    return [d for d in outline(text) if d.kind in CALLABLES]
+
+
+def enclosing(declarations: list[Declaration], line: int) -> Declaration | None:
+    """The innermost declaration whose line range contains ``line``."""
+    best = None
+    for decl in declarations:
+        if decl.start_line <= line <= decl.end_line:
+            span = decl.end_line - decl.start_line
+            if best is None or span <= best.end_line - best.start_line:
+                best = decl
+    return best
+
+
+def identifiers(text: str, start: int = 0, end: int | None = None) -> set[str]:
+    """Identifiers used in ``text[start:end]`` (outside comments/strings)."""
+    return {
+        t.value for t in tokenize(text[start:end]) if t.kind == "ident"
+    }
+
+
+def header_modifiers(text: str, decl: Declaration) -> list[str]:
+    """Names of the modifiers a callable applies, e.g. ``onlyOwner``."""
+    end = decl.body[0] if decl.body is not None else decl.end
+    tokens = list(tokenize(text[decl.start : end]))
+    # Skip the keyword, the name and the parameter list.
+    i = 0
+    while i < len(tokens) and tokens[i].value != "(":
+        i += 1
+    depth = 0
+    for i in range(i, len(tokens)):
+        if tokens[i].value == "(":
+            depth += 1
+        elif tokens[i].value == ")":
+            depth -= 1
+            if depth == 0:
+                break
+    names = []
+    depth = 0
+    skip_args = False
+    for token in tokens[i + 1 :]:
+        if token.value == "(":
+            depth += 1
+        elif token.value == ")":
+            depth -= 1
+            if depth == 0:
+                skip_args = False
+        elif depth == 0 and token.kind == "ident":
+            if token.value == "returns":
+                skip_args = True
+            elif token.value not in HEADER_KEYWORDS and not skip_args:
+                names.append(token.value)
+    return names
@@ -0,0 +1,394 @@
+"""Results store and aggregate statistics over scored sweeps.
+
+:class:`ResultStore` keeps the scores written by ``score`` in SQLite, one
+row per (run, prompt, model, seed).  Each row also carries the
+``difficulty_tier``, ``vulnerability_type`` and ``severity`` of its finding
+record, so breakdowns need no join at query time.
+
+Statistics treat the finding record as the unit of analysis.  Seeds of one
+prompt are averaged first, then the prompts of one record (its levels, which
+share the code and the bug and so are not independent), and then records are
+resampled.  A prompt without a record, such as a hand-graded ``Task-*``
+prompt, is a unit of its own, and a breakdown by level keeps each level of a
+record apart:
+
+* :func:`summarize` gives the mean of a model with a percentile bootstrap
+  confidence interval, overall or per group (:func:`breakdown`),
+* :func:`compare` pairs two models on the records both answered.  It gives
+  a bootstrap confidence interval for the mean difference, a two-sided
+  bootstrap p-value and a paired sign-flip permutation p-value.
+
+With NumPy installed, resampling is done as chunked matrix operations, and
+10k resamples over 100k prompts take seconds.  Without NumPy the same
+statistics are computed in pure Python, which is fine for the size of the
+corpus shipped here.
+
+Run ``python -m blockbench stats ingest [SCORES] [--run NAME]``, then
+``stats summary [--run NAME] [--by FIELD]`` or
+``stats compare MODEL_A MODEL_B [--run NAME]``.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sqlite3
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from .loader import iter_records
+from .paths import cache_dir
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+RESAMPLES = 10_000
+CONFIDENCE = 0.95
+#: Fields a breakdown can group by.
+GROUPS = ("difficulty_tier", "vulnerability_type", "severity", "level")
+#: Resamples drawn per NumPy matrix; bounds memory to CHUNK x prompts.
+CHUNK = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    run TEXT NOT NULL,
+    prompt_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    record_id TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    score REAL NOT NULL,
+    difficulty_tier TEXT,
+    vulnerability_type TEXT,
+    severity TEXT,
+    PRIMARY KEY (run, prompt_id, model, seed)
+);
+CREATE INDEX IF NOT EXISTS scores_model ON scores (run, model);
+"""
+
+
+class ResultStore:
+    """Scored responses of every run, in SQLite (``None`` keeps it in memory)."""
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path) if self.path else ":memory:")
+        self._db.executescript(_SCHEMA)
+
+    @classmethod
+    def on_disk(cls) -> "ResultStore":
+        return cls(cache_dir() / "results.sqlite")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def add(
+        self, run: str, scores: Iterable[dict], records: dict[str, dict] | None = None
+    ) -> int:
+        """Insert score rows (as written by ``score``); returns the count.
+
+        Rows need ``prompt_id``, ``model`` and ``score``, so hand grades of
+        the ``Task-*`` prompts can be added too.  ``records`` maps record
+        ids to records for the breakdown fields and defaults to the loaded
+        corpus.  Rows flagged with an ``error`` (failed jobs) are skipped.
+        """
+        if records is None:
+            records = {
+                str(r.get("id")): r for r in iter_records(on_error=lambda error: None)
+            }
+
+        def rows():
+            for score in scores:
+                if score.get("error"):
+                    continue
+                record_id = str(score.get("record_id") or "")
+                record = records.get(record_id, {})
+                yield (
+                    run,
+                    score["prompt_id"],
+                    score["model"],
+                    int(score.get("seed") or 0),
+                    record_id,
+                    int(score.get("level") or 0),
+                    float(score["score"]),
+                    _text(record.get("difficulty_tier")),
+                    _text(record.get("vulnerability_type")),
+                    _text(record.get("severity")),
+                )
+
+        with self._db:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows(),
+            )
+            return self._db.total_changes - before
+
+    def drop(self, run: str) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM scores WHERE run = ?", (run,))
+
+    def runs(self) -> list[str]:
+        return [r[0] for r in self._db.execute("SELECT DISTINCT run FROM scores")]
+
+    def models(self, run: str) -> list[str]:
+        return [
+            r[0]
+            for r in self._db.execute(
+                "SELECT DISTINCT model FROM scores WHERE run = ? ORDER BY model",
+                (run,),
+            )
+        ]
+
+    def prompt_means(
+        self, run: str, model: str, group: str | None = None
+    ) -> dict[str, tuple[str, float]]:
+        """``prompt_id -> (group value, mean score over seeds)`` of a model."""
+        if group is not None and group not in GROUPS:
+            raise ValueError(f"cannot group by {group!r}; choose from {GROUPS}")
+        column = group or "''"
+        query = (
+            f"SELECT prompt_id, {column}, AVG(score) FROM scores "
+            "WHERE run = ? AND model = ? GROUP BY prompt_id"
+        )
+        return {
+            prompt: (str(value), mean)
+            for prompt, value, mean in self._db.execute(query, (run, model))
+        }
+
+    def record_means(
+        self, run: str, model: str, group: str | None = None
+    ) -> dict[tuple[str, str], float]:
+        """``(record id, group value) -> mean score`` of a model.
+
+        Seeds are averaged per prompt and prompts per record and group value;
+        a prompt without a record stands for itself.
+        """
+        if group is not None and group not in GROUPS:
+            raise ValueError(f"cannot group by {group!r}; choose from {GROUPS}")
+        column = group or "''"
+        query = (
+            "SELECT CASE record_id WHEN '' THEN prompt_id ELSE record_id END AS unit,"
+            " value, AVG(mean) FROM ("
+            f"SELECT prompt_id, record_id, {column} AS value, AVG(score) AS mean"
+            " FROM scores WHERE run = ? AND model = ? GROUP BY prompt_id"
+            ") GROUP BY unit, value"
+        )
+        return {
+            (unit, str(value)): mean
+            for unit, value, mean in self._db.execute(query, (run, model))
+        }
+
+
+def _text(value: object) -> str | None:
+    return None if value is None else str(value)
+
+
+@dataclass(frozen=True)
+class Summary:
+    n: int
+    mean: float
+    low: float
+    high: float
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """Paired comparison of model ``a`` against model ``b``."""
+
+    a: str
+    b: str
+    n: int
+    difference: float
+    low: float
+    high: float
+    p_bootstrap: float
+    p_permutation: float
+
+
+def _bootstrap_means(
+    values: Sequence[float], resamples: int, seed: int
+) -> list[float]:
+    """Means of ``resamples`` resamples (with replacement) of ``values``."""
+    n = len(values)
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        data = np.asarray(values, dtype=float)
+        means = []
+        for start in range(0, resamples, CHUNK):
+            size = min(CHUNK, resamples - start)
+            picks = rng.integers(0, n, size=(size, n))
+            means.append(data[picks].mean(axis=1))
+        return np.concatenate(means).tolist()
+    rng = random.Random(seed)
+    return [sum(rng.choices(values, k=n)) / n for _ in range(resamples)]
+
+
+def _sign_flip_means(
+    differences: Sequence[float], resamples: int, seed: int
+) -> list[float]:
+    """Means of ``differences`` with random signs: the null distribution."""
+    n = len(differences)
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        data = np.asarray(differences, dtype=float)
+        means = []
+        for start in range(0, resamples, CHUNK):
+            size = min(CHUNK, resamples - start)
+            signs = rng.integers(0, 2, size=(size, n)) * 2 - 1
+            means.append((signs * data).mean(axis=1))
+        return np.concatenate(means).tolist()
+    rng = random.Random(seed)
+    return [
+        sum(d if rng.random() < 0.5 else -d for d in differences) / n
+        for _ in range(resamples)
+    ]
+
+
+def _percentiles(samples: list[float], confidence: float) -> tuple[float, float]:
+    samples = sorted(samples)
+    tail = (1 - confidence) / 2
+    last = len(samples) - 1
+    return samples[round(tail * last)], samples[round((1 - tail) * last)]
+
+
+def summarize(
+    values: Sequence[float],
+    resamples: int = RESAMPLES,
+    confidence: float = CONFIDENCE,
+    seed: int = 0,
+) -> Summary:
+    """Mean of ``values`` with a percentile bootstrap interval."""
+    if not values:
+        return Summary(0, float("nan"), float("nan"), float("nan"))
+    mean = sum(values) / len(values)
+    low, high = _percentiles(_bootstrap_means(values, resamples, seed), confidence)
+    return Summary(len(values), mean, low, high)
+
+
+def breakdown(
+    store: ResultStore,
+    run: str,
+    group: str | None = None,
+    resamples: int = RESAMPLES,
+    confidence: float = CONFIDENCE,
+) -> dict[str, dict[str, Summary]]:
+    """``model -> group value -> Summary``; one ``""`` group without ``group``."""
+    table: dict[str, dict[str, Summary]] = {}
+    for model in store.models(run):
+        groups: dict[str, list[float]] = {}
+        for (_, value), mean in store.record_means(run, model, group).items():
+            groups.setdefault(value, []).append(mean)
+        table[model] = {
+            value: summarize(scores, resamples, confidence)
+            for value, scores in sorted(groups.items())
+        }
+    return table
+
+
+def compare(
+    store: ResultStore,
+    run: str,
+    a: str,
+    b: str,
+    resamples: int = RESAMPLES,
+    confidence: float = CONFIDENCE,
+    seed: int = 0,
+) -> Comparison:
+    """Paired bootstrap and permutation test of ``a - b`` over shared records.
+
+    ``n`` of the result is 0 when the models share no record.
+    """
+    first = store.record_means(run, a)
+    second = store.record_means(run, b)
+    shared = sorted(first.keys() & second.keys())
+    differences = [first[unit] - second[unit] for unit in shared]
+    if not differences:
+        nan = float("nan")
+        return Comparison(a, b, 0, nan, nan, nan, nan, nan)
+    n = len(differences)
+    observed = sum(differences) / n
+    boot = _bootstrap_means(differences, resamples, seed)
+    low, high = _percentiles(boot, confidence)
+    # Two-sided: how often the resampled difference lands on the other side
+    # of zero, doubled.
+    below = sum(d <= 0 for d in boot) / resamples
+    above = sum(d >= 0 for d in boot) / resamples
+    p_bootstrap = min(1.0, 2 * min(below, above))
+    null = _sign_flip_means(differences, resamples, seed + 1)
+    extreme = sum(abs(d) >= abs(observed) - 1e-12 for d in null)
+    p_permutation = (extreme + 1) / (resamples + 1)
+    return Comparison(a, b, n, observed, low, high, p_bootstrap, p_permutation)
+
+
+def read_scores(path: Path | str) -> Iterable[dict]:
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    usage = (
+        "usage: stats ingest [SCORES] [--run NAME] | stats summary [--run NAME] "
+        "[--by FIELD] [--resamples N] | stats compare MODEL_A MODEL_B "
+        "[--run NAME] [--resamples N]"
+    )
+    options = {"--run": "default", "--by": None, "--resamples": str(RESAMPLES)}
+    for name in options:
+        if name in argv:
+            i = argv.index(name)
+            if i + 1 == len(argv):
+                print(usage, file=sys.stderr)
+                return 2
+            options[name] = argv[i + 1]
+            del argv[i : i + 2]
+    command, args = (argv[0], argv[1:]) if argv else ("", [])
+    run = options["--run"]
+    resamples = int(options["--resamples"])
+    store = ResultStore.on_disk()
+    if command == "ingest" and len(args) <= 1:
+        path = Path(args[0] if args else cache_dir() / "runs" / "scores.jsonl")
+        added = store.add(run, read_scores(path))
+        print(f"{added} scores -> run {run!r} in {store.path}")
+        return 0
+    if options["--by"] is not None and options["--by"] not in GROUPS:
+        print(f"--by must be one of {', '.join(GROUPS)}", file=sys.stderr)
+        return 2
+    if command == "summary" and not args:
+        percent = round(CONFIDENCE * 100)
+        table = breakdown(store, run, options["--by"], resamples)
+        for model, groups in table.items():
+            for value, s in groups.items():
+                label = f"{model} [{value}]" if options["--by"] else model
+                print(
+                    f"{label}: {s.mean:.2f} ({percent}% CI {s.low:.2f}-{s.high:.2f}, "
+                    f"n={s.n})"
+                )
+        return 0
+    if command == "compare" and len(args) == 2:
+        c = compare(store, run, args[0], args[1], resamples)
+        if not c.n:
+            known = ", ".join(store.models(run)) or "none"
+            print(
+                f"{c.a} and {c.b} share no scored records in run {run!r} "
+                f"(models: {known})",
+                file=sys.stderr,
+            )
+            return 1
+        print(
+            f"{c.a} - {c.b}: {c.difference:+.2f} "
+            f"({round(CONFIDENCE * 100)}% CI {c.low:+.2f} to {c.high:+.2f}, "
+            f"n={c.n}), p={c.p_bootstrap:.4f} (bootstrap), "
+            f"p={c.p_permutation:.4f} (permutation)"
+        )
+        return 0
+    print(usage, file=sys.stderr)
+    return 2
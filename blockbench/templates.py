@@ -0,0 +1,250 @@
+"""Compiled prompt templates for the ``Task-*/prompt*.py`` files.
+
+Every task prompt is the same sequence of tagged sections (``<role_context>``,
+``<background_scenario>``, ``<requirements>``, ``<severity_definitions>``,
+``<constraints>``, ``<code_input>``, ``<output_format>``, ``<note>`` ...), and
+``<code_input>`` is usually a verbatim copy of the task's problem file.
+:func:`parse` splits a prompt once into a skeleton of literal text and named
+slots; section bodies are interned in a shared :class:`FragmentTable`, and a
+``<code_input>`` that matches a problem file in the same folder becomes a
+:class:`FileRef` read at render time instead of a pasted copy.
+
+Variants only override the sections that differ, so rendering thousands of
+them is a join over shared strings::
+
+    base = PromptTemplate.from_file("Task-1/prompt_1.py")
+    text = base.render(note="Analyze the loop bounds carefully.")
+
+Run ``python -m blockbench templates check`` to verify that every prompt file
+round-trips through its compiled template, or ``templates stats`` to see how
+much text the prompt files share.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Mapping, Union
+
+from .paths import REPO_ROOT
+
+#: Glob pattern of the hand-written prompt files.
+PROMPT_FILES = "Task-*/prompt*.py"
+#: Extensions of problem files that a ``<code_input>`` section may reference.
+CODE_SUFFIXES = (".sol", ".rs")
+
+_SECTION = re.compile(r"<([a-z_]+)>(.*?)</\1>", re.DOTALL)
+
+
+@dataclass(frozen=True)
+class FileRef:
+    """A section body taken from a file: ``lead + file.strip() + trail``."""
+
+    path: str
+    lead: str = "\n"
+    trail: str = "\n"
+
+
+@dataclass(frozen=True)
+class Slot:
+    name: str
+
+
+Body = Union[str, FileRef]
+
+
+class FragmentTable:
+    """Interns section bodies and caches referenced files."""
+
+    def __init__(self, root: Path = REPO_ROOT) -> None:
+        self.root = root
+        self._strings: dict[str, str] = {}
+        self._files: dict[str, tuple[int, str]] = {}
+
+    def intern(self, text: str) -> str:
+        return self._strings.setdefault(text, text)
+
+    def read(self, ref: FileRef) -> str:
+        path = self.root / ref.path
+        mtime = path.stat().st_mtime_ns
+        cached = self._files.get(ref.path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, path.read_text(encoding="utf-8").strip())
+            self._files[ref.path] = cached
+        return ref.lead + cached[1] + ref.trail
+
+    @property
+    def bytes_stored(self) -> int:
+        return sum(len(text) for text in self._strings.values())
+
+
+#: Table shared by templates that do not ask for their own.
+FRAGMENTS = FragmentTable()
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A prompt skeleton plus the bodies of its named sections."""
+
+    skeleton: tuple[str | Slot, ...]
+    sections: Mapping[str, Body]
+    table: FragmentTable = field(default=FRAGMENTS, compare=False, repr=False)
+
+    @classmethod
+    def build(
+        cls,
+        sections: Iterable[tuple[str, Body]],
+        header: str = "",
+        table: FragmentTable | None = None,
+    ) -> "PromptTemplate":
+        """Lay sections out the way the task prompts do.
+
+        String bodies are wrapped in newlines, so ``("note", "text")`` renders
+        as ``<note>\\ntext\\n</note>``; sections are separated by a blank line.
+        """
+        table = table or FRAGMENTS
+        skeleton: list[str | Slot] = []
+        bodies: dict[str, Body] = {}
+        literal = header
+        for name, body in sections:
+            skeleton.extend((table.intern(literal + f"<{name}>"), Slot(name)))
+            if isinstance(body, str):
+                body = "\n" + body.strip("\n") + "\n"
+            bodies[name] = table.intern(body) if isinstance(body, str) else body
+            literal = f"</{name}>\n\n"
+        skeleton.append(table.intern(literal.rstrip("\n") + "\n"))
+        return cls(tuple(skeleton), bodies, table)
+
+    @classmethod
+    def from_file(
+        cls, path: Path | str, table: FragmentTable | None = None
+    ) -> "PromptTemplate":
+        path = Path(path)
+        if not path.is_absolute():
+            path = REPO_ROOT / path
+        return parse(path.read_text(encoding="utf-8"), path.parent, table)
+
+    @property
+    def names(self) -> list[str]:
+        return [part.name for part in self.skeleton if isinstance(part, Slot)]
+
+    def body(self, name: str) -> str:
+        value = self.sections[name]
+        return self.table.read(value) if isinstance(value, FileRef) else value
+
+    def variant(self, **overrides: Body) -> "PromptTemplate":
+        """Return a template with some section bodies replaced.
+
+        Overrides must name existing sections.  String bodies are laid out
+        as in :meth:`build`, on their own lines between the tags.
+        """
+        unknown = set(overrides) - set(self.sections)
+        if unknown:
+            raise KeyError(f"unknown sections: {', '.join(sorted(unknown))}")
+        sections = dict(self.sections)
+        for name, value in overrides.items():
+            if isinstance(value, str):
+                value = self.table.intern("\n" + value.strip("\n") + "\n")
+            sections[name] = value
+        return PromptTemplate(self.skeleton, sections, self.table)
+
+    def render(self, **overrides: Body) -> str:
+        """Render the prompt, optionally overriding section bodies."""
+        template = self.variant(**overrides) if overrides else self
+        return "".join(
+            template.body(part.name) if isinstance(part, Slot) else part
+            for part in template.skeleton
+        )
+
+
+def _code_ref(body: str, folder: Path | None, root: Path) -> Body:
+    if folder is None:
+        return body
+    stripped = body.strip()
+    for path in sorted(folder.iterdir()):
+        if path.suffix not in CODE_SUFFIXES or not path.is_file():
+            continue
+        if path.read_text(encoding="utf-8").strip() == stripped:
+            lead = body[: len(body) - len(body.lstrip())]
+            trail = body[len(body.rstrip()) :]
+            try:
+                relative = path.resolve().relative_to(root.resolve())
+            except ValueError:
+                relative = path.resolve()
+            return FileRef(relative.as_posix(), lead, trail)
+    return body
+
+
+def parse(
+    text: str,
+    folder: Path | str | None = None,
+    table: FragmentTable | None = None,
+) -> PromptTemplate:
+    """Compile prompt text into a :class:`PromptTemplate`.
+
+    If ``folder`` is given, a ``<code_input>`` identical (up to surrounding
+    whitespace) to a ``.sol``/``.rs`` file in it is stored as a reference.
+    """
+    table = table or FRAGMENTS
+    folder = Path(folder) if folder is not None else None
+    skeleton: list[str | Slot] = []
+    sections: dict[str, Body] = {}
+    position = 0
+    for match in _SECTION.finditer(text):
+        name, body = match.group(1), match.group(2)
+        if name in sections:
+            # Repeated tag: keep the later copy as literal text.
+            continue
+        skeleton.append(table.intern(text[position : match.start(2)]))
+        skeleton.append(Slot(name))
+        if name == "code_input":
+            sections[name] = _code_ref(body, folder, table.root)
+        else:
+            sections[name] = table.intern(body)
+        position = match.end(2)
+    skeleton.append(table.intern(text[position:]))
+    return PromptTemplate(tuple(skeleton), sections, table)
+
+
+def prompt_files(root: Path = REPO_ROOT) -> list[Path]:
+    return sorted(root.glob(PROMPT_FILES))
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "check"
+    if command == "check":
+        failures = 0
+        for path in prompt_files():
+            text = path.read_text(encoding="utf-8")
+            template = PromptTemplate.from_file(path)
+            ok = template.render() == text
+            refs = [
+                v.path for v in template.sections.values() if isinstance(v, FileRef)
+            ]
+            note = f" (code from {refs[0]})" if refs else ""
+            status = "ok  " if ok else "FAIL"
+            print(f"{status} {path.relative_to(REPO_ROOT)}{note}")
+            failures += not ok
+        return 1 if failures else 0
+    if command == "stats":
+        table = FragmentTable()
+        templates = [PromptTemplate.from_file(p, table) for p in prompt_files()]
+        rendered = sum(len(t.render()) for t in templates)
+        print(f"{len(templates)} prompt files, {rendered} characters rendered")
+        print(f"{table.bytes_stored} characters of distinct inline fragments")
+        return 0
+    if command == "render" and len(argv) >= 2:
+        overrides = {}
+        for arg in argv[2:]:
+            name, _, value = arg.partition("=")
+            overrides[name] = value
+        sys.stdout.write(PromptTemplate.from_file(argv[1]).render(**overrides))
+        return 0
+    print(
+        "usage: templates check | stats | render FILE [SECTION=TEXT...]",
+        file=sys.stderr,
+    )
+    return 2
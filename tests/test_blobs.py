@@ -0,0 +1,45 @@
+from blockbench.blobs import BlobStore, blob_digest, intern_record, resolve_record
+
+from .conftest import VAULT
+
+
+def test_identical_bodies_are_stored_once(record):
+    store = BlobStore()
+    copy = dict(record, id="gs_test_vault_H02")
+    first = intern_record(record, store)
+    second = intern_record(copy, store)
+    digest = first["primary_file"]["content_ref"]
+    assert digest == second["primary_file"]["content_ref"] == blob_digest(VAULT)
+    assert "content" not in first["primary_file"]
+    assert len(store) == 1
+    assert store.bytes_in == 2 * store.bytes_stored
+
+
+def test_resolve_inverts_intern(record):
+    record["context_files"] = [{"path": "src/Token.sol", "content": "contract T {}"}]
+    store = BlobStore()
+    assert resolve_record(intern_record(record, store), store) == record
+    assert record["primary_file"]["content"] == VAULT
+
+
+def test_persisted_blobs_are_read_back_lazily(tmp_path):
+    digest = BlobStore(tmp_path).put("line one\r\nline two\n")
+    reopened = BlobStore(tmp_path)
+    assert len(reopened) == 0
+    assert digest in reopened
+    assert reopened.get(digest) == "line one\r\nline two\n"
+
+
+def test_derived_values_are_computed_once_per_name():
+    store = BlobStore()
+    digest = store.put(VAULT)
+    calls = []
+
+    def count_lines(text):
+        calls.append(text)
+        return text.count("\n")
+
+    assert store.derive(digest, "lines", count_lines) == 16
+    assert store.derive(digest, "lines", count_lines) == 16
+    assert len(calls) == 1
+    assert store.derive(digest, "chars", len) == len(VAULT)
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from blockbench.build import Builder, main, sweep_graph
+from blockbench.stats import ResultStore, breakdown
+
+
+@pytest.fixture
+def build(tmp_path, record):
+    replay = tmp_path / "replay.jsonl"
+    row = {"prompt_id": f"{record['id']}/L1", "response": "Reentrancy in withdraw."}
+    replay.write_text(json.dumps(row) + "\n", encoding="utf-8")
+
+    def run(records):
+        builder = Builder(tmp_path / "build", workers=1, replay=replay)
+        graph = sweep_graph(["stub:a"], levels=(1,), records=records)
+        builder.build(graph)
+        return builder, graph
+
+    return run
+
+
+def _stored_types(run="default"):
+    store = ResultStore.on_disk()
+    try:
+        return list(breakdown(store, run, "vulnerability_type", 10)["stub:a"])
+    finally:
+        store.close()
+
+
+def test_unchanged_sweep_rebuilds_nothing(build, record):
+    first, _ = build([record])
+    assert first.built["aggregate"] == 1 and not first.failed
+    second, graph = build([record])
+    assert second.built == {}
+    assert sum(second.reused.values()) == len(graph.targets)
+    assert second.stale(graph) == []
+
+
+def test_metadata_change_reaches_the_store_and_charts(build, record):
+    build([record])
+    assert _stored_types() == ["reentrancy"]
+    record["vulnerability_type"] = "access_control"
+    builder, _ = build([record])
+    assert builder.built["meta"] == 1
+    assert builder.built["aggregate"] == 1
+    assert builder.built["charts"] == 1
+    assert _stored_types() == ["access_control"]
+
+
+def test_prose_change_stops_at_an_unchanged_score(build, record):
+    build([record])
+    record["context_hint"] = "A different hint that level 1 prompts leave out."
+    builder, _ = build([record])
+    # The record's score and metadata are recomputed, but they come out the
+    # same, so nothing after them runs.
+    assert builder.built["score"] == 1
+    assert builder.built["meta"] == 1
+    assert "respond" not in builder.built
+    assert "aggregate" not in builder.built
+    assert "charts" not in builder.built
+
+
+def test_options_need_a_value(capsys):
+    assert main(["--models", "stub:a", "--budget"]) == 2
+    assert "usage: build" in capsys.readouterr().err
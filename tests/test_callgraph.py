@@ -0,0 +1,80 @@
+import pytest
+
+from blockbench.callgraph import CallGraph, check_flow, flow_refs
+
+ROUTER = """\
+pragma solidity ^0.8.20;
+
+interface IPool {
+    function swap(uint256 amount) external;
+}
+
+library Math {
+    function clamp(uint256 x) internal pure returns (uint256) {
+        return x;
+    }
+}
+
+contract Base {
+    function _settle(uint256 amount) internal virtual {}
+}
+
+contract Pool is IPool, Base {
+    using Math for uint256;
+
+    function swap(uint256 amount) external {
+        _settle(amount.clamp());
+    }
+
+    function _settle(uint256 amount) internal override {
+        super._settle(amount);
+    }
+}
+
+contract Router {
+    IPool pool;
+
+    function route(uint256 amount) external {
+        pool.swap(amount);
+        unknownHelper(amount);
+    }
+}
+"""
+
+
+@pytest.fixture
+def graph():
+    return CallGraph([("src/Router.sol", ROUTER)])
+
+
+def test_calls_resolve_through_types_usings_and_super(graph):
+    assert graph.edges["Router.route"] == {"IPool.swap"} | {"Pool.swap"}
+    assert graph.edges["Pool.swap"] == {"Math.clamp", "Pool._settle"}
+    assert graph.edges["Pool._settle"] == {"Base._settle"}
+    [call] = graph.unresolved
+    assert (call.caller, call.name, call.line) == ("Router.route", "unknownHelper", 34)
+
+
+def test_interface_calls_reach_implementations(graph):
+    assert graph.lookup("IPool", "swap") == ["IPool.swap", "Pool.swap"]
+    assert graph.reachable("Router.route", "Base._settle") == 3
+    assert graph.reachable("Base._settle", "Router.route") == 0
+
+
+def test_flow_steps_are_resolved_and_linked():
+    record = {
+        "id": "router",
+        "primary_file": {"path": "src/Router.sol", "content": ROUTER},
+        "call_flow": "User -> Router.route() -> Pool.swap() -> Oracle.price()",
+    }
+    check = check_flow(record)
+    assert [step.status for step in check.steps] == ["prose", "ok", "ok", "external"]
+    assert [link.status for link in check.links] == ["direct"]
+    assert check.unknown == [] and check.missing == []
+
+
+def test_flow_refs_tell_identifiers_from_prose():
+    assert flow_refs("calculate offset (incorrect)") == []
+    assert flow_refs("User") == []
+    assert flow_refs("newMaker/_vote") == [(None, "newMaker"), (None, "_vote")]
+    assert flow_refs("Router.route() (with fee)") == [("Router", "route")]
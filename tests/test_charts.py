@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from blockbench.charts import bar_chart, format_score, heatmap, main, render_run
+from blockbench.paths import REPO_ROOT
+from blockbench.stats import ResultStore
+
+
+@pytest.fixture
+def store(record):
+    store = ResultStore()
+    rows = [
+        {"prompt_id": "Task-1/prompt_1", "model": "grok", "score": 9.0},
+        {"prompt_id": "Task-1/prompt_1", "model": "openai:gpt-5", "score": 7.0},
+    ]
+    for model, score in (("grok", 6.0), ("openai:gpt-5", 8.0)):
+        rows.append(
+            {
+                "prompt_id": f"{record['id']}/L1",
+                "record_id": record["id"],
+                "level": 1,
+                "model": model,
+                "score": score,
+            }
+        )
+    store.add("run", rows, records={record["id"]: record})
+    yield store
+    store.close()
+
+
+def test_the_hand_written_chart_is_reproduced():
+    expected = (REPO_ROOT / "Task-1" / "results.svg").read_text(encoding="utf-8")
+    chart = bar_chart(
+        "Task 1 Results", [("Grok", 9.0), ("Sonnet-4.5", 9.0), ("GPT 5.1", 10.0)]
+    )
+    assert chart == expected
+
+
+def test_scores_are_formatted_and_bars_clamped():
+    assert [format_score(s) for s in (9.0, 3.24, 0.05)] == ["9", "3.2", "0.1"]
+    chart = bar_chart("T", [("over", 12.0), ("under", -1.0)])
+    assert 'y="150" width="60" height="100"' in chart
+    assert 'y="250" width="60" height="0"' in chart
+
+
+def test_heatmap_leaves_missing_cells_blank():
+    chart = heatmap("H", ["a", "b"], ["reentrancy"], [[8.0], [None]])
+    assert chart.count(">8<") == 1
+    assert chart.startswith("<svg")
+
+
+def test_only_changed_charts_are_rendered_again(store, tmp_path, record):
+    out = tmp_path / "charts"
+    assert render_run(store, "run", out) == {"charts": 4, "rendered": 4}
+    names = json.loads((out / "manifest.json").read_text(encoding="utf-8"))
+    assert sorted(names) == [
+        "Task-1/results.svg",
+        f"{record['id']}/results.svg",
+        "heatmap.svg",
+        "summary.svg",
+    ]
+    assert render_run(store, "run", out)["rendered"] == 0
+    (out / "summary.svg").unlink()
+    assert render_run(store, "run", out)["rendered"] == 1
+    store.add(
+        "run",
+        [{"prompt_id": "Task-1/prompt_1", "model": "grok", "score": 5.0}],
+        records={},
+    )
+    # The Task-1 chart and the summary changed; the heatmap did not.
+    assert render_run(store, "run", out)["rendered"] == 2
+
+
+def test_options_need_a_value(capsys):
+    assert main(["--run"]) == 2
+    assert "usage: charts" in capsys.readouterr().err
@@ -0,0 +1,64 @@
+import pytest
+
+from blockbench.blobs import BlobStore
+from blockbench.codesearch import CodeIndex, Location
+
+from .conftest import VAULT
+
+SWAP = """\
+function swap(bytes calldata data) external {
+    (uint256 amountOut, address to) = abi.decode(data, (uint256, address));
+    uint256 amount = amountOut - fee;
+    IERC20(token).transfer(to, amount);
+}
+"""
+
+
+@pytest.fixture
+def index():
+    index = CodeIndex(BlobStore())
+    index.add(VAULT, Location("src", "vault", "Vault.sol"))
+    index.add(SWAP, Location("src", "swap", "Swap.sol"))
+    return index
+
+
+def _hits(index, query, **options):
+    return [(hit.finding_id, hit.line) for hit in index.search(query, **options)]
+
+
+def test_whole_word_identifier(index):
+    assert _hits(index, "amount", whole_word=True) == [
+        ("vault", 10),
+        ("vault", 11),
+        ("vault", 12),
+        ("vault", 14),
+        ("swap", 3),
+        ("swap", 4),
+    ]
+    assert ("swap", 2) in _hits(index, "amount")
+
+
+def test_whole_word_non_identifier_query(index):
+    assert _hits(index, "abi.decode(data", whole_word=True) == [("swap", 2)]
+    assert _hits(index, "msg.sender.call", whole_word=True) == [("vault", 12)]
+    assert _hits(index, "(bool ok, )", whole_word=True) == [("vault", 12)]
+    # As with grep -w, the characters around the match must not be word
+    # characters, whatever the query starts or ends with.
+    assert _hits(index, "(to, amount)", whole_word=True) == []
+
+
+def test_whole_word_rejects_partial_identifiers(index):
+    assert _hits(index, "amountOu", whole_word=True) == []
+    assert _hits(index, "sender.cal", whole_word=True) == []
+
+
+def test_whole_word_dotted_chain_inside_a_longer_one():
+    index = CodeIndex(BlobStore())
+    index.add("self.pool.token.transfer(to, 1)\n", Location("src", "pool", "p.py"))
+    for query in ("pool.token.transfer", "pool.token", "token.transfer", "token"):
+        assert _hits(index, query, whole_word=True) == [("pool", 1)]
+    assert _hits(index, "pool.transfer", whole_word=True) == []
+
+
+def test_ignore_case(index):
+    assert _hits(index, "VAULT", ignore_case=True) == [("vault", 3)]
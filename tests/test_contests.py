@@ -0,0 +1,131 @@
+from datetime import date
+
+import pytest
+
+from blockbench.contests import (
+    Contest,
+    crosscheck,
+    extract_findings,
+    ingest,
+    main,
+    parse_dataset,
+    parse_dates,
+    report_text,
+)
+
+from .conftest import VAULT
+
+CONTEST = Contest(
+    "2025-10-vault",
+    "2025-10 Vault",
+    date(2025, 10, 6),
+    date(2025, 10, 16),
+    "https://code4rena.com/reports/2025-10-vault",
+    2,
+    1,
+    1,
+)
+
+REPORT = """\
+# Vault findings
+
+## High Risk Findings
+
+### [H-01] Reentrancy in withdraw drains the vault
+
+*Submitted by alice*
+
+https://github.com/example/vault/blob/main/src/Vault.sol#L12-L14
+
+#### Finding description
+
+withdraw sends ether before it reduces the balance.
+
+#### Impact
+
+Every depositor's funds can be stolen.
+
+#### Recommended mitigation steps
+
+Reduce the balance first.
+
+## Medium Risk Findings
+
+### [M-01] Deposits emit no event
+
+https://github.com/example/vault/blob/main/src/Vault.sol#L6
+
+Indexers cannot follow deposits.
+"""
+
+
+@pytest.mark.parametrize(
+    "text, start, end",
+    [
+        ("September 17 – 30, 2025", date(2025, 9, 17), date(2025, 9, 30)),
+        ("October 22 – November 3, 2025", date(2025, 10, 22), date(2025, 11, 3)),
+        ("December 28 – January 5, 2026", date(2025, 12, 28), date(2026, 1, 5)),
+    ],
+)
+def test_audit_date_ranges(text, start, end):
+    assert parse_dates(text) == (start, end)
+
+
+def test_the_dataset_file_parses():
+    contests = parse_dataset()
+    assert len(contests) == 4
+    sequence = next(c for c in contests if c.slug == "2025-10-sequence")
+    assert (sequence.found, sequence.high, sequence.medium) == (6, 2, 4)
+    assert sequence.platform == "code4rena"
+    assert contests[0].found is None
+
+
+def test_crosscheck_counts_records_per_report(record):
+    record["report_url"] = CONTEST.url + "/"
+    [tally] = crosscheck([CONTEST], [record])
+    assert (tally.high, tally.medium, tally.status) == (1, 0, "mismatch")
+    assert crosscheck([CONTEST], [])[0].status == "missing"
+
+
+def test_sections_become_draft_records(tmp_path):
+    code = tmp_path / "src"
+    code.mkdir()
+    (code / "Vault.sol").write_text(VAULT, encoding="utf-8")
+    high, medium = extract_findings(REPORT, CONTEST, tmp_path)
+    assert high["id"] == "gs_c4_2025-10-vault_H01"
+    assert high["finding_title"] == "Reentrancy in withdraw drains the vault"
+    assert high["finding_description"].startswith("withdraw sends ether")
+    assert high["attack_scenario"] == "Every depositor's funds can be stolen."
+    assert high["fix_description"] == "Reduce the balance first."
+    assert high["primary_file"]["vulnerable_lines"] == [12, 13, 14]
+    assert high["primary_file"]["vulnerable_functions"] == ["Vault.withdraw"]
+    assert medium["severity"] == "medium"
+    assert medium["finding_description"] == "Indexers cannot follow deposits."
+
+
+def test_html_reports_read_like_markdown(tmp_path):
+    path = tmp_path / "report.html"
+    path.write_text(
+        "<h3>[M-01] Deposits emit no event</h3><script>x()</script>"
+        "<p>See <a href='https://example.com'>the code</a>.</p>",
+        encoding="utf-8",
+    )
+    text = report_text(path)
+    assert "### [M-01] Deposits emit no event" in text
+    assert "See [the code](https://example.com)." in text
+    assert "x()" not in text
+
+
+def test_ingest_marks_findings_missing_from_the_corpus(tmp_path):
+    (tmp_path / f"{CONTEST.slug}.md").write_text(REPORT, encoding="utf-8")
+    [extraction] = ingest(
+        tmp_path, [CONTEST], workers=1, known={"gs_c4_2025-10-vault_H01"}
+    )
+    assert [r["id"] for r in extraction.drafts] == ["gs_c4_2025-10-vault_M01"]
+    fields = {i.field for i in extraction.issues}
+    assert {"/vulnerability_type", "/difficulty_tier"} <= fields
+
+
+def test_options_need_a_value(capsys):
+    assert main(["ingest", "--out"]) == 2
+    assert "usage: contests" in capsys.readouterr().err
@@ -0,0 +1,48 @@
+import pytest
+
+from blockbench.dedup import cluster, main, minhash, shingles
+
+
+def test_empty_shingles_have_no_signature():
+    assert shingles({"id": "empty"}) == set()
+    assert minhash(set()) is None
+
+
+def test_empty_records_are_singletons(record):
+    copy = dict(record, id="gs_test_vault_H02")
+    result = cluster(
+        [
+            {"id": "a"},
+            {"id": "b", "finding_title": "", "finding_description": None},
+            {"id": "c", "primary_file": {"content": ""}},
+            record,
+            copy,
+        ]
+    )
+    groups = result.groups()
+    assert groups["a"] == ["a"]
+    assert groups["b"] == ["b"]
+    assert groups["c"] == ["c"]
+    assert groups[record["id"]] == [record["id"], copy["id"]]
+    assert [(left, right) for left, right, _ in result.pairs] == [
+        (record["id"], copy["id"])
+    ]
+
+
+def test_unrelated_records_stay_apart(record):
+    other = {
+        "id": "other",
+        "finding_title": "Oracle price can be stale after a sequencer outage",
+        "finding_description": "The Chainlink answer is used without checking "
+        "updatedAt, so liquidations run at an outdated price.",
+    }
+    assert cluster([record, other]).groups() == {
+        record["id"]: [record["id"]],
+        "other": ["other"],
+    }
+
+
+@pytest.mark.parametrize("argv", [["--threshold"], ["--threshold", "high"]])
+def test_threshold_needs_a_number(argv, capsys):
+    assert main(argv) == 2
+    assert "usage: dedup" in capsys.readouterr().err
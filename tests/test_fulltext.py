@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from blockbench.fulltext import FullTextIndex, main
+
+
+@pytest.fixture
+def index(tmp_path, record):
+    other = dict(
+        record,
+        id="oracle",
+        finding_title="Stale oracle price",
+        finding_description="The price is used without checking the guard time.",
+        attack_scenario="Liquidations run at an outdated price.",
+        fix_description="Check updatedAt against a heartbeat.",
+    )
+    findings = tmp_path / "findings.json"
+    findings.write_text(json.dumps([record, other]), encoding="utf-8")
+    return FullTextIndex.build([findings])
+
+
+def test_phrases_must_match_in_order(index):
+    assert [hit.id for hit in index.search('"reentrancy guard"')] == [
+        "gs_test_vault_H01"
+    ]
+    assert index.search('"guard reentrancy"') == []
+    assert {hit.id for hit in index.search("guard price")} == {
+        "gs_test_vault_H01",
+        "oracle",
+    }
+    assert [hit.id for hit in index.search("guard price", require_all=True)] == [
+        "oracle"
+    ]
+
+
+def test_command_line_words_are_not_turned_into_phrases(index, monkeypatch, capsys):
+    monkeypatch.setattr(FullTextIndex, "load_or_build", classmethod(lambda cls: index))
+    assert main(["guard price"]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 2
+    assert main(['"reentrancy guard"']) == 0
+    assert capsys.readouterr().out.split()[1:] == ["gs_test_vault_H01"]
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from blockbench.generate import generate, main, render_prompts
+
+
+def test_levels_add_guidance(record):
+    prompts = render_prompts(record)
+    assert sorted(prompts) == [1, 2, 3]
+    assert "<analysis_focus>" not in prompts[1]
+    assert "reentrancy issues in Vault.withdraw" in prompts[2]
+    assert "Trace the call flow" in prompts[3]
+    assert all(record["primary_file"]["content"].strip() in p for p in prompts.values())
+
+
+@pytest.mark.parametrize("levels", ["4", "1,x", ""])
+def test_unknown_levels_exit_2(capsys, levels):
+    assert main(["--levels", levels]) == 2
+    assert "usage: generate" in capsys.readouterr().err
+
+
+def test_options_need_a_value(capsys):
+    assert main(["--levels", "1", "--shards"]) == 2
+    assert "usage: generate" in capsys.readouterr().err
+
+
+def test_generate_writes_sharded_prompts(tmp_path, record):
+    findings = tmp_path / "findings.json"
+    findings.write_text(json.dumps([record]), encoding="utf-8")
+    counts = generate(
+        tmp_path / "out", [findings], levels=(1, 2), shards=2, workers=1
+    )
+    assert counts == {"records": 1, "prompts": 2}
+    rows = [
+        json.loads(line)
+        for shard in sorted((tmp_path / "out").glob("prompts-*.jsonl"))
+        for line in shard.read_text(encoding="utf-8").splitlines()
+    ]
+    assert [(row["id"], row["level"]) for row in rows] == [
+        ("gs_test_vault_H01", 1),
+        ("gs_test_vault_H01", 2),
+    ]
+
+
+def test_records_over_budget_are_reported(tmp_path, record):
+    findings = tmp_path / "findings.json"
+    findings.write_text(json.dumps([record]), encoding="utf-8")
+    overshoots = []
+    generate(
+        tmp_path / "out",
+        [findings],
+        levels=(1,),
+        shards=1,
+        workers=1,
+        budget=10,
+        on_overshoot=lambda *over: overshoots.append(over),
+    )
+    [(record_id, tokens)] = overshoots
+    assert record_id == "gs_test_vault_H01" and tokens > 0
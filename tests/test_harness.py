@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+import pytest
+
+from blockbench.harness import (
+    Harness,
+    Job,
+    StubBackend,
+    TransientError,
+    backends_for,
+    evaluate,
+    main,
+)
+from blockbench.journal import Journal
+from blockbench.responses import ResponseCache
+
+
+class CountingBackend(StubBackend):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def complete(self, job):
+        self.calls.append(job.prompt_id)
+        return f"report for {job.prompt_id}"
+
+
+@pytest.fixture
+def sweep(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    backend = CountingBackend()
+    jobs = [
+        Job("a", "prompt a", "stub:x"),
+        Job("b", "prompt b", "stub:x"),
+        Job("c", "prompt c", "stub:x"),
+    ]
+
+    def run():
+        with Journal(tmp_path / "results.journal") as journal:
+            results = evaluate(jobs, {"stub": backend}, cache=cache, journal=journal)
+            return {r.prompt_id: r for r in results}, journal.counts()
+
+    yield cache, backend, jobs, run
+    cache.close()
+
+
+def test_resume_answers_done_jobs_from_the_cache(sweep):
+    cache, backend, jobs, run = sweep
+    run()
+    results, counts = run()
+    assert sorted(backend.calls) == ["a", "b", "c"]
+    assert all(result.cached for result in results.values())
+    assert counts["done"] == 3
+
+
+def test_resume_reports_an_evicted_response_as_lost(sweep):
+    cache, backend, jobs, run = sweep
+    run()
+    cache.prune(cache.size() - 1)
+    assert cache.evicted == 1
+    results, counts = run()
+    lost = [r for r in results.values() if not r.ok]
+    assert len(lost) == 1 and lost[0].error.startswith("lost:")
+    assert counts["lost"] == 1
+    # Nothing was sent to the model unasked ...
+    assert len(backend.calls) == 3
+    # ... and the next resume runs the lost job again.
+    results, counts = run()
+    assert all(result.ok for result in results.values())
+    assert len(backend.calls) == 4
+    assert counts == {"queued": 0, "running": 0, "done": 3, "failed": 0, "lost": 0}
+
+
+def test_prompts_with_the_same_text_are_separate_jobs(tmp_path):
+    first = Job("Task-1/prompt_1", "same text", "stub:x")
+    second = Job("Task-2/prompt_1", "same text", "stub:x")
+    assert first.key == second.key
+    assert first.journal_key != second.journal_key
+    with Journal(tmp_path / "results.journal") as journal:
+        evaluate(
+            [first, second],
+            {"stub": CountingBackend()},
+            cache=ResponseCache(),
+            journal=journal,
+        )
+        assert journal.counts()["done"] == 2
+
+
+def test_backend_prefix_ends_at_the_first_colon():
+    job = Job("p", "text", "openai:ft:gpt-4o:org::abc123")
+    assert job.backend == "openai"
+    assert job.model_name == "ft:gpt-4o:org::abc123"
+    bare = Job("p", "text", "grok")
+    assert (bare.backend, bare.model_name) == ("", "grok")
+    [result] = evaluate([bare], {"stub": StubBackend()})
+    assert result.error == "no backend prefix in 'grok'"
+
+
+def test_model_specs_must_name_a_backend(capsys):
+    assert main(["--models", "stub:a,grok", "--no-cache"]) == 2
+    assert capsys.readouterr().err.startswith("evaluate: no backend in grok\n")
+    with pytest.raises(ValueError):
+        backends_for(["grok"])
+
+
+def test_options_need_a_value(capsys):
+    assert main(["--no-cache", "--models"]) == 2
+    assert "usage: evaluate" in capsys.readouterr().err
+
+
+def test_stub_replays_rows_and_fails_without_one(tmp_path):
+    replay = tmp_path / "replay.jsonl"
+    rows = [
+        {"prompt_id": "p", "response": "any model"},
+        {"prompt_id": "p", "model": "b", "seed": 1, "response": "b, seed 1"},
+    ]
+    replay.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    backend = StubBackend(replay)
+    jobs = [
+        Job("p", "text", "stub:a"),
+        Job("p", "text", "stub:b", seed=1),
+        Job("q", "text", "stub:a"),
+    ]
+    results = evaluate(jobs, {"stub": backend})
+    by_job = {(r.prompt_id, r.model): r for r in results}
+    assert by_job["p", "stub:a"].response == "any model"
+    assert by_job["p", "stub:b"].response == "b, seed 1"
+    missing = by_job["q", "stub:a"]
+    assert missing.response is None
+    assert missing.error == "LookupError: no replay row for q (stub:a, seed 0)"
+
+
+def test_transient_errors_are_retried():
+    class Flaky(StubBackend):
+        def __init__(self):
+            super().__init__()
+            self.attempts = 0
+
+        async def complete(self, job):
+            self.attempts += 1
+            if self.attempts < 3:
+                raise TransientError("rate limited")
+            return "ok"
+
+    backend = Flaky()
+    harness = Harness({"stub": backend}, base_delay=0.0, seed=1)
+    result = asyncio.run(harness.run_job(Job("p", "text", "stub:x")))
+    assert result.ok and result.attempts == 3
+
+
+def test_stub_forgets_attempts_once_a_job_is_answered(tmp_path):
+    replay = tmp_path / "replay.jsonl"
+    lines = [json.dumps({"prompt_id": f"p{i}", "response": "ok"}) for i in range(20)]
+    replay.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    backend = StubBackend(replay, failure_rate=0.5)
+    jobs = [Job(f"p{i}", "text", "stub:x") for i in range(20)]
+    results = evaluate(jobs, {"stub": backend}, retries=10, base_delay=0.0, seed=1)
+    assert all(result.ok for result in results)
+    assert any(result.attempts > 1 for result in results)
+    assert backend._attempts == {}
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from blockbench.index import MetadataIndex, Q, main, parse_criteria
+
+
+@pytest.fixture
+def findings(tmp_path, record):
+    def write(name, *severities):
+        path = tmp_path / name
+        rows = [
+            dict(record, id=f"{name}-{n}", severity=severity)
+            for n, severity in enumerate(severities)
+        ]
+        path.write_text(json.dumps(rows), encoding="utf-8")
+        return path
+
+    return write
+
+
+def test_queries_combine(tmp_path, findings):
+    index = MetadataIndex(tmp_path / "index.json")
+    index.refresh([findings("a.json", "high", "medium"), findings("b.json", "low")])
+    assert index.select(severity="high") == ["a.json-0"]
+    assert sorted(index.select(Q(severity=["high", "low"]))) == ["a.json-0", "b.json-0"]
+    assert index.select(~Q(severity="high") & Q(difficulty_tier=1)) == [
+        "a.json-1",
+        "b.json-0",
+    ]
+
+
+def test_criteria_are_parsed_and_checked():
+    assert parse_criteria(["severity=high,low", "difficulty_tier=1"]) == {
+        "severity": ["high", "low"],
+        "difficulty_tier": [1],
+    }
+    for bad in (["foo=bar"], ["severity"]):
+        with pytest.raises(ValueError):
+            parse_criteria(bad)
+
+
+@pytest.mark.parametrize("arg", ["foo=bar", "high"])
+def test_bad_criteria_are_usage_errors(arg, capsys):
+    assert main([arg]) == 2
+    assert "usage: index" in capsys.readouterr().err
+
+
+def test_reindexing_reuses_rows(tmp_path, findings):
+    index = MetadataIndex(tmp_path / "index.json")
+    path = findings("a.json", "high", "medium", "low")
+    index.add_file(path)
+    for _ in range(5):
+        index.add_file(path)
+    assert len(index.ids) == 3 and len(index) == 3
+    findings("a.json", "high")
+    index.add_file(path)
+    assert len(index) == 1 and index.select() == ["a.json-0"]
+    index.add_file(findings("b.json", "low", "low"))
+    assert len(index.ids) == 3
+    assert index.count(severity="low") == 2
+
+
+def test_persisted_index_round_trips(tmp_path, findings):
+    index = MetadataIndex(tmp_path / "index.json")
+    index.refresh([findings("a.json", "high", "medium")])
+    index.save()
+    loaded = MetadataIndex.open(tmp_path / "index.json")
+    assert loaded.select(severity="medium") == ["a.json-1"]
+    assert loaded.refresh([tmp_path / "a.json"]) == []
@@ -0,0 +1,60 @@
+import json
+
+from blockbench.journal import Journal
+
+
+def test_reopening_keeps_the_last_state_of_each_job(tmp_path):
+    path = tmp_path / "sweep.journal"
+    with Journal(path) as journal:
+        journal.record("a", "queued", prompt="Task-1/prompt_1")
+        journal.record("a", "running")
+        journal.record("a", "done", ref="k1")
+        journal.record("b", "queued")
+        journal.record("b", "failed", error="timeout")
+    with Journal(path) as journal:
+        assert journal.completed("a") == "k1"
+        assert journal.completed("b") is None
+        assert journal.states["a"]["prompt"] == "Task-1/prompt_1"
+        assert journal.counts() == {
+            "queued": 0,
+            "running": 0,
+            "done": 1,
+            "failed": 1,
+            "lost": 0,
+        }
+    # Replaying compacts the log to one line per job.
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["state"] for line in lines] == ["done", "failed"]
+
+
+def test_a_line_cut_short_by_a_crash_is_ignored(tmp_path):
+    path = tmp_path / "sweep.journal"
+    path.write_text(
+        '{"job":"a","state":"done","ref":"k1"}\n{"job":"b","sta', encoding="utf-8"
+    )
+    with Journal(path) as journal:
+        assert list(journal.states) == ["a"]
+        journal.record("b", "queued")
+    assert path.read_text(encoding="utf-8").splitlines()[-1] == (
+        '{"job":"b","state":"queued"}'
+    )
+
+
+def test_entries_are_buffered_until_a_flush(tmp_path):
+    path = tmp_path / "sweep.journal"
+    journal = Journal(path, flush_every=3, flush_interval=60)
+    journal.record("a", "queued")
+    journal.record("b", "queued")
+    assert path.read_text(encoding="utf-8") == ""
+    journal.record("c", "queued")
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 3
+    journal.close()
+
+
+def test_without_resume_the_journal_starts_over(tmp_path):
+    path = tmp_path / "sweep.journal"
+    with Journal(path) as journal:
+        journal.record("a", "done", ref="k1")
+    with Journal(path, resume=False) as journal:
+        assert journal.completed("a") is None
+    assert path.read_text(encoding="utf-8") == ""
@@ -0,0 +1,37 @@
+from blockbench.languages import detect_language, language_scores, main, outline
+from blockbench.paths import REPO_ROOT
+
+from .conftest import VAULT
+
+RUST = "impl Pool {\n    fn sync(&mut self) -> Result<()> {\n        Ok(())\n    }\n}\n"
+
+
+def test_content_wins_over_the_extension():
+    assert detect_language(VAULT, "Vault.rs") == "solidity"
+    assert detect_language(RUST, "pool.sol") == "rust"
+    task = REPO_ROOT / "Task-1" / "problem.rs"
+    assert detect_language(task.read_text(encoding="utf-8"), task) == "solidity"
+
+
+def test_inconclusive_content_falls_back_to_the_extension():
+    assert language_scores("x = 1") == {"solidity": 0, "rust": 0}
+    assert detect_language("x = 1", "a.rs") == "rust"
+    assert detect_language("x = 1", "notes.txt") == "unknown"
+
+
+def test_outline_dispatches_on_the_detected_language():
+    assert [d.qualified_name for d in outline(RUST, "pool.sol")] == [
+        "Pool",
+        "Pool.sync",
+    ]
+    assert "Vault.withdraw" in [d.qualified_name for d in outline(VAULT)]
+
+
+def test_outline_command_notes_a_misleading_extension(tmp_path, capsys):
+    path = tmp_path / "Vault.rs"
+    path.write_text(VAULT, encoding="utf-8")
+    assert main([str(path)]) == 0
+    out = capsys.readouterr().out
+    assert out.startswith(f"{path}: solidity (extension says rust)\n")
+    assert "  function Vault.withdraw [10-15]" in out
+    assert main([]) == 2
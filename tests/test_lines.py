@@ -0,0 +1,61 @@
+import json
+
+from blockbench import loader
+from blockbench.lines import LineTable, check_vulnerable_lines, main
+
+from .conftest import VAULT
+
+
+def test_crlf_and_cr_count_like_lf():
+    table = LineTable("a\r\nb\rc\n\nd")
+    assert table.count == 5
+    assert [table.line(n) for n in range(1, 6)] == ["a", "b", "c", "", "d"]
+    assert table.line_of(table.starts[2]) == 3
+    assert table.excerpt(0, 2) == "a\r\nb"
+    assert LineTable("a\n").count == 1 and 2 not in LineTable("a\n")
+
+
+def test_function_at_finds_the_enclosing_function():
+    table = LineTable.for_text(VAULT)
+    assert table.function_at(12).name == "withdraw"
+    assert table.function_at(7).name == "deposit"
+    assert table.function_at(4) is None
+    assert table.function_at(9) is None
+    assert LineTable.for_text(VAULT) is table
+
+
+def test_the_sample_record_is_clean(record):
+    assert check_vulnerable_lines(record) == []
+
+
+def test_lines_past_the_end_blank_and_invalid(record):
+    record["primary_file"]["vulnerable_lines"] = [2, 12, 14, 15, 40, 41, "7"]
+    issues = check_vulnerable_lines(record)
+    assert [(i.code, i.severity) for i in issues] == [
+        ("invalid", "error"),
+        ("out-of-range", "error"),
+        ("whitespace-only", "warning"),
+    ]
+    assert issues[1].message == (
+        "lines 40-41 are past the end of src/Vault.sol (16 lines)"
+    )
+    assert issues[2].message == "line 2 is only whitespace"
+
+
+def test_blank_lines_inside_a_cited_range_are_expected(record):
+    record["primary_file"]["vulnerable_lines"] = [8, 9, 10]
+    assert check_vulnerable_lines(record) == []
+    record["primary_file"]["vulnerable_lines"] = []
+    assert [i.code for i in check_vulnerable_lines(record)] == ["missing"]
+
+
+def test_malformed_records_are_reported(tmp_path, monkeypatch, capsys, record):
+    path = tmp_path / "findings.json"
+    good = json.dumps(record)
+    path.write_text(f'[{good}, {{"id": "bad" "x": 1}}]', encoding="utf-8")
+    monkeypatch.setattr(loader, "finding_files", lambda: [path])
+    assert main([]) == 1
+    err = capsys.readouterr().err
+    assert err.startswith(f"malformed: {path}:1:")
+    assert "1 records loaded and checked in" in err
+    assert err.rstrip().endswith("1 malformed, 0 errors, 0 warnings")
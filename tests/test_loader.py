@@ -0,0 +1,50 @@
+import json
+
+from blockbench.loader import iter_file
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "findings.json"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_resynchronises_after_a_malformed_record(tmp_path):
+    path = _write(
+        tmp_path,
+        '[\n  {"id": "a", "severity": "high"},\n'
+        '  {"id": "b", "severity": "high" "title": "missing comma"},\n'
+        '  {"id": "c", "severity": "low"}\n]\n',
+    )
+    errors = []
+    ids = [record["id"] for record in iter_file(path, errors.append)]
+    assert ids == ["a", "c"]
+    assert len(errors) == 1
+    assert errors[0].line == 3
+    assert "delimiter" in errors[0].message
+
+
+def test_record_start_inside_a_string_is_not_a_resync_point(tmp_path):
+    text = json.dumps("quoted {\"id\": \"fake\"} text")
+    path = _write(
+        tmp_path,
+        '[{"id": "a", "broken": }, {"id": "b", "note": ' + text + "}]",
+    )
+    errors = []
+    records = list(iter_file(path, errors.append))
+    assert [record["id"] for record in records] == ["b"]
+    assert records[0]["note"].startswith("quoted")
+    assert len(errors) == 1
+
+
+def test_records_split_across_chunks(tmp_path):
+    records = [{"id": f"r{i}", "body": "x" * (i * 7)} for i in range(40)]
+    path = _write(tmp_path, json.dumps(records, indent=2))
+    assert list(iter_file(path, chunk_size=16)) == records
+
+
+def test_malformed_tail_is_reported_once(tmp_path):
+    path = _write(tmp_path, '[{"id": "a"}, {"id": "b", "cut')
+    errors = []
+    assert [r["id"] for r in iter_file(path, errors.append, chunk_size=8)] == ["a"]
+    assert len(errors) == 1
@@ -0,0 +1,86 @@
+from blockbench.packer import Symbols, elide, finding_symbols, pack
+
+from .conftest import VAULT
+
+ATTACKER = """\
+contract Attacker {
+    function attack(Vault v) external {
+        v.withdraw(1);
+    }
+
+    receive() external payable {
+        Vault(msg.sender).withdraw(1);
+    }
+}
+"""
+
+OTHER = """\
+contract Other {
+    function unrelated() external {
+        uint256 x = 1;
+    }
+}
+"""
+
+
+HELPER = """\
+contract Vault {
+    function withdraw(uint256 amount) external {
+        _settle(amount);
+    }
+
+    function _settle(uint256 amount) internal {
+""" + "        total -= amount;\n" * 40 + """    }
+}
+"""
+
+
+def _levels(packed):
+    return [(f.path, f.level) for f in packed.files]
+
+
+def test_symbols_come_from_vulnerable_functions_and_call_flow(record):
+    record["call_flow"] = "Router.swap() -> Pool.sync() -> _update()"
+    symbols = finding_symbols(record)
+    assert symbols.functions == {"withdraw", "swap", "sync", "_update"}
+    assert symbols.contracts == {"Vault", "Router", "Pool"}
+
+
+def test_elide_keeps_the_finding_functions_whole():
+    text = elide(VAULT, Symbols(frozenset({"withdraw"}), frozenset()))
+    assert "function deposit() external payable { /* ... 2 lines omitted" in text
+    assert "balances[msg.sender] -= amount;" in text
+    assert "msg.value" not in text
+
+
+def test_context_files_are_added_in_relevance_order(record):
+    record["context_files"] = [
+        {"path": "src/Other.sol", "content": OTHER},
+        {"path": "src/Attacker.sol", "content": ATTACKER},
+    ]
+    packed = pack(record)
+    assert _levels(packed) == [
+        ("src/Vault.sol", "full"),
+        ("src/Attacker.sol", "full"),
+        ("src/Other.sol", "full"),
+    ]
+    assert packed.render().startswith("// File: src/Vault.sol\npragma solidity")
+
+
+def test_a_small_budget_focuses_the_primary_and_drops_context(record):
+    record["context_files"] = [{"path": "src/Attacker.sol", "content": ATTACKER}]
+    packed = pack(record, budget=120)
+    assert _levels(packed) == [("src/Vault.sol", "focused")]
+    assert packed.dropped == ["src/Attacker.sol"]
+    assert packed.tokens <= 120
+    assert "function deposit" not in packed.render()
+
+
+def test_callees_are_dropped_before_the_budget_is_exceeded(record):
+    record["primary_file"].update(content=HELPER, vulnerable_lines=[3])
+    packed = pack(record, budget=60)
+    assert _levels(packed) == [("src/Vault.sol", "core")]
+    assert "_settle(amount);" in packed.render()
+    assert "total -= amount;" not in packed.render()
+    assert packed.overshoot == 0
+    assert pack(record, budget=10).overshoot == packed.tokens - 10
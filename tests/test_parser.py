@@ -0,0 +1,65 @@
+from blockbench.parser import AstCache, parse, walk
+from blockbench.solidity import outline
+
+from .conftest import VAULT
+
+EXCERPT = """\
+        balances[msg.sender] -= amount;
+    }
+
+uint256 constant FEE = 30;
+address owner = msg.sender;
+
+    function sweep(address to) external onlyOwner {
+        IERC20(token).transfer(to, IERC20(token).balanceOf(address(this)));
+    }
+}
+"""
+
+
+def _spans(nodes):
+    return sorted((n.kind, n.name, n.start, n.end) for n in walk(nodes))
+
+
+def _outline_spans(text):
+    return sorted(
+        (d.kind, d.name, d.start, d.end) for d in outline(text) if d.kind != "import"
+    )
+
+
+def test_parse_and_outline_agree():
+    for text in (VAULT, EXCERPT):
+        assert _spans(parse(text)) == _outline_spans(text)
+
+
+def test_contract_members_and_attributes():
+    (pragma, vault) = parse(VAULT)
+    assert pragma.attrs["value"] == "solidity^0.8.20"
+    assert vault.kind == "contract" and vault.attrs["bases"] == []
+    names = [child.name for child in vault.children]
+    assert names == ["balances", "deposit", "withdraw"]
+    withdraw = vault.children[2]
+    assert withdraw.attrs["parameters"] == [["uint256", "amount"]]
+    assert withdraw.attrs["visibility"] == "external"
+    assert (withdraw.start_line, withdraw.end_line) == (10, 15)
+    assert [None, "require", 11] in withdraw.attrs["calls"]
+
+
+def test_excerpt_keeps_only_constants_at_file_level():
+    nodes = parse(EXCERPT)
+    assert [(n.kind, n.name) for n in nodes] == [
+        ("variable", "FEE"),
+        ("function", "sweep"),
+    ]
+    assert nodes[0].attrs == {"constant": True, "type": "uint256"}
+    assert nodes[1].attrs["modifiers"] == ["onlyOwner"]
+
+
+def test_cache_reuses_unchanged_declarations(tmp_path):
+    cache = AstCache(tmp_path / "ast")
+    first = cache.parse(VAULT)
+    assert cache.parsed == 2  # the pragma and the contract
+    edited = VAULT.replace("+= msg.value", "+= msg.value + 0")
+    assert _spans(cache.parse(edited)) == _spans(parse(edited))
+    assert cache.reused == 1 and cache.parsed == 3
+    assert _spans(AstCache(tmp_path / "ast").parse(VAULT)) == _spans(first)
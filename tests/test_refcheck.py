@@ -0,0 +1,62 @@
+import json
+
+from blockbench import loader
+from blockbench.refcheck import check_record, main, report
+
+
+def _codes(record):
+    return [(i.field, i.code, i.severity) for i in check_record(record)]
+
+
+def test_the_sample_record_is_clean(record):
+    assert check_record(record) == []
+
+
+def test_call_flow_steps_must_name_declared_functions(record):
+    record["call_flow"] = "Vault.deposit() -> Vault.withdraw() -> Vault.drain()"
+    assert _codes(record) == [
+        ("call_flow", "unknown-symbol", "error"),
+        ("call_flow", "unlinked-step", "warning"),
+    ]
+
+
+def test_context_hint_lines_and_functions(record):
+    record["context_hint"] = (
+        "Vault.withdraw() at lines 7-8 pays out. See line 40. "
+        "The _payout function is gone."
+    )
+    issues = check_record(record)
+    assert [(i.code, i.severity) for i in issues] == [
+        ("line-outside-function", "warning"),
+        ("line-out-of-range", "error"),
+        ("unknown-symbol", "warning"),
+    ]
+    assert issues[1].message == "line 40 is outside src/Vault.sol (16 lines)"
+
+
+def test_report_counts_by_severity_and_code(record):
+    record["context_hint"] = "See lines 30-31 and line 99."
+    data = report(1, check_record(record))
+    assert (data["errors"], data["warnings"]) == (2, 0)
+    assert data["by_code"] == {"line-out-of-range": 2}
+    assert data["issues"][0]["record_id"] == record["id"]
+
+
+def test_malformed_records_are_errors(tmp_path, monkeypatch, capsys, record):
+    path = tmp_path / "findings.json"
+    good = json.dumps(record)
+    path.write_text(f'[{good}, {{"id": "bad" "x": 1}}]', encoding="utf-8")
+    monkeypatch.setattr(loader, "finding_files", lambda: [path])
+    out = tmp_path / "refcheck.json"
+    assert main(["--out", str(out), "--workers", "1"]) == 1
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert data["records"] == 1 and data["errors"] == 0
+    assert len(data["malformed"]) == 1
+    captured = capsys.readouterr()
+    assert captured.err.startswith(f"malformed: {path}:1:")
+    assert captured.out.startswith("1 records, 1 malformed, 0 errors")
+
+
+def test_options_need_a_value(capsys):
+    assert main(["--workers"]) == 2
+    assert "usage: refcheck" in capsys.readouterr().err
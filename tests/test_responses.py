@@ -0,0 +1,60 @@
+from blockbench.responses import ResponseCache, main
+
+
+def _summed(cache):
+    query = "SELECT COALESCE(SUM(size), 0) FROM responses"
+    return cache._db.execute(query).fetchone()[0]
+
+
+def test_size_total_follows_writes_replacements_and_evictions():
+    cache = ResponseCache(max_bytes=1000)
+    for n in range(50):
+        cache.put(f"k{n}", "stub:x", "x" * (n + 1))
+        assert cache.size() == _summed(cache) <= 1000
+    assert cache.evicted > 0
+    cache.put("k49", "stub:x", "short")
+    assert cache.size() == _summed(cache)
+    cache.prune(100)
+    assert cache.size() == _summed(cache) <= 100
+
+
+def test_size_total_is_seeded_for_an_existing_file(tmp_path):
+    path = tmp_path / "responses.sqlite"
+    cache = ResponseCache(path)
+    cache.put("a", "stub:x", "hello")
+    cache._db.execute("DROP TABLE totals")
+    cache.close()
+    reopened = ResponseCache(path)
+    assert reopened.size() == 5
+    reopened.put("b", "stub:x", "ab")
+    assert reopened.size() == 7
+
+
+def test_least_recently_used_is_evicted_first():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("old", "stub:x", "aaaa")
+    cache.put("new", "stub:x", "bbbb")
+    assert cache.get("old") == "aaaa"
+    cache.put("third", "stub:x", "cccc")
+    assert "new" not in cache and "old" in cache and "third" in cache
+
+
+def test_counters_are_kept_in_the_file(tmp_path):
+    path = tmp_path / "responses.sqlite"
+    cache = ResponseCache(path, max_bytes=6)
+    cache.put("a", "stub:x", "aaaa")
+    cache.put("b", "stub:x", "bbbb")
+    assert cache.get("b") == "bbbb" and cache.get("a") is None
+    cache.close()
+    reopened = ResponseCache(path)
+    reopened.get("b")
+    assert reopened.counters() == {"hits": 2, "misses": 1, "writes": 2, "evicted": 1}
+    assert (reopened.hits, reopened.misses) == (1, 0)
+
+
+def test_stats_command_prints_the_counters(tmp_path, monkeypatch, capsys):
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    cache.get("missing")
+    monkeypatch.setattr(ResponseCache, "on_disk", classmethod(lambda cls: cache))
+    assert main(["stats"]) == 0
+    assert "0 hits, 1 misses, 0 writes, 0 evicted" in capsys.readouterr().out
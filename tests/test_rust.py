@@ -0,0 +1,42 @@
+from blockbench.rust import identifiers, outline
+
+PROOF = """\
+use std::collections::HashMap;
+
+/* outer /* nested */ fn hidden() {} */
+#[derive(Debug)]
+pub struct Proof<'a> {
+    bytes: &'a [u8],
+}
+
+impl<'a> Verifier for Proof<'a> {
+    fn verify(&self, input: &[u8]) -> Result<(), Error> {
+        let raw = r#"fn fake() {}"#;
+        let c = '{';
+        Ok(())
+    }
+}
+
+pub const MAX: usize = 4;
+"""
+
+
+def test_impl_blocks_are_named_after_their_self_type():
+    assert [(d.kind, d.qualified_name) for d in outline(PROOF)] == [
+        ("use", "std::collections::HashMap"),
+        ("struct", "Proof"),
+        ("impl", "Proof"),
+        ("function", "Proof.verify"),
+        ("const", "MAX"),
+    ]
+
+
+def test_brace_literals_do_not_end_a_function():
+    verify = next(d for d in outline(PROOF) if d.name == "verify")
+    assert (verify.start_line, verify.end_line) == (10, 14)
+
+
+def test_comments_and_raw_strings_are_skipped():
+    names = identifiers(PROOF)
+    assert {"HashMap", "verify", "input", "MAX"} <= names
+    assert "hidden" not in names and "fake" not in names
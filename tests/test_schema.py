@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from blockbench.schema import (
+    RECORD,
+    check_record,
+    duplicate_ids,
+    main,
+    schema_source,
+    validate_file,
+)
+
+
+def test_the_sample_record_is_valid(record):
+    assert check_record(record) == []
+
+
+def test_problems_are_reported_by_json_pointer(record):
+    del record["chain"]
+    record["severity"] = "urgent"
+    record["finding_title"] = ""
+    record["primary_file"]["vulnerable_lines"][1] = "14"
+    record["extra"] = 1
+    assert [(i.field, i.code) for i in check_record(record)] == [
+        ("/chain", "missing"),
+        ("/severity", "enum"),
+        ("/finding_title", "length"),
+        ("/primary_file/vulnerable_lines/1", "type"),
+        ("/extra", "unknown-field"),
+    ]
+
+
+def test_records_without_an_id_are_labelled(record):
+    del record["id"]
+    [issue] = check_record(record, "<record 3>")
+    assert (issue.record_id, issue.field) == ("<record 3>", "/id")
+
+
+def test_the_validator_is_straight_line_code():
+    source, constants = schema_source(RECORD)
+    assert source.startswith("def validate(")
+    assert "for " in source and "while " not in source
+    assert any(hasattr(value, "fullmatch") for value in constants.values())
+
+
+def test_files_report_malformed_records_and_duplicate_ids(tmp_path, record):
+    good = json.dumps(record)
+    first = tmp_path / "a.json"
+    first.write_text(f'[{good}, {{"id": "bad" "x": 1}}]', encoding="utf-8")
+    second = tmp_path / "b.json"
+    second.write_text(f"[{good}]", encoding="utf-8")
+    reports = [validate_file(first), validate_file(second)]
+    assert [(r.records, len(r.malformed)) for r in reports] == [(1, 1), (1, 0)]
+    [duplicate] = duplicate_ids(reports)
+    assert duplicate.code == "duplicate-id"
+    assert duplicate.message == f"id already used in {first}"
+
+
+@pytest.mark.parametrize("argv", [["--workers"], ["--workers", "two"]])
+def test_workers_needs_a_number(argv, capsys):
+    assert main(argv) == 2
+    assert "usage: schema" in capsys.readouterr().err
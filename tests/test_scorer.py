@@ -0,0 +1,99 @@
+import pytest
+
+from blockbench.generate import render_prompts
+from blockbench.scorer import (
+    Truth,
+    grade,
+    main,
+    score_batch,
+    score_results,
+    strip_code,
+    total,
+)
+
+IDEAL = """\
+SECURITY AUDIT REPORT
+
+VULNERABILITY IDENTIFICATION
+Reentrancy in Vault.withdraw (lines 12-14): withdraw sends ether to the
+caller before it reduces the caller's balance, so a malicious contract can
+re-enter withdraw from its receive hook and withdraw its balance again.
+
+IMPACT ANALYSIS
+An attacker deposits one ether and re-enters from the fallback until the
+vault holds no ether, stealing every depositor's funds.
+
+RECOMMENDED REMEDIATION
+Reduce the balance before the external call, following checks-effects-
+interactions, or add a reentrancy guard to withdraw.
+"""
+
+
+@pytest.fixture
+def truth(record):
+    return Truth.of(record)
+
+
+def test_a_correct_report_scores_high(truth):
+    assert total(grade(IDEAL, truth)) >= 8
+
+
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_echoed_prompt_scores_low(record, truth, level):
+    prompt = render_prompts(record, [level])[level]
+    assert total(grade(prompt, truth)) < 2
+
+
+def test_echoed_code_scores_nothing(record, truth):
+    code = record["primary_file"]["content"]
+    numbered = "\n".join(
+        f"line {n}: {text}" for n, text in enumerate(code.splitlines(), 1)
+    )
+    assert total(grade(code, truth)) == 0
+    assert total(grade(numbered, truth)) == 0
+
+
+def test_pasting_code_after_a_report_does_not_add_points(record, truth):
+    fenced = IDEAL + "\n```solidity\n" + record["primary_file"]["content"] + "```\n"
+    assert total(grade(fenced, truth)) <= total(grade(IDEAL, truth))
+
+
+def test_indented_prose_reports_are_graded(truth):
+    indented = "\n".join("    " + line if line else line for line in IDEAL.split("\n"))
+    assert total(grade(indented, truth)) >= 8
+
+
+def test_padding_lowers_the_score(truth):
+    filler = " ".join(f"word{n}" for n in range(400))
+    assert total(grade(IDEAL + "\n" + filler, truth)) < total(grade(IDEAL, truth))
+
+
+def test_failed_jobs_are_flagged_not_graded(record, truth):
+    rows = [
+        {"prompt_id": f"{record['id']}/L1", "response": IDEAL},
+        {"prompt_id": f"{record['id']}/L2", "response": None, "error": "timeout"},
+    ]
+    good, failed = score_batch(rows, {truth.record_id: truth})
+    assert good.error is None and good.score >= 8
+    assert (failed.error, failed.score) == ("timeout", 0.0)
+
+
+def test_worker_processes_grade_like_the_serial_path(record, truth):
+    rows = [
+        {"prompt_id": f"{record['id']}/L{level}", "seed": seed, "response": IDEAL}
+        for level in (1, 2, 3)
+        for seed in range(3)
+    ]
+    truths = {truth.record_id: truth}
+    serial = list(score_results(rows, truths, workers=1))
+    assert list(score_results(rows, truths, workers=2)) == serial
+
+
+def test_strip_code_keeps_prose_and_list_items():
+    text = "Summary line.\n    uint256 x = 1;\n  - nested point\nfunction f() {\n"
+    assert strip_code(text).split() == ["Summary", "line.", "-", "nested", "point"]
+
+
+def test_options_need_a_value(capsys):
+    assert main(["results.jsonl", "--out"]) == 2
+    assert "usage: score" in capsys.readouterr().err
@@ -0,0 +1,59 @@
+from blockbench.slicer import GAP, slice_code, slice_record, split_lines
+
+GUARDED = """\
+pragma solidity ^0.8.20;
+
+contract Pool {
+    uint256 public reserve;
+    uint256 public unused;
+    event Synced(uint256 reserve);
+
+    modifier lock() {
+        _;
+    }
+
+    function sync() external lock {
+        reserve = address(this).balance;
+        emit Synced(reserve);
+    }
+
+    function other() external {
+        unused = 1;
+    }
+}
+"""
+
+
+def test_record_slice_keeps_the_vulnerable_function(record):
+    result = slice_record(record)
+    assert result.functions == ["Vault.withdraw"]
+    assert "function withdraw" in result.text
+    assert "function deposit" not in result.text
+    assert result.line_map[:2] == [1, None]
+    assert result.text.split("\n")[1].strip() == GAP
+
+
+def test_modifiers_and_referenced_declarations_are_pulled_in():
+    result = slice_code(GUARDED, functions=["Pool.sync"])
+    kept = result.text
+    assert "modifier lock()" in kept
+    assert "uint256 public reserve;" in kept
+    assert "event Synced" in kept
+    assert "unused" not in kept
+    assert result.text.split("\n")[-1] == "}"
+
+
+def test_excerpt_lines_map_back_to_the_original():
+    result = slice_code(GUARDED, lines=[13])
+    original = split_lines(GUARDED)
+    for number, line in enumerate(result.text.split("\n"), 1):
+        source = result.original_line(number)
+        if source is not None:
+            assert original[source - 1] == line
+    assert 13 in result.line_map
+    assert result.original_line(len(result.line_map) + 1) is None
+
+
+def test_nothing_found_gives_an_empty_slice():
+    assert slice_code(GUARDED, lines=[99], functions=["missing"]).text == ""
+    assert split_lines("a\r\nb\rc\n") == ["a", "b", "c"]
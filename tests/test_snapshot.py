@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from blockbench.snapshot import Snapshot, build_snapshot, main
+
+
+@pytest.fixture
+def snap_path(tmp_path, record):
+    findings = tmp_path / "findings.json"
+    rows = [record, dict(record, id="second", severity="low", difficulty_tier=3)]
+    findings.write_text(json.dumps(rows), encoding="utf-8")
+    return build_snapshot(tmp_path / "corpus.snap", [findings])
+
+
+def test_query_by_categorical_and_integer_fields(snap_path):
+    with Snapshot(snap_path) as snap:
+        assert len(snap) == 2
+        assert [snap.get(r, "id") for r in snap.where(severity="low")] == ["second"]
+        assert snap.where(difficulty_tier=[1, 3]) == [0, 1]
+        assert snap.get(0, "primary_file")["vulnerable_lines"] == [12, 14]
+
+
+def test_query_command(snap_path, capsys):
+    assert main(["query", "--out", str(snap_path), "severity=high"]) == 0
+    assert capsys.readouterr().out.split() == ["gs_test_vault_H01"]
+
+
+@pytest.mark.parametrize(
+    "args, message",
+    [
+        (["nope=1"], "unknown field nope"),
+        (["difficulty_tier=x"], "difficulty_tier takes integers"),
+        (["severity"], "expected FIELD=VALUE"),
+    ],
+)
+def test_bad_queries_exit_2(snap_path, capsys, args, message):
+    assert main(["query", "--out", str(snap_path), *args]) == 2
+    assert message in capsys.readouterr().err
+
+
+def test_out_needs_a_value(capsys):
+    assert main(["query", "severity=high", "--out"]) == 2
+    assert "usage: snapshot" in capsys.readouterr().err
+
+
+def test_missing_snapshot_exits_2(tmp_path, capsys):
+    missing = tmp_path / "missing.snap"
+    assert main(["query", "--out", str(missing), "severity=high"]) == 2
+    assert "snapshot build" in capsys.readouterr().err
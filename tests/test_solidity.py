@@ -0,0 +1,53 @@
+from blockbench.solidity import enclosing, header_modifiers, identifiers, outline
+
+from .conftest import VAULT
+
+GUARDED = """\
+abstract contract Guarded is Ownable {
+    uint256 constant LIMIT = 10; // not a function: call(x)
+    string note = "function fake() {}";
+
+    modifier onlyEOA() {
+        require(tx.origin == msg.sender);
+        _;
+    }
+
+    function sweep(address to) external onlyOwner onlyEOA returns (uint256) {
+        return LIMIT;
+    }
+}
+"""
+
+
+def _names(text):
+    return [(d.kind, d.qualified_name) for d in outline(text)]
+
+
+def test_outline_lists_containers_before_members():
+    assert _names(GUARDED) == [
+        ("contract", "Guarded"),
+        ("variable", "Guarded.LIMIT"),
+        ("variable", "Guarded.note"),
+        ("modifier", "Guarded.onlyEOA"),
+        ("function", "Guarded.sweep"),
+    ]
+
+
+def test_declaration_lines_are_one_based_and_inclusive():
+    decls = {d.qualified_name: d for d in outline(VAULT)}
+    withdraw = decls["Vault.withdraw"]
+    assert (withdraw.start_line, withdraw.end_line) == (10, 15)
+    assert VAULT[withdraw.body[0]] == "{" and VAULT[withdraw.body[1] - 1] == "}"
+    assert enclosing(list(decls.values()), 12) is withdraw
+    assert enclosing(list(decls.values()), 4).name == "balances"
+
+
+def test_header_modifiers_skip_keywords_and_returns():
+    sweep = outline(GUARDED)[-1]
+    assert header_modifiers(GUARDED, sweep) == ["onlyOwner", "onlyEOA"]
+
+
+def test_identifiers_ignore_comments_and_strings():
+    names = identifiers(GUARDED)
+    assert {"LIMIT", "onlyEOA", "sweep"} <= names
+    assert "fake" not in names and "call" not in names
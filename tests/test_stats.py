@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from blockbench.stats import ResultStore, breakdown, compare, main
+
+
+@pytest.fixture
+def store():
+    rng = random.Random(7)
+    rows = []
+    for record in range(12):
+        for level in (1, 2, 3):
+            for model, bias in (("stub:a", 1.0), ("stub:b", 0.0)):
+                for seed in (0, 1):
+                    rows.append(
+                        {
+                            "prompt_id": f"R{record}/L{level}",
+                            "record_id": f"R{record}",
+                            "level": level,
+                            "model": model,
+                            "seed": seed,
+                            "score": 5 + bias + rng.gauss(0, 1),
+                        }
+                    )
+    rows.append({"prompt_id": "Task-1/prompt_1", "model": "stub:a", "score": 9.0})
+    store = ResultStore()
+    store.add("run", rows, records={})
+    yield store
+    store.close()
+
+
+def test_failed_jobs_are_not_ingested():
+    rows = [
+        {"prompt_id": "R1/L1", "record_id": "R1", "model": "m", "score": 7.0},
+        {"prompt_id": "R1/L2", "record_id": "R1", "model": "m", "score": 0.0,
+         "error": "lost: response abc is no longer cached"},
+    ]
+    store = ResultStore()
+    assert store.add("run", rows, records={}) == 1
+    assert store.record_means("run", "m") == {("R1", ""): 7.0}
+    store.close()
+
+
+def test_records_are_the_unit_of_analysis(store):
+    means = store.record_means("run", "stub:a")
+    assert len(means) == 13  # twelve records and one hand-graded prompt
+    result = compare(store, "run", "stub:a", "stub:b", resamples=500)
+    assert result.n == 12
+    assert result.low < result.difference < result.high
+    assert result.low > 0
+
+
+def test_breakdown_by_level_counts_each_record_once_per_level(store):
+    table = breakdown(store, "run", "level", resamples=50)
+    assert {level: s.n for level, s in table["stub:b"].items()} == {
+        "1": 12,
+        "2": 12,
+        "3": 12,
+    }
+
+
+def test_compare_without_shared_records(store, monkeypatch, capsys):
+    assert compare(store, "run", "stub:a", "stub:missing", resamples=10).n == 0
+    monkeypatch.setattr(ResultStore, "on_disk", classmethod(lambda cls: store))
+    code = main(["compare", "stub:a", "stub:missing", "--run", "run"])
+    assert code == 1
+    assert "share no scored records" in capsys.readouterr().err
+
+
+def test_options_need_a_value(capsys):
+    assert main(["ingest", "--run"]) == 2
+    assert "usage: stats" in capsys.readouterr().err
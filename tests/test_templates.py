@@ -0,0 +1,62 @@
+import pytest
+
+from blockbench.templates import FileRef, FragmentTable, PromptTemplate, parse
+
+PROMPT = """\
+<role_context>
+You are a smart contract auditor.
+</role_context>
+
+<code_input>
+{code}
+</code_input>
+
+<note>
+Focus on reentrancy.
+</note>
+"""
+
+
+@pytest.fixture
+def task(tmp_path):
+    folder = tmp_path / "Task-9"
+    folder.mkdir()
+    (folder / "problem.sol").write_text("contract A {}\n", encoding="utf-8")
+    path = folder / "prompt_1.py"
+    path.write_text(PROMPT.format(code="contract A {}"), encoding="utf-8")
+    return tmp_path, path
+
+
+def test_parsed_prompt_round_trips(task):
+    root, path = task
+    text = path.read_text(encoding="utf-8")
+    template = parse(text, path.parent, FragmentTable(root))
+    assert template.names == ["role_context", "code_input", "note"]
+    assert template.render() == text
+
+
+def test_code_input_is_read_from_the_problem_file(task):
+    root, path = task
+    template = parse(path.read_text(encoding="utf-8"), path.parent, FragmentTable(root))
+    assert template.sections["code_input"] == FileRef("Task-9/problem.sol")
+    (path.parent / "problem.sol").write_text("contract B {}\n", encoding="utf-8")
+    assert "contract B {}" in template.render()
+
+
+def test_variants_replace_only_named_sections():
+    base = parse(PROMPT.format(code="x"))
+    text = base.render(note="Check the loop bounds.")
+    assert "<note>\nCheck the loop bounds.\n</note>" in text
+    assert text.startswith(base.render().split("<note>")[0])
+    with pytest.raises(KeyError):
+        base.variant(missing="text")
+
+
+def test_build_lays_sections_out_like_the_task_prompts():
+    template = PromptTemplate.build(
+        [("role_context", "You are a smart contract auditor."), ("note", "Hi")]
+    )
+    assert template.render() == (
+        "<role_context>\nYou are a smart contract auditor.\n</role_context>\n\n"
+        "<note>\nHi\n</note>\n"
+    )